@@ -3,10 +3,11 @@ import timeit
 from typing import Callable, Iterable
 
 from vlcsync.vlc import VLC_IFACE_IP, Vlc
-from vlcsync.vlc_finder import LocalProcessFinderProvider
+from vlcsync.vlc_finder import LocalProcessFinderProvider, ProcNetFinderProvider
 from vlcsync.vlc_state import PlayState
 
 finder = LocalProcessFinderProvider(VLC_IFACE_IP)
+proc_finder = ProcNetFinderProvider(VLC_IFACE_IP)
 
 
 # Ps_utils 0.069
@@ -18,6 +19,12 @@ def bench_finder_utils():
             vlc_ports[p.pid] = port
 
 
+def bench_finder_procfs():
+    if not ProcNetFinderProvider.is_supported():
+        raise NotImplementedError()
+    proc_finder.get_vlc_list()
+
+
 status = "ioqewufpodia( state paused )"
 
 
@@ -37,7 +44,7 @@ def bench_index():
 
 def bench_extract_state_re():
     s = status
-    Vlc._extract_state(s + str(random.randint(0, 100500)))
+    Vlc._extract_state((s + str(random.randint(0, 100500))).encode())
 
 r = random.Random()
 def bench_extract_playlist_re():
@@ -51,7 +58,7 @@ def bench_extract_playlist_re():
     |   12 - Video 6.mkv (00:23:44)
     +----[ End of playlist ]
     """
-    Vlc._extract_playlist(s + str(random.randint(0, 100500)))
+    Vlc._extract_playlist((s + str(random.randint(0, 100500))).encode())
 
 
 def bench_in():
@@ -102,7 +109,8 @@ def suite(tests: Iterable[Callable], n=10):
 
 if __name__ == '__main__':
     suite([
-        bench_finder_utils
+        bench_finder_utils,
+        bench_finder_procfs
     ])
 
     suite([
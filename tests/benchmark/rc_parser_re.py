@@ -0,0 +1,41 @@
+""" Regex based parsers of rc answers (replaced by ``vlcsync.rc_parser``). Reference for benchmark and tests """
+import re
+from typing import List, Optional
+
+from vlcsync.vlc_state import PlayList, PlayListItem, PlayState
+
+RE_PLAYSTATE_COMPILED = re.compile(rb"\( state (playing|stopped|paused) \)")
+RE_PLAYLIST_ITEM = re.compile(rb'(?m)^\| {2}([ *])(\d+) - ')
+RE_INPUT = re.compile(rb"\( (?:new input|title): [^\r\n]*\)")
+
+
+def parse_state(status) -> PlayState:
+    match = RE_PLAYSTATE_COMPILED.search(status)
+    return PlayState(match.group(1).decode()) if match else PlayState.UNKNOWN
+
+
+def parse_input(status) -> bytes:
+    return b"".join(RE_INPUT.findall(status))
+
+
+def parse_time(seek) -> Optional[int]:
+    seek = bytes(seek).strip()
+    return int(seek) if seek != b'' else None
+
+
+def parse_volume(vol) -> Optional[int]:
+    vol = bytes(vol).strip()
+    return int(float(vol.replace(b",", b'.'))) if vol != b'' else None
+
+
+def parse_playlist(resp) -> PlayList:
+    items: List[PlayListItem] = []
+    active: Optional[PlayListItem] = None
+
+    for idx, match in enumerate(re.finditer(RE_PLAYLIST_ITEM, resp)):
+        item = PlayListItem(idx, int(match.group(2)))
+        items.append(item)
+        if match.group(1) == b"*":
+            active = item
+
+    return PlayList(items, active)
@@ -0,0 +1,36 @@
+import pytest
+
+from tests.benchmark import rc_parser_re
+from vlcsync import rc_parser
+
+STATUS = (b"( new input: file:///home/user/Videos/Video%202.mkv )\r\n"
+          b"( audio volume: 256 )\r\n"
+          b"( state playing )\r\n")
+PLAYLIST = (b"+----[ Playlist - playlist ]\r\n"
+            b"| 1 - Playlist\r\n"
+            + b"".join(b"|  %s%d - Video %d.mkv (00:23:44) [played 1 time]\r\n" % (b"*" if idx == 42 else b" ", idx, idx)
+                       for idx in range(4, 104))
+            + b"| 2 - Media Library\r\n"
+              b"+----[ End of playlist ]\r\n")
+ANSWERS = {
+    "status": ("parse_state", STATUS),
+    "input": ("parse_input", STATUS),
+    "get_time": ("parse_time", b"1425\r\n"),
+    "volume": ("parse_volume", b"256,0\r\n"),
+    "playlist": ("parse_playlist", PLAYLIST),
+}
+PARSERS = {"regex": rc_parser_re, "bytes": rc_parser}
+
+
+@pytest.mark.parametrize("parser", PARSERS.keys())
+@pytest.mark.parametrize("answer", ANSWERS.keys())
+def test_bench_parse(benchmark, answer, parser):
+    """ Parse answer as memoryview of receive buffer (as ``VlcSocket.cmds_raw()`` returns) """
+    benchmark.group = f"parse-{answer}"
+    func_name, data = ANSWERS[answer]
+    parse = getattr(PARSERS[parser], func_name)
+    view = memoryview(bytearray(data))
+
+    result = benchmark(parse, view)
+
+    assert result == getattr(rc_parser_re, func_name)(data)
@@ -0,0 +1,99 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from typing import List
+
+import pytest
+
+from tests.rc_emulator import RcEmulator
+from vlcsync.app_config import AppConfig
+from vlcsync.syncer import Syncer
+
+# Minutes per run: not collected by default (see pytest.ini), run by benchmark workflow or by "pytest -m slow"
+pytestmark = pytest.mark.slow
+
+PLAYERS = [1, 10, 50, 200]
+RC_LATENCIES = [0.0, 0.005, 0.02]
+""" Answer delay of emulated players: local, LAN, Wi-Fi or slow remote host """
+REGISTER_TIMEOUT = 60
+
+
+def close_all(emulators: List[RcEmulator]):
+    """ Shutdown concurrently, each emulator waits for its poll interval """
+    with ThreadPoolExecutor(max_workers=len(emulators)) as pool:
+        list(pool.map(RcEmulator.close, emulators))
+
+
+@contextmanager
+def running_syncer(players: int, latency: float, **options):
+    with ExitStack() as stack:
+        emulators = [RcEmulator(latency=latency).start() for _ in range(players)]
+        stack.callback(close_all, emulators)
+        app_config = AppConfig(extra_rc_hosts={emulator.vlc_id for emulator in emulators},
+                               no_local_discovery=True,
+                               no_timestamp_sync=False,
+                               volume_sync=False,
+                               **options)
+        syncer = stack.enter_context(Syncer(app_config))
+
+        deadline = time.time() + REGISTER_TIMEOUT
+        while len(syncer.env.all_vlc) < players:
+            assert time.time() < deadline, "Players not registered"
+            time.sleep(0.05)
+        syncer.do_check_synchronized()
+
+        yield syncer, emulators
+
+
+def measure_cpu(func):
+    """
+    Wrap ``func`` to collect CPU time of process: work of pool threads counts too.
+    Emulators share the process, so absolute value is higher than of real deployment, compare modes only
+    """
+    stats = {"calls": 0, "cpu": 0.0}
+
+    def wrapper():
+        start = time.process_time()
+        result = func()
+        stats["cpu"] += time.process_time() - start
+        stats["calls"] += 1
+        return result
+
+    return wrapper, stats
+
+
+def latency_id(latency: float) -> str:
+    return f"{latency * 1000:g}ms"
+
+
+@pytest.mark.parametrize("async_poll", [False, True], ids=["sync_poll", "async_poll"])
+@pytest.mark.parametrize("players", PLAYERS)
+@pytest.mark.parametrize("latency", RC_LATENCIES, ids=latency_id)
+def test_bench_tick(benchmark, latency, players, async_poll):
+    """ Tick without changes, i.e. probe all players """
+    benchmark.group = f"tick-{latency_id(latency)}-{players}"
+    with running_syncer(players, latency, async_poll=async_poll) as (syncer, _):
+        tick, stats = measure_cpu(syncer.do_check_synchronized)
+        changed = benchmark(tick)
+
+    assert not changed
+    benchmark.extra_info["cpu_per_tick"] = stats["cpu"] / stats["calls"]
+
+
+@pytest.mark.parametrize("parallel_sync", [False, True], ids=["serial_sync", "parallel_sync"])
+@pytest.mark.parametrize("players", PLAYERS)
+@pytest.mark.parametrize("latency", RC_LATENCIES, ids=latency_id)
+def test_bench_detect_to_sync(benchmark, latency, players, parallel_sync):
+    """ Tick right after one player paused/resumed by user: detect change and sync all players """
+    benchmark.group = f"detect-to-sync-{latency_id(latency)}-{players}"
+    with running_syncer(players, latency, parallel_sync=parallel_sync) as (syncer, emulators):
+        def user_toggle_pause():
+            emulators[0].execute("pause")
+
+        tick, stats = measure_cpu(syncer.do_check_synchronized)
+        changed = benchmark.pedantic(tick, setup=user_toggle_pause, rounds=5)
+        play_states = {emulator.play_state for emulator in emulators}
+
+    assert changed
+    assert len(play_states) == 1
+    benchmark.extra_info["cpu_per_tick"] = stats["cpu"] / stats["calls"]
@@ -9,26 +9,33 @@ class Player:
     start_dt: Optional[datetime] = None
     paused_seek: Optional[int] = None
     paused: bool = True
+    rate: float = 1.0
 
     def start(self):
         self.start_dt = datetime.now()
         self.paused = False
 
+    def play(self):
+        if self.paused and self.paused_seek is not None:
+            self.pause()
+        elif self.start_dt is None:
+            self.start()
+
     def seek(self, seconds):
         if self.paused:
             self.paused_seek = seconds
         else:
-            self.start_dt = datetime.now() - timedelta(seconds=seconds)
+            self.start_dt = datetime.now() - timedelta(seconds=seconds / self.rate)
 
     def pause(self):
         if self.paused:
-            assert self.paused_seek
-            self.start_dt = datetime.now() - timedelta(seconds=self.paused_seek)
+            assert self.paused_seek is not None
+            self.start_dt = datetime.now() - timedelta(seconds=self.paused_seek / self.rate)
             self.paused_seek = None
             self.paused = False
         else:
-            assert self.start
-            self.paused_seek = int((datetime.now() - self.start_dt).seconds)
+            assert self.start_dt
+            self.paused_seek = int(self.position())
             self.start_dt = None
             self.paused = True
 
@@ -37,11 +44,21 @@ class Player:
         self.paused_seek = None
         self.paused = False
 
+    def set_rate(self, rate: float):
+        if not self.paused and self.start_dt is not None:
+            position = self.position()
+            self.start_dt = datetime.now() - timedelta(seconds=position / rate)
+        self.rate = rate
+
+    def position(self) -> float:
+        """ Precise position while playing """
+        return (datetime.now() - self.start_dt).total_seconds() * self.rate
+
     def get_time(self):
         if self.paused:
             return self.paused_seek
         else:
-            return int((datetime.now() - self.start_dt).seconds)
+            return int(self.position())
 
 
 if __name__ == '__main__':
@@ -0,0 +1,141 @@
+import os
+import socket
+import socketserver
+import threading
+import time
+from typing import List, Optional, Sequence, Tuple
+
+from tests.player_emulator import Player
+from vlcsync.vlc_state import VlcId
+
+RC_BANNER = "VLC media player 3.0.18 Vetinari\r\nCommand Line Interface initialized. Type `help' for help.\r\n"
+RC_PROMPT = "> "
+FIRST_ITEM_INDEX = 4
+
+
+class _RcHandler(socketserver.StreamRequestHandler):
+    server: "RcEmulator"
+
+    def handle(self):
+        # Accepted socket inherits global default timeout (see vlc.py), rc clients may be idle for long
+        self.request.settimeout(None)
+        if self.server.address_family != socket.AF_UNIX:
+            self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        # Like vlc: next client is served (even gets banner) only after previous one disconnected
+        with self.server.client_lock:
+            if not self.server.muted:
+                self.wfile.write((RC_BANNER + RC_PROMPT).encode())
+            for line in self.rfile:
+                command = line.decode().strip()
+                self.server.received.append((time.time(), command))
+                if command.partition(" ")[0] == self.server.drop_on:
+                    return
+                if self.server.latency:
+                    time.sleep(self.server.latency)
+                answer = self.server.execute(command)
+                if not self.server.muted:
+                    self.wfile.write((answer + RC_PROMPT).encode())
+
+
+class RcEmulator(socketserver.ThreadingTCPServer):
+    """
+    Local VLC rc interface emulator on top of ``Player``.
+
+    Supports ``status``, ``get_time``, ``playlist``, ``seek``, ``pause``, ``play``, ``stop``, ``goto``, ``volume``
+    and ``rate``.
+    Every answer delayed by ``latency`` seconds, no banner and answers while ``muted`` (hung player).
+    Received commands are logged with receive time, connection is dropped on command ``drop_on`` (player lost).
+    Serves single client at a time (like vlc). Listens unix socket ``unix_path`` instead of tcp, if given.
+    """
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, items: Sequence[str] = ("Video 1.mkv", "Video 2.mkv"), latency: float = 0.0,
+                 addr: str = "127.0.0.1", unix_path: Optional[str] = None):
+        if unix_path:
+            self.address_family = socket.AF_UNIX
+        super().__init__(unix_path or (addr, 0), _RcHandler)
+        self.items = list(items)
+        self.active = 0
+        self.volume = 256
+        self.latency = latency
+        self.muted = False
+        self.received: List[Tuple[float, str]] = []
+        self.drop_on: Optional[str] = None
+        self.client_lock = threading.Lock()
+        self.player = Player()
+        self.player.start()
+        self._lock = threading.Lock()
+
+    @property
+    def vlc_id(self) -> VlcId:
+        if self.address_family == socket.AF_UNIX:
+            return VlcId(self.server_address, 0, scheme="unix")
+        addr, port = self.server_address[:2]
+        return VlcId(addr, port)
+
+    @property
+    def play_state(self) -> str:
+        if self.player.paused:
+            return "paused"
+        if self.player.start_dt is None:
+            return "stopped"
+        return "playing"
+
+    def execute(self, command: str) -> str:
+        name, _, arg = command.partition(" ")
+        with self._lock:
+            if name == "status":
+                return (f"( new input: file:///{self.items[self.active]} )\r\n"
+                        f"( audio volume: {self.volume} )\r\n"
+                        f"( state {self.play_state} )\r\n")
+            if name == "get_time":
+                return "\r\n" if self.play_state == "stopped" else f"{self.player.get_time()}\r\n"
+            if name == "playlist":
+                return self._playlist()
+            if name == "volume":
+                if not arg:
+                    return f"{self.volume}\r\n"
+                self.volume = int(arg)
+            elif name == "seek":
+                if self.play_state != "stopped":
+                    self.player.seek(int(arg))
+            elif name == "pause":
+                if self.play_state != "stopped":
+                    self.player.pause()
+            elif name == "play":
+                self.player.play()
+            elif name == "rate":
+                self.player.set_rate(float(arg))
+            elif name == "stop":
+                self.player.stop()
+            elif name == "goto":
+                self.active = int(arg) - FIRST_ITEM_INDEX
+                self.player.start()
+            else:
+                return f"Unknown command `{name}'. Type `help' for help.\r\n"
+            return ""
+
+    def _playlist(self) -> str:
+        lines = ["+----[ Playlist - playlist ]", "| 1 - Playlist"]
+        for idx, item in enumerate(self.items):
+            active = "*" if idx == self.active else " "
+            lines.append(f"|  {active}{FIRST_ITEM_INDEX + idx} - {item} (00:23:44)")
+        lines.append("+----[ End of playlist ]")
+        return "\r\n".join(lines) + "\r\n"
+
+    def start(self) -> "RcEmulator":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+        if self.address_family == socket.AF_UNIX:
+            os.unlink(self.server_address)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
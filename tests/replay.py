@@ -0,0 +1,184 @@
+"""
+Replay of recorded session (see ``vlcsync --record``) through ``Syncer`` against emulated players.
+
+Every recorded player is emulated (``RcEmulator``) with its median recorded latency. State changes
+detected from players (i.e. user actions) are applied to emulated players at recorded moments.
+Report shows time to sync all players per change and syncs not caused by changes (i.e. endless resyncing).
+
+    python -m tests.replay <log> [--speed 2] [--parallel-sync] [--async-poll] [--master-clock]
+"""
+from __future__ import annotations
+
+import statistics
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import click
+
+from tests.rc_emulator import FIRST_ITEM_INDEX, RcEmulator
+from vlcsync.app_config import AppConfig
+from vlcsync import metrics
+from vlcsync.metrics import SYNCS
+from vlcsync.recorder import RECV, SEND, STATE, Record, read_records
+from vlcsync.scheduler import PollScheduler
+from vlcsync.syncer import Syncer
+from vlcsync.vlc_state import PlayState, State
+
+REGISTER_TIMEOUT = 10
+SYNC_TIMEOUT = 5
+SETTLE_TIME = 1
+MAX_SEEK_DIFF = 2
+
+
+@dataclass
+class Session:
+    players: List[str]
+    latencies: Dict[str, float]
+    changes: List[Record]
+    """ State records of players, time relative to session start """
+
+
+@dataclass
+class ReplayReport:
+    changes: int = 0
+    syncs: int = 0
+    sync_times: List[float] = field(default_factory=list)
+    unsynced: int = 0
+
+    @property
+    def extra_syncs(self) -> int:
+        return self.syncs - self.changes
+
+    def __str__(self):
+        lines = [f"Changes replayed: {self.changes}, syncs: {self.syncs} (extra: {self.extra_syncs}), "
+                 f"not synced in {SYNC_TIMEOUT} s: {self.unsynced}"]
+        if self.sync_times:
+            lines.append(f"Change to all synced, ms: mean {statistics.mean(self.sync_times) * 1000:.1f}, "
+                         f"max {max(self.sync_times) * 1000:.1f}")
+        return "\n".join(lines)
+
+
+def load_session(path: str) -> Session:
+    players: List[str] = []
+    round_trips: Dict[str, List[float]] = defaultdict(list)
+    sent_at: Dict[str, List[float]] = defaultdict(list)
+    changes = []
+    start = None
+
+    for record in read_records(path):
+        start = record.time if start is None else start
+        if record.player and record.player not in players:
+            players.append(record.player)
+
+        if record.kind == SEND:
+            sent_at[record.player].append(record.time)
+        elif record.kind == RECV and sent_at[record.player]:
+            round_trips[record.player].append(record.time - sent_at[record.player].pop(0))
+        elif record.kind == STATE and record.player:
+            changes.append(record._replace(time=record.time - start))
+
+    latencies = {player: statistics.median(round_trips[player]) if round_trips[player] else 0.0
+                 for player in players}
+    return Session(players, latencies, changes)
+
+
+def apply_state(emulator: RcEmulator, state: State):
+    """ Bring emulated player to recorded state (as user did) """
+    if state.playlist_order_idx is not None and state.playlist_order_idx != emulator.active:
+        emulator.execute(f"goto {FIRST_ITEM_INDEX + state.playlist_order_idx}")
+    if state.play_state == PlayState.STOPPED:
+        emulator.execute("stop")
+        return
+
+    if emulator.play_state == "stopped":
+        emulator.execute("play")
+    if state.seek is not None:
+        emulator.execute(f"seek {state.seek}")
+    if (state.play_state == PlayState.PAUSED) != (emulator.play_state == "paused"):
+        emulator.execute("pause")
+
+
+def is_synced(emulators: List[RcEmulator]) -> bool:
+    if len({(emulator.active, emulator.play_state) for emulator in emulators}) > 1:
+        return False
+    if emulators[0].play_state == "stopped":
+        return True
+    times = [emulator.player.get_time() for emulator in emulators]
+    return max(times) - min(times) <= MAX_SEEK_DIFF
+
+
+def replay(path: str, speed: float = 1.0, **options) -> ReplayReport:
+    session = load_session(path)
+    items = max([change.state.playlist_order_idx or 0 for change in session.changes] + [1]) + 1
+    report = ReplayReport()
+
+    with ExitStack() as stack:
+        emulators = {}
+        for player in session.players:
+            emulators[player] = stack.enter_context(
+                RcEmulator([f"Video {idx}.mkv" for idx in range(items)], latency=session.latencies[player] / 2))
+        app_config = AppConfig({emulator.vlc_id for emulator in emulators.values()}, True, False, False, **options)
+        syncer = stack.enter_context(Syncer(app_config))
+
+        stopped = threading.Event()
+        syncer_thread = threading.Thread(target=_run_syncer, args=(syncer, app_config, stopped), daemon=True)
+        syncer_thread.start()
+        stack.callback(syncer_thread.join)
+        stack.callback(stopped.set)
+
+        deadline = time.time() + REGISTER_TIMEOUT
+        while len(syncer.env.all_vlc) < len(emulators) or not is_synced(list(emulators.values())):
+            if time.time() > deadline:
+                raise TimeoutError("Emulated players not registered")
+            time.sleep(0.01)
+
+        # Syncs are counted by metrics
+        metrics.enable()
+        syncs_before = SYNCS.value()
+        start = time.time()
+        for change in session.changes:
+            if (delay := start + change.time / speed - time.time()) > 0:
+                time.sleep(delay)
+
+            applied_at = time.time()
+            apply_state(emulators[change.player], change.state)
+            report.changes += 1
+            while not is_synced(list(emulators.values())):
+                if time.time() - applied_at > SYNC_TIMEOUT:
+                    report.unsynced += 1
+                    break
+                time.sleep(0.005)
+            else:
+                report.sync_times.append(time.time() - applied_at)
+
+        time.sleep(SETTLE_TIME)
+        report.syncs = int(SYNCS.value() - syncs_before)
+
+    return report
+
+
+def _run_syncer(syncer: Syncer, app_config: AppConfig, stopped: threading.Event):
+    scheduler = PollScheduler(app_config.min_interval, app_config.max_interval)
+    while not stopped.is_set():
+        changed = syncer.do_check_synchronized()
+        syncer.wait_next_tick(scheduler.next_interval(changed))
+
+
+@click.command()
+@click.argument("log", type=click.Path(exists=True, dir_okay=False))
+@click.option("--speed", type=float, default=1.0, help="Replay speed factor.")
+@click.option("--parallel-sync", is_flag=True)
+@click.option("--async-poll", is_flag=True)
+@click.option("--master-clock", is_flag=True)
+def main(log, speed, parallel_sync, async_poll, master_clock):
+    """ Replay recorded session against emulated players """
+    print(replay(log, speed, parallel_sync=parallel_sync, async_poll=async_poll, master_clock=master_clock),
+          flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import socket
+import threading
+import time
+from unittest import TestCase
+
+from tests.rc_emulator import RcEmulator
+from vlcsync.agent import AgentSyncer, Coordinator, MessageLink, decode_state, encode_state, player_key
+from vlcsync.app_config import AppConfig
+from vlcsync.vlc_state import PlayState, State, VlcId
+
+PLAYERS_PER_AGENT = 2
+SYNC_TIMEOUT = 10
+
+
+class TestStateCodec(TestCase):
+    def test_independent_of_clocks(self):
+        state = State(PlayState.PLAYING, 10, 1, vid_start_at=1000.0, volume=256)
+
+        # Receiver clock is 100 s ahead of sender one, message took 1 ms
+        received = decode_state(encode_state(state, now=1010.5), now=1110.501)
+
+        self.assertEqual((PlayState.PLAYING, 10, 1, 256),
+                         (received.play_state, received.seek, received.playlist_order_idx, received.volume))
+        self.assertAlmostEqual(1100.001, received.vid_start_at)
+        self.assertEqual(10, received.seek_at(1110.501))
+
+    def test_not_playing(self):
+        state = State(PlayState.STOPPED, None, None, vid_start_at=0)
+
+        self.assertEqual(0, decode_state(encode_state(state)).vid_start_at)
+
+    def test_player_key(self):
+        self.assertEqual("rc://127.0.0.1:4212", player_key(VlcId("127.0.0.1", 4212, pid=10)))
+        self.assertEqual("http://127.0.0.1:4212", player_key(VlcId("127.0.0.1", 4212, scheme="http")))
+
+
+class TestCoordinator(TestCase):
+    def test_stuck_agent_dropped(self):
+        with Coordinator(("127.0.0.1", 0), send_timeout=0.2) as coordinator:
+            threading.Thread(target=coordinator.serve_forever, daemon=True).start()
+            # Never reads messages
+            stuck = socket.create_connection(coordinator.server_address)
+            stuck.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+            live = MessageLink(socket.create_connection(coordinator.server_address))
+            received = []
+            threading.Thread(target=lambda: [received.append(message) for message in iter(live.recv, None)],
+                             daemon=True).start()
+            deadline = time.time() + SYNC_TIMEOUT
+            while len(coordinator._agents) < 2:
+                self.assertLess(time.time(), deadline, "Agents not registered")
+                time.sleep(0.01)
+
+            message = {"type": "sync", "payload": "x" * 100_000}
+            for _ in range(100):
+                coordinator.broadcast(message)
+
+            while len(coordinator._agents) > 1 or len(received) < 100:
+                self.assertLess(time.time(), deadline, "Stuck agent not dropped or broadcast not received")
+                time.sleep(0.01)
+            stuck.close()
+            live.close()
+            coordinator.shutdown()
+
+
+class TestAgents(TestCase):
+    def setUp(self):
+        self.start_coordinator(("127.0.0.1", 0))
+
+        self.emulators = []
+        self.agents = []
+        for _ in range(2):
+            emulators = [RcEmulator().start() for _ in range(PLAYERS_PER_AGENT)]
+            app_config = AppConfig({emulator.vlc_id for emulator in emulators}, True, False, False,
+                                   coordinator=self.coordinator.server_address)
+            agent = AgentSyncer(app_config)
+            self.emulators.extend(emulators)
+            self.agents.append(agent)
+
+        self.wait_for(lambda: all(len(agent.env.all_vlc) == PLAYERS_PER_AGENT for agent in self.agents))
+
+    def tearDown(self):
+        for agent in self.agents:
+            agent.close()
+        self.stop_coordinator()
+        for emulator in self.emulators:
+            emulator.close()
+
+    def start_coordinator(self, addr):
+        self.coordinator = Coordinator(addr)
+        threading.Thread(target=self.coordinator.serve_forever, daemon=True).start()
+
+    def stop_coordinator(self):
+        self.coordinator.shutdown()
+        self.coordinator.__exit__(None, None, None)
+
+    def wait_for(self, condition):
+        deadline = time.time() + SYNC_TIMEOUT
+        while not condition():
+            self.assertLess(time.time(), deadline, "Timeout")
+            for agent in self.agents:
+                agent.do_check_synchronized()
+                agent.wait_next_tick(0.01)
+
+    def test_sync_across_agents(self):
+        self.wait_for(lambda: {emulator.play_state for emulator in self.emulators} == {"playing"})
+
+        self.emulators[0].execute("pause")
+        self.wait_for(lambda: {emulator.play_state for emulator in self.emulators} == {"paused"})
+
+        self.emulators[-1].execute("goto 5")
+        self.wait_for(lambda: {emulator.active for emulator in self.emulators} == {1})
+
+    def test_coordinator_lost(self):
+        addr = self.coordinator.server_address
+        self.wait_for(lambda: {emulator.play_state for emulator in self.emulators} == {"playing"})
+        self.stop_coordinator()
+        self.wait_for(lambda: all(agent.link is None for agent in self.agents))
+
+        # Local players still registered and synced locally
+        self.emulators[0].execute("pause")
+        self.wait_for(lambda: self.emulators[1].play_state == "paused")
+        self.assertEqual({"playing"}, {emulator.play_state for emulator in self.emulators[PLAYERS_PER_AGENT:]})
+
+        self.start_coordinator(addr)
+        self.wait_for(lambda: all(agent.link is not None for agent in self.agents))
+        self.emulators[-1].execute("pause")
+        self.wait_for(lambda: {emulator.play_state for emulator in self.emulators} == {"paused"})
+
+    def test_start_without_coordinator(self):
+        addr = self.coordinator.server_address
+        self.stop_coordinator()
+        emulators = [RcEmulator().start() for _ in range(PLAYERS_PER_AGENT)]
+        self.emulators.extend(emulators)
+        start = time.time()
+        agent = AgentSyncer(AppConfig({emulator.vlc_id for emulator in emulators}, True, False, False,
+                                      coordinator=addr))
+        self.agents.append(agent)
+        self.assertLess(time.time() - start, 1)
+
+        self.wait_for(lambda: len(agent.env.all_vlc) == PLAYERS_PER_AGENT)
+        emulators[0].execute("pause")
+        self.wait_for(lambda: emulators[1].play_state == "paused")
+
+        self.start_coordinator(addr)
+        self.wait_for(lambda: all(agent.link is not None for agent in self.agents))
@@ -0,0 +1,67 @@
+from unittest import TestCase
+
+from vlcsync.clock_model import ClockModel
+from vlcsync.vlc_state import PlayState
+
+
+class TestClockModel(TestCase):
+    def test_predict(self):
+        clock = ClockModel(time_probe_interval=1)
+        self.assertTrue(clock.needs_time_probe(100))
+
+        clock.observe(10, 100.0, PlayState.PLAYING, b"file:///a.mp4")
+        self.assertFalse(clock.needs_time_probe(100.5))
+        self.assertTrue(clock.needs_time_probe(101))
+        self.assertEqual(13, clock.predict(103.2))
+        self.assertEqual(90, clock.vid_start_at())
+
+        clock.observe(13, 103.0, PlayState.PAUSED, b"file:///a.mp4")
+        self.assertEqual(13, clock.predict(110))
+
+    def test_outdated(self):
+        clock = ClockModel()
+        clock.observe(10, 100.0, PlayState.PLAYING, b"file:///a.mp4")
+
+        self.assertFalse(clock.is_outdated(PlayState.PLAYING, b"file:///a.mp4"))
+        self.assertTrue(clock.is_outdated(PlayState.PAUSED, b"file:///a.mp4"))
+        self.assertTrue(clock.is_outdated(PlayState.PLAYING, b"file:///b.mp4"))
+
+        clock.invalidate()
+        self.assertTrue(clock.needs_time_probe(100.1))
+        self.assertTrue(clock.is_outdated(PlayState.PLAYING, b"file:///a.mp4"))
+
+    def test_start_bounds(self):
+        clock = ClockModel()
+        # Real start is 90.3: position 10.2 at 100.5, 11.4 at 101.7, 12.9 at 103.2
+        clock.observe(10, 100.5, PlayState.PLAYING, b"file:///a.mp4")
+        self.assertEqual((89.5, 90.5), clock.start_bounds())
+        clock.observe(11, 101.7, PlayState.PLAYING, b"file:///a.mp4")
+        clock.observe(12, 103.2, PlayState.PLAYING, b"file:///a.mp4")
+        low, high = clock.start_bounds()
+        self.assertAlmostEqual(90.2, low)
+        self.assertAlmostEqual(90.5, high)
+
+        # Disjoint with previous bounds: position jumped
+        clock.observe(30, 104.0, PlayState.PLAYING, b"file:///a.mp4")
+        self.assertEqual((73.0, 74.0), clock.start_bounds())
+
+        clock.observe(30, 104.0, PlayState.PLAYING, b"file:///a.mp4", vid_start_at=73.6)
+        self.assertEqual((73.6, 73.6), clock.start_bounds())
+
+        clock.observe(30, 105.0, PlayState.PAUSED, b"file:///a.mp4")
+        self.assertIsNone(clock.start_bounds())
+
+    def test_split_time(self):
+        clock = ClockModel()
+        self.assertIsNone(clock.split_time(100))
+
+        clock.observe(10, 100.0, PlayState.PLAYING, b"file:///a.mp4")
+        self.assertEqual((89.0, 90.0), clock.start_bounds())
+        self.assertEqual(100.5, clock.split_time(100.2))
+
+        # Real start is 89.7: position 10.8 at 100.5, 11.05 at 100.75
+        clock.refine(10, 100.5)
+        self.assertEqual((89.5, 90.0), clock.start_bounds())
+        self.assertEqual(100.75, clock.split_time(100.6))
+        clock.refine(11, 100.75)
+        self.assertEqual((89.5, 89.75), clock.start_bounds())
@@ -2,7 +2,7 @@ import unittest
 
 from click.testing import CliRunner
 
-from vlcsync.cli_utils import parse_url
+from vlcsync.cli_utils import parse_http_url, parse_url
 from vlcsync.cli import main
 from vlcsync.vlc_state import VlcId
 
@@ -14,6 +14,13 @@ class SimpleTest(unittest.TestCase):
         actual = parse_url(None, None, {"127.0.0.1:21309"})
         assert expected == actual
 
+    def test_rc_and_http_same_address(self):
+        rc_hosts = parse_url(None, None, {"127.0.0.1:21309"})
+        http_hosts = parse_http_url(None, None, {"127.0.0.1:21309"})
+
+        self.assertEqual(2, len(rc_hosts | http_hosts))
+        self.assertEqual({"rc", "http"}, {vlc_id.scheme for vlc_id in rc_hosts | http_hosts})
+
     @staticmethod
     def test_invoke_help():
         runner = CliRunner(echo_stdin=True)
@@ -0,0 +1,55 @@
+import time
+from datetime import timedelta
+from contextlib import ExitStack
+from unittest import TestCase
+
+from tests.rc_emulator import RcEmulator
+from vlcsync.master_clock import MasterClock
+from vlcsync import metrics
+from vlcsync.metrics import DRIFT_CORRECTIONS
+from vlcsync.vlc import Vlc
+
+CONVERGE_TIMEOUT = 10
+
+
+class TestMasterClock(TestCase):
+    def test_certain_drift(self):
+        master_clock = MasterClock(tolerance=0.1)
+        self.assertEqual(0, master_clock.certain_drift((10.0, 11.0), (10.5, 10.5)))
+        self.assertAlmostEqual(0.3, master_clock.certain_drift((10.8, 11.0), (10.4, 10.5)))
+        self.assertAlmostEqual(-0.6, master_clock.certain_drift((9.5, 9.9), (10.5, 10.6)))
+
+    def test_nudge_rate(self):
+        master, follower = self._converge(drift=0.7)
+        self.assertEqual(0, DRIFT_CORRECTIONS.value(kind="seek") - self.seeks_before)
+        self.assertEqual(1.0, follower.player.rate)
+
+    def test_seek_large_drift(self):
+        self._converge(drift=-3.4)
+        self.assertEqual(1, DRIFT_CORRECTIONS.value(kind="seek") - self.seeks_before)
+
+    def _converge(self, drift: float):
+        """ Follower behind master by ``drift`` seconds (ahead if negative) """
+        metrics.enable()
+        self.addCleanup(metrics.enable, False)
+        self.seeks_before = DRIFT_CORRECTIONS.value(kind="seek")
+        with ExitStack() as stack:
+            master, follower = (stack.enter_context(RcEmulator()) for _ in range(2))
+            follower.player.start_dt = master.player.start_dt + timedelta(seconds=drift)
+
+            all_vlc = {}
+            for emulator in (master, follower):
+                all_vlc[emulator.vlc_id] = vlc = Vlc(emulator.vlc_id, time_probe_interval=0)
+                stack.callback(vlc.close)
+            master_clock = MasterClock(rate_nudge=0.5)
+            master_clock.master_id = master.vlc_id
+
+            deadline = time.time() + CONVERGE_TIMEOUT
+            while True:
+                states = {vlc_id: vlc.cur_state() for vlc_id, vlc in all_vlc.items()}
+                master_clock.correct(all_vlc, states)
+                offset = master.player.position() - follower.player.position()
+                if abs(offset) < 0.15 and not master_clock._nudged_until:
+                    return master, follower
+                self.assertLess(time.time(), deadline, f"Not converged, offset {offset:.3f}")
+                time.sleep(0.05)
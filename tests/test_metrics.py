@@ -0,0 +1,107 @@
+import time
+from unittest import TestCase
+from urllib.request import urlopen
+
+from vlcsync import metrics
+from tests.rc_emulator import RcEmulator
+from vlcsync.app_config import AppConfig
+from vlcsync.metrics import (COMMAND_LATENCY, DETECTION_TO_SYNC, Counter, Histogram, REGISTRY, metrics_label,
+                             observe_round_trip, remove_player, render, serve_metrics)
+from vlcsync.syncer import Syncer
+from vlcsync.vlc_state import VlcId
+
+
+class TestMetrics(TestCase):
+    def setUp(self):
+        self.counter = Counter("test_errors_total", "Errors", ["player"])
+        self.histogram = Histogram("test_latency_seconds", "Latency", ["command"], buckets=(0.1, 1))
+        metrics.enable()
+
+    def tearDown(self):
+        metrics.enable(False)
+        REGISTRY.remove(self.counter)
+        REGISTRY.remove(self.histogram)
+
+    def test_disabled(self):
+        metrics.enable(False)
+        self.counter.inc(player="a")
+        with self.histogram.time(command="status"):
+            pass
+
+        self.assertEqual(0, self.counter.value(player="a"))
+        self.assertEqual(0, self.histogram.count(command="status"))
+
+    def test_render(self):
+        self.counter.inc(player='a"b')
+        self.histogram.observe(0.05, command="status")
+        self.histogram.observe(0.1, command="status")
+        self.histogram.observe(3, command="status")
+
+        self.assertEqual(['# HELP test_errors_total Errors',
+                          '# TYPE test_errors_total counter',
+                          'test_errors_total{player="a\\"b"} 1'], self.counter.render())
+        self.assertEqual(['# HELP test_latency_seconds Latency',
+                          '# TYPE test_latency_seconds histogram',
+                          'test_latency_seconds_bucket{command="status",le="0.1"} 2',
+                          'test_latency_seconds_bucket{command="status",le="1"} 2',
+                          'test_latency_seconds_bucket{command="status",le="+Inf"} 3',
+                          'test_latency_seconds_sum{command="status"} 3.15',
+                          'test_latency_seconds_count{command="status"} 3'], self.histogram.render())
+
+    def test_round_trip_per_command(self):
+        player = VlcId("127.0.0.1", 1234)
+        self.addCleanup(remove_player, player)
+        observe_round_trip(0.01, "rc://127.0.0.1:1234", ["seek 10", "status"])
+        observe_round_trip(0.01, "rc://127.0.0.1:1234", ["status"])
+
+        self.assertEqual(1, COMMAND_LATENCY.count(player="rc://127.0.0.1:1234", command="seek"))
+        self.assertEqual(2, COMMAND_LATENCY.count(player="rc://127.0.0.1:1234", command="status"))
+
+    def test_remove_player(self):
+        rc_player, http_player = VlcId("127.0.0.1", 1234), VlcId("127.0.0.1", 1234, scheme="http")
+        self.counter.inc(player=metrics_label(rc_player))
+        self.counter.inc(player=metrics_label(http_player))
+        remove_player(rc_player)
+
+        self.assertEqual(0, self.counter.value(player=metrics_label(rc_player)))
+        self.assertEqual(1, self.counter.value(player=metrics_label(http_player)))
+
+    def test_serve(self):
+        self.counter.inc(player="127.0.0.1:1234")
+        server = serve_metrics(0)
+        try:
+            with urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics") as response:
+                body = response.read().decode()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.assertEqual(render(), body)
+        self.assertIn('test_errors_total{player="127.0.0.1:1234"} 1', body)
+        self.assertIn("# TYPE vlcsync_command_latency_seconds histogram", body)
+
+
+class TestDetectionToSync(TestCase):
+    def test_includes_coalesce_window(self):
+        metrics.enable()
+        self.addCleanup(metrics.enable, False)
+        DETECTION_TO_SYNC.clear()
+        emulators = [RcEmulator().start() for _ in range(2)]
+        syncer = Syncer(AppConfig({emulator.vlc_id for emulator in emulators}, True, False, False,
+                                  coalesce_window=0.5))
+        self.addCleanup(lambda: [emulator.close() for emulator in emulators])
+        self.addCleanup(syncer.close)
+
+        def wait_for(condition):
+            deadline = time.time() + 10
+            while not condition():
+                self.assertLess(time.time(), deadline, "Timeout")
+                syncer.do_check_synchronized()
+                syncer.wait_next_tick(0.01)
+
+        wait_for(lambda: len(syncer.env.all_vlc) == 2)
+        DETECTION_TO_SYNC.clear()
+        emulators[0].execute("seek 100")
+        wait_for(lambda: DETECTION_TO_SYNC.count() == 1)
+
+        self.assertGreaterEqual(DETECTION_TO_SYNC.sum(), 0.5)
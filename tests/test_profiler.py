@@ -0,0 +1,57 @@
+import os
+import signal
+import tempfile
+import time
+from unittest import TestCase
+
+from tests.rc_emulator import RcEmulator
+from vlcsync.profiler import Profiler
+from vlcsync.vlc import Vlc
+from vlcsync.vlc_socket import RecvBuffer
+
+
+class TestProfiler(TestCase):
+    def test_profile(self):
+        original_fill = RecvBuffer.__dict__["fill"]
+        with tempfile.TemporaryDirectory() as tmp_dir, RcEmulator() as emulator:
+            prefix = os.path.join(tmp_dir, "profile")
+            profiler = Profiler(prefix, sample_interval=0.001, cprofile=True)
+            profiler.start()
+
+            vlc = Vlc(emulator.vlc_id)
+            vlc.playlist()
+            deadline = time.time() + 0.05
+            while time.time() < deadline:
+                vlc.cur_state()
+            vlc.close()
+            profiler.stop()
+
+            self.assertEqual({"socket_wait", "parse"}, set(profiler.phases.keys()))
+            self.assertIs(original_fill, RecvBuffer.__dict__["fill"])
+            self.assertTrue(os.path.getsize(f"{prefix}.pstats"))
+            with open(f"{prefix}.collapsed") as f:
+                self.assertRegex(f.read(), r"(?m)^MainThread;.+ \d+$")
+
+    def test_dump_on_signals(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            prefix = os.path.join(tmp_dir, "profile")
+            profiler = Profiler(prefix)
+            profiler.start()
+            self.addCleanup(profiler.stop)
+
+            # Not dumped by signal handler itself, but by main loop
+            os.kill(os.getpid(), signal.SIGUSR1)
+            time.sleep(0.01)
+            self.assertFalse(os.path.exists(f"{prefix}.collapsed"))
+            profiler.dump_if_requested()
+            self.assertTrue(os.path.exists(f"{prefix}.collapsed"))
+            # No cProfile by default
+            self.assertFalse(os.path.exists(f"{prefix}.pstats"))
+
+            os.remove(f"{prefix}.collapsed")
+            with self.assertRaises(SystemExit):
+                os.kill(os.getpid(), signal.SIGTERM)
+                time.sleep(0.01)
+            profiler.stop()  # atexit
+            self.assertTrue(os.path.exists(f"{prefix}.collapsed"))
+            self.assertIs(signal.SIG_DFL, signal.getsignal(signal.SIGTERM))
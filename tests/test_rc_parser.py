@@ -0,0 +1,48 @@
+from unittest import TestCase
+
+from tests.benchmark import rc_parser_re
+from vlcsync import rc_parser
+from vlcsync.vlc_state import PlayState
+
+STATUS = (b"( new input: file:///Video 2 (2).mkv )\r\n"
+          b"( title: Video ) 2 )\r\n"
+          b"( audio volume: 256 )\r\n"
+          b"( state paused )\r\n")
+PLAYLIST = ("+----[ Playlist - playlist ]\r\n"
+            "| 1 - Плейлист\r\n"
+            "|   6 - Video 1.mkv (00:23:37) [played 1 time]\r\n"
+            "|  *4 - A |   5 - B.mkv (00:23:44) [played 2 times]\r\n"
+            "|     7 - Nested.mkv\r\n"
+            "|   3 - Video - 3.mkv (00:23:43)\r\n"
+            "| 2 - Медиатека\r\n"
+            "|   12 - Video 6.mkv (00:23:44)\r\n"
+            "+----[ End of playlist ]\r\n").encode()
+
+
+class TestRcParser(TestCase):
+    def test_status(self):
+        status = memoryview(STATUS)
+        self.assertEqual(PlayState.PAUSED, rc_parser.parse_state(status))
+        self.assertEqual(PlayState.UNKNOWN, rc_parser.parse_state(b"( state buffering )\r\n"))
+        self.assertEqual(PlayState.UNKNOWN, rc_parser.parse_state(b""))
+        self.assertEqual(b"( new input: file:///Video 2 (2).mkv )( title: Video ) 2 )", rc_parser.parse_input(status))
+        self.assertEqual(256, rc_parser.parse_status_volume(status))
+        self.assertIsNone(rc_parser.parse_status_volume(b"( state stopped )\r\n"))
+
+    def test_time_and_volume(self):
+        self.assertEqual(125, rc_parser.parse_time(b"125\r\n"))
+        self.assertIsNone(rc_parser.parse_time(b"\r\n"))
+        self.assertEqual(256, rc_parser.parse_volume(b"256,0\r\n"))
+        self.assertIsNone(rc_parser.parse_volume(b""))
+
+    def test_playlist(self):
+        playlist = rc_parser.parse_playlist(memoryview(PLAYLIST))
+
+        self.assertEqual([6, 4, 3, 12], [item.vlc_internal_index for item in playlist.items])
+        self.assertEqual(1, playlist.active_order_index())
+        self.assertIsNone(rc_parser.parse_playlist(b"+----[ End of playlist ]\r\n").active_item)
+
+    def test_same_as_regex(self):
+        for func_name, data in [("parse_state", STATUS), ("parse_input", STATUS), ("parse_playlist", PLAYLIST)]:
+            with self.subTest(func_name):
+                self.assertEqual(getattr(rc_parser_re, func_name)(data), getattr(rc_parser, func_name)(data))
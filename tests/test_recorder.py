@@ -0,0 +1,66 @@
+import os
+import tempfile
+import time
+from unittest import TestCase
+
+from tests.rc_emulator import RcEmulator
+from tests.replay import replay
+from vlcsync.agent import player_key
+from vlcsync.app_config import AppConfig
+from vlcsync.recorder import RECV, SEND, STATE, Recorder, pack_record, read_records
+from vlcsync.syncer import Syncer
+from vlcsync.vlc_socket import VlcSocket
+from vlcsync.vlc_state import PlayState
+
+SYNC_TIMEOUT = 5
+
+
+class TestRecorder(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.log = os.path.join(self.tmp_dir.name, "session.rec")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_record_and_replay(self):
+        original_send = VlcSocket.__dict__["send"]
+        recorder = Recorder(self.log)
+        recorder.start()
+        with RcEmulator() as source, RcEmulator() as target:
+            app_config = AppConfig({source.vlc_id, target.vlc_id}, True, False, False)
+            with Syncer(app_config) as syncer:
+                self.wait_for(syncer, lambda: len(syncer.env.all_vlc) == 2)
+                source.execute("pause")
+                self.wait_for(syncer, lambda: target.play_state == "paused")
+        recorder.stop()
+        self.assertIs(original_send, VlcSocket.__dict__["send"])
+
+        records = list(read_records(self.log))
+        self.assertEqual({SEND, RECV, STATE}, {record.kind for record in records})
+        self.assertIn("status", next(record for record in records if record.kind == SEND).commands)
+        change, = [record for record in records if record.kind == STATE]
+        self.assertEqual(player_key(source.vlc_id), change.player)
+        self.assertEqual(PlayState.PAUSED, change.state.play_state)
+
+        report = replay(self.log, speed=10)
+        self.assertEqual(1, report.changes)
+        self.assertEqual(1, report.syncs)
+        self.assertEqual(0, report.unsynced)
+
+    def test_incomplete_record_ignored(self):
+        recorder = Recorder(self.log)
+        recorder.start()
+        recorder.stop()
+        with open(self.log, "ab") as f:
+            f.write(pack_record(SEND, 1.0, [b"127.0.0.1:4212", b"status"])[:-1])
+
+        self.assertEqual([], list(read_records(self.log)))
+
+    @staticmethod
+    def wait_for(syncer: Syncer, condition):
+        deadline = time.time() + SYNC_TIMEOUT
+        while not condition():
+            assert time.time() < deadline, "Timeout"
+            syncer.do_check_synchronized()
+            time.sleep(0.01)
@@ -0,0 +1,17 @@
+from unittest import TestCase
+
+from vlcsync.scheduler import PollScheduler
+
+
+class TestPollScheduler(TestCase):
+    def test_backoff_and_reset(self):
+        scheduler = PollScheduler(min_interval=0.1, max_interval=0.3, backoff=2)
+
+        self.assertAlmostEqual(0.2, scheduler.next_interval(changed=False))
+        self.assertAlmostEqual(0.3, scheduler.next_interval(changed=False))
+        self.assertAlmostEqual(0.3, scheduler.next_interval(changed=False))
+        self.assertAlmostEqual(0.1, scheduler.next_interval(changed=True))
+
+    def test_invalid_intervals(self):
+        with self.assertRaises(ValueError):
+            PollScheduler(min_interval=1, max_interval=0.5)
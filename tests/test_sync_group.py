@@ -0,0 +1,97 @@
+import time
+from unittest import TestCase
+
+import click
+
+from tests.rc_emulator import RcEmulator
+from vlcsync.app_config import AppConfig
+from vlcsync.cli_utils import parse_group, parse_groups, parse_http_url
+from vlcsync.sync_group import SyncGroup, find_group
+from vlcsync.syncer import Syncer, manual_hosts
+from vlcsync.vlc_state import VlcId
+
+SYNC_TIMEOUT = 10
+
+
+class TestSyncGroup(TestCase):
+    def test_parse_group(self):
+        group = parse_group("wall1=4212-4220,4230,192.168.1.10:4212,/run/vlc/wall1-*.sock")
+
+        self.assertEqual("wall1", group.name)
+        self.assertEqual([(4212, 4220), (4230, 4230)], group.port_ranges)
+        self.assertEqual({VlcId("192.168.1.10", 4212)}, group.hosts)
+        self.assertEqual(["/run/vlc/wall1-*.sock"], group.paths)
+
+    def test_parse_invalid(self):
+        for value in ("wall1", "=4212", "wall1=", "wall1=4220-4212", "wall1=host:port"):
+            with self.subTest(value=value), self.assertRaises(click.BadParameter):
+                parse_group(value)
+        with self.assertRaises(click.BadParameter):
+            parse_groups(None, None, ("wall1=4212", "wall1=4213"))
+
+    def test_matches(self):
+        group = SyncGroup("wall1", [(4212, 4220)], {VlcId("192.168.1.10", 5000)}, ["/run/vlc/wall1-*.sock"])
+
+        self.assertTrue(group.matches(VlcId("127.0.0.42", 4212)))
+        self.assertTrue(group.matches(VlcId("192.168.1.20", 4220)))
+        self.assertFalse(group.matches(VlcId("127.0.0.42", 4221)))
+        self.assertTrue(group.matches(VlcId("192.168.1.10", 5000, scheme="http")))
+        self.assertFalse(group.matches(VlcId("192.168.1.11", 5000)))
+        self.assertTrue(group.matches(VlcId("/run/vlc/wall1-a.sock", 0, scheme="unix")))
+        self.assertFalse(group.matches(VlcId("/run/vlc/wall2-a.sock", 0, scheme="unix")))
+
+    def test_explicit_host_wins(self):
+        http_hosts = parse_http_url(None, None, ["10.0.0.5:8080"])
+        app_config = AppConfig(http_hosts, True, False, False,
+                               groups=[parse_group("wall=10.0.0.5:8080,10.0.0.6:4212")])
+
+        self.assertEqual({VlcId("10.0.0.5", 8080, scheme="http"), VlcId("10.0.0.6", 4212)},
+                         manual_hosts(app_config))
+
+    def test_find_group_first_match(self):
+        groups = [SyncGroup("a", [(4212, 4220)]), SyncGroup("b", [(4200, 4300)])]
+
+        self.assertEqual("a", find_group(groups, VlcId("127.0.0.42", 4215)).name)
+        self.assertEqual("b", find_group(groups, VlcId("127.0.0.42", 4250)).name)
+        self.assertIsNone(find_group(groups, VlcId("127.0.0.42", 4301)))
+
+
+class TestSyncGroups(TestCase):
+    def setUp(self):
+        self.emulators = [RcEmulator().start() for _ in range(5)]
+        groups = [SyncGroup("a", hosts={emulator.vlc_id for emulator in self.emulators[:2]}),
+                  SyncGroup("b", hosts={emulator.vlc_id for emulator in self.emulators[2:4]})]
+        # Last player is not grouped
+        app_config = AppConfig({self.emulators[-1].vlc_id}, True, False, False, groups=groups)
+        self.syncer = Syncer(app_config)
+        self.wait_for(lambda: len(self.syncer.env.all_vlc) == len(self.emulators))
+
+    def tearDown(self):
+        self.syncer.close()
+        for emulator in self.emulators:
+            emulator.close()
+
+    def wait_for(self, condition):
+        deadline = time.time() + SYNC_TIMEOUT
+        while not condition():
+            self.assertLess(time.time(), deadline, "Timeout")
+            self.syncer.do_check_synchronized()
+            self.syncer.wait_next_tick(0.01)
+
+    def test_sync_within_group(self):
+        group_a, group_b, ungrouped = self.emulators[:2], self.emulators[2:4], self.emulators[-1]
+        self.wait_for(lambda: {emulator.play_state for emulator in self.emulators} == {"playing"})
+
+        group_a[0].execute("pause")
+        self.wait_for(lambda: group_a[1].play_state == "paused")
+        group_b[1].execute("goto 5")
+        self.wait_for(lambda: group_b[0].active == 1)
+
+        self.assertEqual({"playing"}, {emulator.play_state for emulator in group_b + [ungrouped]})
+        self.assertEqual({0}, {emulator.active for emulator in group_a + [ungrouped]})
+
+        ungrouped.execute("stop")
+        for _ in range(10):
+            self.syncer.do_check_synchronized()
+        self.assertEqual({"paused"}, {emulator.play_state for emulator in group_a})
+        self.assertEqual({"playing"}, {emulator.play_state for emulator in group_b})
@@ -0,0 +1,85 @@
+from unittest import TestCase
+
+from vlcsync.sync_machine import Phase, SyncMachine
+from vlcsync.vlc import Vlc
+from vlcsync.vlc_state import PlayState, State, VlcId
+
+
+class Player:
+    """ Player with state tracking of ``Vlc`` only """
+    is_state_change = Vlc.is_state_change
+
+    def __init__(self, port: int, state: State):
+        self.vlc_id = VlcId("127.0.0.1", port)
+        self.prev_state = state
+
+
+def playing(seek: int, at: float = 100.0, item: int = 0) -> State:
+    return State(PlayState.PLAYING, seek, item, at - seek)
+
+
+def paused(seek: int, item: int = 0) -> State:
+    return State(PlayState.PAUSED, seek, item, 0)
+
+
+class TestSyncMachine(TestCase):
+    def setUp(self):
+        self.machine = SyncMachine(coalesce_window=0.2, max_coalesce=1, echo_timeout=2)
+        self.source = Player(1, playing(0))
+        self.other = Player(2, playing(0))
+        self.all_vlc = {player.vlc_id: player for player in (self.source, self.other)}
+
+    def observe(self, source_state: State, now: float):
+        return self.machine.observe(self.all_vlc, {self.source.vlc_id: source_state,
+                                                   self.other.vlc_id: self.other.prev_state}, now)
+
+    def test_coalesce_seeks(self):
+        for idx, now in enumerate([100.0, 100.1, 100.2]):
+            self.assertIsNone(self.observe(playing(10 * (idx + 1), now), now))
+            self.assertEqual(Phase.COALESCING, self.machine.phase)
+
+        change = self.observe(playing(30, 100.4), 100.4)
+        self.assertIs(self.source, change.vlc)
+        self.assertEqual(30, change.state.seek)
+        self.assertEqual(Phase.IDLE, self.machine.phase)
+
+    def test_max_coalesce(self):
+        for idx in range(10):
+            now = 100.0 + idx * 0.15
+            if change := self.observe(playing(10 * (idx + 1), now), now):
+                break
+        # First change at 100.0, synced at 101.05 (8th change)
+        self.assertEqual(80, change.state.seek)
+
+    def test_pause_not_coalesced(self):
+        self.assertIsNone(self.observe(playing(10, 100.0), 100.0))
+        change = self.observe(paused(10), 100.05)
+        self.assertEqual(PlayState.PAUSED, change.state.play_state)
+        self.assertEqual(10, change.state.seek)
+
+    def test_echo(self):
+        target = paused(50)
+        self.source.prev_state = target
+        self.machine.synced(target, self.all_vlc, 100.0)
+        self.assertEqual(Phase.SETTLING, self.machine.phase)
+
+        # Seek of other player still in progress: in flight, not a change
+        states = {self.source.vlc_id: target, self.other.vlc_id: paused(3)}
+        self.assertIsNone(self.machine.observe(self.all_vlc, states, 100.1))
+        self.assertEqual(Phase.SETTLING, self.machine.phase)
+
+        states[self.other.vlc_id] = paused(50)
+        self.assertIsNone(self.machine.observe(self.all_vlc, states, 100.2))
+        self.assertEqual(Phase.IDLE, self.machine.phase)
+        self.assertEqual(paused(50), self.other.prev_state)
+
+    def test_no_echo(self):
+        target = paused(50)
+        self.source.prev_state = target
+        self.machine.synced(target, self.all_vlc, 100.0)
+
+        # User paused other player right after sync: not lost, detected after echo timeout
+        states = {self.source.vlc_id: target, self.other.vlc_id: paused(7)}
+        self.assertIsNone(self.machine.observe(self.all_vlc, states, 101.0))
+        change = self.machine.observe(self.all_vlc, states, 102.1)
+        self.assertIs(self.other, change.vlc)
@@ -1,7 +1,15 @@
-from unittest import TestCase
+import os
+from pathlib import Path
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from unittest import TestCase, skipUnless
 
 from vlcsync.vlc import VLC_IFACE_IP
-from vlcsync.vlc_finder import LocalProcessFinderProvider
+from vlcsync.vlc_finder import DiscoveryWatcher, LocalProcessFinderProvider, ProcNetFinderProvider
+from vlcsync.vlc_state import VlcId
 
 
 class TestVlcFinder(TestCase):
@@ -14,3 +22,145 @@ class TestVlcFinder(TestCase):
                 vlc_ports[p.pid] = port1
         for pid, port in vlc_ports.items():
             print(f"Found {pid=} {port=}")
+
+
+class TestProcNetFinder(TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.proc = Path(self._tmp.name)
+        uid = os.getuid()
+        (self.proc / "net").mkdir()
+        (self.proc / "net" / "tcp").write_text(
+            "  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode\n"
+            f"   0: 2A00007F:1F90 00000000:0000 0A 00000000:00000000 00:00000000 00000000 {uid:5}  0 1001 1\n"
+            f"   1: 2A00007F:1F91 00000000:0000 01 00000000:00000000 00:00000000 00000000 {uid:5}  0 1002 1\n"
+            f"   2: 0100007F:1F92 00000000:0000 0A 00000000:00000000 00:00000000 00000000 {uid:5}  0 1003 1\n"
+            f"   3: 2A00007F:1F93 00000000:0000 0A 00000000:00000000 00:00000000 00000000 {uid:5}  0 1004 1\n"
+        )
+        (self.proc / "net" / "unix").write_text(
+            "Num       RefCount Protocol Flags    Type St Inode Path\n"
+            "0000000000000000: 00000002 00000000 00010000 0001 01  2001 /run/user/1000/vlc 1.sock\n"
+            "0000000000000000: 00000003 00000000 00000000 0001 03  2002 /run/user/1000/vlc 1.sock\n"
+            "0000000000000000: 00000002 00000000 00010000 0001 01  2003 @/tmp/.X11-unix/X0\n"
+            "0000000000000000: 00000002 00000000 00010000 0001 01  2004 /run/user/1000/bus\n"
+            "0000000000000000: 00000002 00000000 00000000 0002 01  2005\n"
+        )
+        self._add_proc(100, b"vlc\n", {"3": "socket:[1001]", "4": "/dev/null", "5": "socket:[2001]",
+                                        "6": "socket:[2002]", "7": "socket:[2003]"})
+        self._add_proc(101, b"bash\n", {"3": "socket:[1004]", "4": "socket:[2004]"})
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _add_proc(self, pid: int, comm: bytes, fds: dict):
+        proc_dir = self.proc / str(pid)
+        (proc_dir / "fd").mkdir(parents=True)
+        (proc_dir / "comm").write_bytes(comm)
+        (proc_dir / "cmdline").write_bytes(comm.strip() + b"\0")
+        for fd, link in fds.items():
+            os.symlink(link, proc_dir / "fd" / fd)
+
+    def test_find_listen_sockets_of_vlc(self):
+        finder = ProcNetFinderProvider(VLC_IFACE_IP, str(self.proc))
+
+        self.assertTrue(ProcNetFinderProvider.is_supported(str(self.proc)))
+        vlc_ids = finder.get_vlc_list()
+        self.assertEqual({VlcId(VLC_IFACE_IP, 0x1F90, 100), VlcId("/run/user/1000/vlc 1.sock", 0, 100, "unix")},
+                         vlc_ids)
+        self.assertEqual({"rc", "unix"}, {vlc_id.scheme for vlc_id in vlc_ids})
+
+
+class TestDiscoveryWatcherNewPids(TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.proc = Path(self._tmp.name)
+        (self.proc / "net").mkdir()
+        (self.proc / "net" / "tcp").write_text("header\n")
+        (self.proc / "net" / "unix").write_text("header\n")
+        self._set_last_pid(100)
+        self.watcher = DiscoveryWatcher(VLC_IFACE_IP, str(self.proc))
+        self.watcher._last_pid = self.watcher._read_last_pid()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _set_last_pid(self, pid: int):
+        (self.proc / "loadavg").write_text(f"0.00 0.01 0.05 1/123 {pid}\n")
+
+    def _add_proc(self, pid: int, comm: str, tgid: int = None, uid: int = None):
+        proc_dir = self.proc / str(pid)
+        proc_dir.mkdir(exist_ok=True)
+        uid = os.getuid() if uid is None else uid
+        (proc_dir / "status").write_text(f"Name:\t{comm}\nTgid:\t{tgid or pid}\nPid:\t{pid}\nUid:\t{uid}\t{uid}\n")
+        (proc_dir / "comm").write_text(comm + "\n")
+        (proc_dir / "cmdline").write_bytes(comm.encode() + b"\0")
+
+    def test_window_opened_by_vlc_only(self):
+        self._add_proc(101, "bash")
+        self._add_proc(102, "vlc", tgid=50)  # Thread
+        self._add_proc(103, "vlc", uid=os.getuid() + 1)
+        self._set_last_pid(103)
+        self.watcher._check_new_listen()
+        self.assertEqual(0, self.watcher._check_listen_until)
+
+        # bash forked before exec of vlc: rechecked once
+        self._add_proc(101, "vlc")
+        self.watcher._check_new_listen()
+        self.assertGreater(self.watcher._check_listen_until, time.time())
+
+    def test_wrap_around_not_inspected(self):
+        self._add_proc(5, "vlc")
+        self._set_last_pid(5)
+        self.watcher._check_new_listen()
+        self.assertEqual(0, self.watcher._check_listen_until)
+        self.assertEqual(5, self.watcher._last_pid)
+
+
+@skipUnless(DiscoveryWatcher.is_supported(), "Linux only")
+class TestDiscoveryWatcher(TestCase):
+    def setUp(self):
+        self.changed = threading.Event()
+        self.watcher = DiscoveryWatcher(VLC_IFACE_IP, interval=0.02)
+        self.watcher.start(on_change=self.changed.set)
+        # Process named like vlc
+        self._tmp = tempfile.TemporaryDirectory()
+        self.fake_vlc = os.path.join(self._tmp.name, "vlc")
+        os.symlink(sys.executable, self.fake_vlc)
+
+    def tearDown(self):
+        self.watcher.close()
+        self._tmp.cleanup()
+
+    def test_detect_new_listen_socket_and_exit(self):
+        proc = subprocess.Popen([self.fake_vlc, "-c", LISTEN_SCRIPT.format(VLC_IFACE_IP)], stdout=subprocess.PIPE)
+        try:
+            proc.stdout.readline()
+            self.assertTrue(self.changed.wait(2), "Start not detected")
+
+            self.changed.clear()
+            self.watcher.watch_pids([proc.pid])
+            time.sleep(0.1)
+            proc.kill()
+            proc.wait()
+            self.assertTrue(self.changed.wait(2), "Exit not detected")
+        finally:
+            proc.kill()
+
+    def test_ignore_other_process(self):
+        proc = subprocess.Popen([sys.executable, "-c", LISTEN_SCRIPT.format(VLC_IFACE_IP)], stdout=subprocess.PIPE)
+        try:
+            proc.stdout.readline()
+            self.assertFalse(self.changed.wait(0.5), "Not vlc process detected")
+        finally:
+            proc.kill()
+            proc.wait()
+
+
+LISTEN_SCRIPT = """
+import socket, time
+s = socket.socket()
+s.bind(("{0}", 0))
+s.listen()
+print("listen", flush=True)
+time.sleep(60)
+"""
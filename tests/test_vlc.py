@@ -0,0 +1,152 @@
+import time
+from contextlib import ExitStack
+from unittest import TestCase
+
+from tests.rc_emulator import RcEmulator
+from vlcsync.app_config import AppConfig
+from vlcsync.syncer import Syncer
+from vlcsync.vlc import PlaylistTracker, SyncPlan, Vlc, VlcProcs
+from vlcsync.vlc_finder import ExtraHostFinder
+from vlcsync.vlc_state import PlayState, State, VlcId
+
+PLAYLIST = (b"+----[ Playlist - playlist ]\r\n"
+            b"| 1 - Playlist\r\n"
+            b"|   6 - Video 1.mkv (00:23:37) [played 1 time]\r\n"
+            b"|  *4 - Video 2.mkv (00:23:44) [played 2 times]\r\n"
+            b"+----[ End of playlist ]\r\n")
+STATUS = b"( new input: file:///Video 2.mkv )\r\n( audio volume: 256 )\r\n( state playing )\r\n"
+
+
+class TestPlaylistTracker(TestCase):
+    def test_refetch_only_on_input_change(self):
+        tracker = PlaylistTracker()
+        input_key = Vlc._extract_input(STATUS)
+
+        self.assertTrue(tracker.is_outdated(input_key))
+        playlist = tracker.update(input_key, PLAYLIST)
+        self.assertEqual(1, playlist.active_order_index())
+        self.assertEqual(4, playlist.active_item.vlc_internal_index)
+
+        self.assertFalse(tracker.is_outdated(input_key))
+        self.assertTrue(tracker.is_outdated(Vlc._extract_input(STATUS.replace(b"Video 2", b"Video 1"))))
+
+    def test_reuse_parsed_playlist_by_content(self):
+        tracker = PlaylistTracker()
+        playlist = tracker.update(b"", PLAYLIST)
+
+        self.assertIs(playlist, tracker.update(b"", memoryview(bytearray(PLAYLIST))))
+        self.assertIsNot(playlist, tracker.update(b"", PLAYLIST.replace(b"*4", b" 4")))
+
+    def test_refresh_interval(self):
+        tracker = PlaylistTracker(refresh_interval=0)
+        tracker.update(b"", PLAYLIST)
+
+        self.assertTrue(tracker.is_outdated(b""))
+
+
+class TestSyncPlan(TestCase):
+    def test_seek_by_arrival_time(self):
+        playing = State(PlayState.PLAYING, 5, 0, vid_start_at=100.0)
+        self.assertEqual(["play", "seek 10"], SyncPlan(["play"], playing).commands(arrive_at=110.4))
+        self.assertEqual(["play", "seek 11"], SyncPlan(["play"], playing).commands(arrive_at=110.6))
+
+        paused = State(PlayState.PAUSED, 5, 0, vid_start_at=100.0)
+        self.assertEqual(["seek 5"], SyncPlan([], paused).commands(arrive_at=110.4))
+        self.assertFalse(SyncPlan([]))
+
+
+class TestVlcProcs(TestCase):
+    def test_parallel_registration(self):
+        with ExitStack() as stack:
+            emulators = [stack.enter_context(RcEmulator(latency=0.1)) for _ in range(4)]
+            unreachable = VlcId("127.0.0.1", 1)
+            start = time.time()
+            env = VlcProcs({ExtraHostFinder({unreachable, *(emulator.vlc_id for emulator in emulators)})})
+            stack.callback(env.close)
+            snapshot = env.all_vlc
+
+            while len(env.all_vlc) < len(emulators):
+                self.assertLess(time.time() - start, 2, "Players not registered")
+                time.sleep(0.01)
+
+            # Sequential registration takes 4 players * 4 commands * 100 ms
+            self.assertLess(time.time() - start, 1)
+            self.assertNotIn(unreachable, env.all_vlc)
+            # Registry snapshot is replaced, not mutated
+            self.assertEqual(0, len(snapshot))
+
+
+class TestReconnect(TestCase):
+    def test_hung_player_does_not_stall_ticks(self):
+        with RcEmulator() as source, RcEmulator() as hung:
+            app_config = AppConfig({source.vlc_id, hung.vlc_id}, True, False, False)
+            with Syncer(app_config) as syncer:
+                deadline = time.time() + 5
+                while len(syncer.env.all_vlc) < 2:
+                    self.assertLess(time.time(), deadline, "Players not registered")
+                    time.sleep(0.01)
+
+                # Accepts connections, never replies (even banner of reconnect)
+                hung.muted = True
+                syncer.do_check_synchronized()
+                self.assertTrue(syncer.env.all_vlc[hung.vlc_id].degraded)
+
+                # Reconnect attempts (backoff 0.1, 0.2, 0.4 s...) run out of ticks
+                source.execute("pause")
+                start = time.time()
+                while time.time() - start < 1.5:
+                    tick_start = time.time()
+                    syncer.do_check_synchronized()
+                    self.assertLess(time.time() - tick_start, 0.2)
+                    time.sleep(0.01)
+                self.assertEqual(PlayState.PAUSED, syncer.env.all_vlc[source.vlc_id].prev_state.play_state)
+                self.assertNotIn(hung.vlc_id, syncer.env.active_vlc)
+
+                hung.muted = False
+                deadline = time.time() + 10
+                while hung.vlc_id not in syncer.env.active_vlc:
+                    self.assertLess(time.time(), deadline, "Not reconnected")
+                    syncer.do_check_synchronized()
+                    time.sleep(0.01)
+
+
+class TestParallelSync(TestCase):
+    def setUp(self):
+        self.source, self.fast, self.slow = self.emulators = [RcEmulator().start(), RcEmulator().start(),
+                                                              RcEmulator(latency=0.1).start()]
+        app_config = AppConfig({emulator.vlc_id for emulator in self.emulators}, True, False, False,
+                               parallel_sync=True)
+        self.syncer = Syncer(app_config)
+        deadline = time.time() + 5
+        while len(self.syncer.env.active_vlc) < len(self.emulators):
+            self.assertLess(time.time(), deadline, "Players not registered")
+            self.syncer.do_check_synchronized()
+            time.sleep(0.01)
+
+    def tearDown(self):
+        self.syncer.close()
+        for emulator in self.emulators:
+            emulator.close()
+
+    @staticmethod
+    def received_at(emulator: RcEmulator, command: str) -> float:
+        return next(received_at for received_at, received in emulator.received if received == command)
+
+    def test_slowest_player_dispatched_first(self):
+        self.source.execute("pause")
+        self.syncer.do_check_synchronized()
+
+        self.assertEqual({"paused"}, {emulator.play_state for emulator in self.emulators})
+        # Fast player waits for one way latency of slow one (half of 100 ms round trip)
+        delay = self.received_at(self.fast, "pause") - self.received_at(self.slow, "pause")
+        self.assertGreater(delay, 0.03)
+        self.assertLess(delay, 0.1)
+
+    def test_player_lost_on_dispatch(self):
+        self.fast.drop_on = "pause"
+        self.source.execute("pause")
+        self.syncer.do_check_synchronized()
+
+        self.assertEqual("paused", self.slow.play_state)
+        self.assertTrue(self.syncer.env.all_vlc[self.fast.vlc_id].degraded)
+        self.assertNotIn(self.fast.vlc_id, self.syncer.env.active_vlc)
@@ -0,0 +1,58 @@
+import time
+from contextlib import ExitStack
+from unittest import TestCase
+
+from tests.rc_emulator import RcEmulator
+from vlcsync.vlc import Vlc
+from vlcsync.vlc_async import AsyncPoller
+from vlcsync.vlc_socket import VlcConnectionError
+
+LATENCY = 0.05
+
+
+class TestAsyncPoller(TestCase):
+    def setUp(self):
+        self.stack = ExitStack()
+        self.emulators = [self.stack.enter_context(RcEmulator(latency=LATENCY)) for _ in range(5)]
+        # Emulators serve single client (like vlc): poller should probe by connection of player
+        self.players = {emulator.vlc_id: Vlc(emulator.vlc_id) for emulator in self.emulators}
+        self.poller = AsyncPoller(answer_timeout=0.3)
+        self.stack.callback(self.poller.close)
+        for vlc in self.players.values():
+            self.stack.callback(vlc.vlc_conn.close)
+
+    def tearDown(self):
+        self.stack.close()
+
+    def test_probe_by_own_connections(self):
+        self.emulators[1].execute("pause")
+        self.emulators[2].execute("goto 5")
+
+        states = self.poller.probe_all(self.players)
+
+        self.assertEqual(list(self.players.keys()), list(states.keys()))
+        for vlc_id, state in states.items():
+            self.assertEqual(state, self.players[vlc_id].cur_state())
+        self.assertEqual("paused", states[self.emulators[1].vlc_id].play_state.value)
+        self.assertEqual(1, states[self.emulators[2].vlc_id].playlist_order_idx)
+
+    def test_concurrent_round_trips(self):
+        self.poller.probe_all(self.players)
+
+        start = time.perf_counter()
+        states = self.poller.probe_all(self.players)
+
+        # Sequential probes take 5 players * 50 ms
+        self.assertLess(time.perf_counter() - start, 3 * LATENCY)
+        self.assertFalse(any(isinstance(state, Exception) for state in states.values()))
+
+    def test_hung_player(self):
+        hung = self.emulators[0]
+        hung.muted = True
+
+        states = self.poller.probe_all(self.players)
+
+        self.assertIsInstance(states[hung.vlc_id], VlcConnectionError)
+        self.assertTrue(states[hung.vlc_id].timeout)
+        self.assertTrue(self.players[hung.vlc_id].degraded)
+        self.assertFalse(any(isinstance(states[emulator.vlc_id], Exception) for emulator in self.emulators[1:]))
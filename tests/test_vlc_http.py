@@ -0,0 +1,115 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase
+from urllib.parse import parse_qs, urlparse
+
+from vlcsync.vlc import VlcHttp
+from vlcsync.vlc_http import command_path
+from vlcsync.vlc_socket import VlcConnectionError
+from vlcsync.vlc_state import PlayState, VlcId
+
+PASSWORD = "secret"
+PLAYLIST = {"type": "node", "id": "1", "children": [
+    {"type": "node", "name": "Playlist", "id": "2", "children": [
+        {"type": "leaf", "name": "Video 1.mkv", "id": "6"},
+        {"type": "leaf", "name": "Video 2.mkv", "id": "4", "current": "current"},
+    ]},
+    {"type": "node", "name": "Media Library", "id": "3", "children": []},
+]}
+
+
+class _HttpHandler(BaseHTTPRequestHandler):
+    """ Stand-in for vlc http interface """
+    protocol_version = "HTTP/1.1"
+    server: "HttpStandIn"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self):
+        if self.headers.get("Authorization") != "Basic OnNlY3JldA==":
+            self._answer(401, b"")
+            return
+
+        url = urlparse(self.path)
+        if url.path == "/requests/playlist.json":
+            self._answer(200, json.dumps(PLAYLIST).encode())
+            return
+
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if "command" in query:
+            self.server.commands.append(query)
+        self._answer(200, json.dumps(self.server.status).encode())
+
+    def _answer(self, code: int, body: bytes):
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class HttpStandIn(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _HttpHandler)
+        self.connections = 0
+        self.commands = []
+        self.status = {"state": "playing", "time": 60, "length": 120, "position": 0.5042, "volume": 256,
+                       "currentplid": 4}
+
+
+class TestVlcHttp(TestCase):
+    def setUp(self):
+        self.server = HttpStandIn()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.vlc_id = VlcId("127.0.0.1", self.server.server_address[1], scheme="http", password=PASSWORD)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_probe(self):
+        vlc = VlcHttp(self.vlc_id)
+        before = time.time()
+        state = vlc.cur_state()
+
+        self.assertEqual(PlayState.PLAYING, state.play_state)
+        self.assertEqual(60, state.seek)
+        self.assertEqual(1, state.playlist_order_idx)
+        self.assertEqual(256, state.volume)
+        # Sub-second position: 0.5042 * 120 = 60.504
+        self.assertAlmostEqual(before - 60.504, state.vid_start_at, delta=0.1)
+
+        vlc.cur_state()
+        vlc.close()
+        self.assertEqual(1, self.server.connections)
+
+    def test_commands(self):
+        vlc = VlcHttp(self.vlc_id)
+        vlc.seek(30)
+        vlc.pause()
+        vlc.playlist_goto(6)
+        vlc.set_volume(128)
+        vlc.close()
+
+        self.assertEqual([{"command": "seek", "val": "30"},
+                          {"command": "pl_pause"},
+                          {"command": "pl_play", "id": "6"},
+                          {"command": "volume", "val": "128"}], self.server.commands)
+
+    def test_wrong_password(self):
+        with self.assertRaises(VlcConnectionError):
+            VlcHttp(VlcId("127.0.0.1", self.server.server_address[1], scheme="http", password="wrong"))
+
+    def test_command_path(self):
+        self.assertEqual("/requests/status.json", command_path("get_time"))
+        self.assertEqual("/requests/playlist.json", command_path("playlist"))
+        self.assertEqual("/requests/status.json?command=pl_stop", command_path("stop"))
@@ -0,0 +1,166 @@
+import os
+import socket
+import tempfile
+import threading
+import time
+from unittest import TestCase
+
+from tests.rc_emulator import RcEmulator
+from vlcsync import metrics
+from vlcsync.metrics import CONNECTION_ERRORS, TIMEOUTS, metrics_label, remove_player
+from vlcsync.vlc_socket import RecvBuffer, VlcConnectionError, VlcSocket, split_answers
+
+
+class TestSplitAnswers(TestCase):
+    def test_split_pipelined_answers(self):
+        data = b"125\r\n> ( state playing )\r\n> > +----[ Playlist ]\r\n|  *4 - A > B.mkv\r\n> "
+        answers, pos = split_answers(data)
+
+        self.assertEqual([b"125\r\n",
+                          b"( state playing )\r\n",
+                          b"",
+                          b"+----[ Playlist ]\r\n|  *4 - A > B.mkv\r\n"], answers)
+        self.assertEqual(len(data), pos)
+
+    def test_keep_incomplete_answer(self):
+        data = b"125\r\n> ( state play"
+        answers, pos = split_answers(data)
+
+        self.assertEqual([b"125\r\n"], answers)
+        self.assertEqual(b"( state play", data[pos:])
+
+    def test_limit(self):
+        answers, pos = split_answers(b"1\r\n> 2\r\n> ", limit=1)
+
+        self.assertEqual([b"1\r\n"], answers)
+        self.assertEqual(5, pos)
+
+
+class TestRecvBuffer(TestCase):
+    def setUp(self):
+        self.server, self.client = socket.socketpair()
+        self.client.settimeout(0.5)
+
+    def tearDown(self):
+        self.server.close()
+        self.client.close()
+
+    def test_answers_and_leftover(self):
+        buf = RecvBuffer()
+        self.server.sendall(b"125\r\n> ( state playing )\r\n> 7")
+
+        self.assertEqual([b"125\r\n"], [bytes(answer) for answer in buf.read_answers(self.client, 1)])
+        self.assertEqual([b"( state playing )\r\n"], [bytes(answer) for answer in buf.read_answers(self.client, 1)])
+
+        self.server.sendall(b"\r\n> ")
+        self.assertEqual([b"7\r\n"], [bytes(answer) for answer in buf.read_answers(self.client, 1)])
+
+    def test_prompt_split_between_chunks_and_grow(self):
+        buf = RecvBuffer(size=8)
+        playlist = b"".join(b"|   %d - Video.mkv\r\n" % i for i in range(1000))
+        self.server.sendall(playlist + b"\n")
+
+        def send_prompt():
+            self.server.sendall(b"> ")
+
+        threading.Timer(0.05, send_prompt).start()
+        answer, = buf.read_answers(self.client, 1)
+
+        self.assertIsInstance(answer, memoryview)
+        self.assertEqual(playlist + b"\n", bytes(answer))
+
+    def test_take_answers_step_by_step(self):
+        buf = RecvBuffer(size=8)
+        self.server.sendall(b"125\r\n> ( state pla")
+        buf.fill(self.client)
+        self.assertIsNone(buf.take_answers(2))
+
+        self.server.sendall(b"ying )\r\n> ")
+        while (answers := buf.take_answers(2)) is None:
+            buf.fill(self.client)
+        self.assertEqual([b"125\r\n", b"( state playing )\r\n"], [bytes(answer) for answer in answers])
+
+    def test_timeout(self):
+        buf = RecvBuffer()
+        self.server.sendall(b"125\r\n")
+
+        with self.assertRaises(TimeoutError):
+            buf.read_answers(self.client, 1)
+
+
+class TestVlcSocket(TestCase):
+    def test_rtt_estimate(self):
+        with RcEmulator(latency=0.05) as emulator:
+            vlc_socket = VlcSocket(emulator.vlc_id)
+            self.assertIsNone(vlc_socket.rtt)
+
+            vlc_socket.cmd("status")
+            vlc_socket.cmds("status", "get_time")
+            vlc_socket.close()
+
+        self.assertGreaterEqual(vlc_socket.rtt, 0.05)
+
+    def test_rtt_sampled_by_probes_only(self):
+        with RcEmulator([f"Video {idx}.mkv" for idx in range(20000)]) as emulator:
+            vlc_socket = VlcSocket(emulator.vlc_id)
+            vlc_socket.cmds("status", "get_time")
+            rtt = vlc_socket.rtt
+
+            # Large answer and sync batch (executed by player) take longer, but are not latency
+            self.assertGreater(len(vlc_socket.cmd("playlist")), 500_000)
+            vlc_socket.cmds("seek 10", "status")
+            self.assertEqual(rtt, vlc_socket.rtt)
+
+            vlc_socket.cmd("status")
+            self.assertNotEqual(rtt, vlc_socket.rtt)
+            vlc_socket.close()
+
+    def test_reconnect_in_place(self):
+        with RcEmulator() as emulator:
+            vlc_socket = VlcSocket(emulator.vlc_id)
+
+            # Longer than socket timeout. Single client: reconnect is served after late answer sent
+            emulator.latency = 0.7
+            with self.assertRaises(VlcConnectionError):
+                vlc_socket.cmd("get_time")
+            self.assertTrue(vlc_socket.degraded)
+            # Backoff
+            self.assertFalse(vlc_socket.reconnect())
+
+            emulator.latency = 0
+            time.sleep(0.15)
+            self.assertTrue(vlc_socket.reconnect())
+            self.assertFalse(vlc_socket.degraded)
+            # Late answer of timed out command not mixed with new answers
+            self.assertIn("state playing", vlc_socket.cmd("status"))
+            vlc_socket.close()
+
+    def test_connection_errors_counted_once(self):
+        metrics.enable()
+        self.addCleanup(metrics.enable, False)
+        with RcEmulator() as emulator:
+            self.addCleanup(remove_player, emulator.vlc_id)
+            vlc_socket = VlcSocket(emulator.vlc_id)
+            emulator.latency = 0.7
+            with self.assertRaises(VlcConnectionError):
+                vlc_socket.cmd("get_time")
+            # Errors of already dropped connection on next ticks
+            for _ in range(3):
+                with self.assertRaises(VlcConnectionError):
+                    vlc_socket.cmd("status")
+            vlc_socket.close()
+
+        self.assertEqual(1, CONNECTION_ERRORS.value(player=metrics_label(emulator.vlc_id)))
+        self.assertEqual(1, TIMEOUTS.value(player=metrics_label(emulator.vlc_id)))
+
+    def test_unix_socket(self):
+        with tempfile.TemporaryDirectory() as tmp, RcEmulator(unix_path=os.path.join(tmp, "rc.sock")) as emulator:
+            vlc_socket = VlcSocket(emulator.vlc_id)
+            self.assertEqual(f"unix://{tmp}/rc.sock", str(emulator.vlc_id))
+            self.assertIn("state playing", vlc_socket.cmd("status"))
+
+            vlc_socket.disconnect()
+            time.sleep(0.15)
+            self.assertTrue(vlc_socket.reconnect())
+            self.assertTrue(vlc_socket.cmd("get_time").strip().isdigit())
+            vlc_socket.close()
@@ -0,0 +1,308 @@
+"""
+Agent/coordinator protocol: newline delimited json messages over single tcp connection per agent.
+
+  agent -> coordinator:
+    {"type": "hello", "agent": <agent id>}
+    {"type": "change", "agent": <agent id>, "player": <player key>, "group": <group name or null>, "state": <state>}
+  coordinator -> all agents (including source one):
+    {"type": "sync", "agent": <source agent id>, "player": <player key>, "group": <group name or null>,
+     "state": <state>}
+
+State carries playback position at the moment of sending instead of abs time of video start,
+so clocks of machines need not be in sync. Transit time (below millisecond on LAN) is not compensated.
+Lost coordinator is reconnected in background, meanwhile changes are synced locally.
+Player key is "scheme://address" (see ``VlcId.key``).
+"""
+from __future__ import annotations
+
+import json
+import queue
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+import uuid
+from typing import Dict, Mapping, Optional, Tuple
+
+from loguru import logger
+
+from vlcsync.app_config import AppConfig
+from vlcsync.sync_machine import Change
+from vlcsync.syncer import GroupState, Syncer
+from vlcsync.vlc import Vlc
+from vlcsync.vlc_state import PlayState, State, VlcId
+
+RECONNECT_INTERVAL = 1
+CONNECT_TIMEOUT = 2
+AGENT_SEND_TIMEOUT = 2
+
+
+def player_key(vlc_id: VlcId) -> str:
+    return vlc_id.key
+
+
+def encode_state(state: State, now: Optional[float] = None) -> dict:
+    """ ``now`` is time of sending (current by default) """
+    now = time.time() if now is None else now
+    return {"play_state": state.play_state.value,
+            "seek": state.seek,
+            "playlist_order_idx": state.playlist_order_idx,
+            "position": now - state.vid_start_at if state.vid_start_at else None,
+            "volume": state.volume}
+
+
+def decode_state(data: dict, now: Optional[float] = None) -> State:
+    """ ``now`` is time of receiving (current by default): abs time of video start by local clock """
+    now = time.time() if now is None else now
+    position = data["position"]
+    return State(PlayState(data["play_state"]),
+                 data["seek"],
+                 data["playlist_order_idx"],
+                 now - position if position is not None else 0,
+                 data["volume"])
+
+
+def set_send_timeout(sock: socket.socket, timeout: float):
+    """ Blocking send fails after ``timeout``, while receive stays blocking (unlike ``settimeout()``) """
+    if sys.platform == "win32":
+        value = struct.pack("L", int(timeout * 1000))
+    else:
+        value = struct.pack("ll", int(timeout), int(timeout % 1 * 1_000_000))
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDTIMEO, value)
+
+
+class MessageLink:
+    """ Newline delimited json messages over socket """
+
+    def __init__(self, sock: socket.socket, send_timeout: Optional[float] = None):
+        self.sock = sock
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if send_timeout is not None:
+            set_send_timeout(sock, send_timeout)
+        self._reader = sock.makefile("rb")
+        self._send_lock = threading.Lock()
+
+    def send(self, message: dict):
+        data = json.dumps(message).encode() + b"\n"
+        with self._send_lock:
+            self.sock.sendall(data)
+
+    def recv(self) -> Optional[dict]:
+        """ Return next message or None, if connection closed """
+        line = self._reader.readline()
+        return json.loads(line) if line else None
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._reader.close()
+        self.sock.close()
+
+
+class _AgentHandler(socketserver.BaseRequestHandler):
+    server: Coordinator
+
+    def handle(self):
+        # Agents may be idle for long (accepted socket inherits global default timeout, see vlc.py)
+        self.request.settimeout(None)
+        link = MessageLink(self.request, self.server.send_timeout)
+        self.server.register(link)
+        try:
+            while message := link.recv():
+                self.server.on_message(link, message)
+        except (OSError, ValueError) as e:
+            logger.debug("Agent connection error {0}", e)
+        finally:
+            self.server.dereg(link)
+
+
+class Coordinator(socketserver.ThreadingTCPServer):
+    """
+    Relay state changes between agents. Change reported by any agent is broadcast as sync to all agents.
+
+    Broadcast is serialized, so concurrent changes are applied in the same order by all agents.
+    Agent not accepting messages for ``send_timeout`` is dropped (it reconnects).
+    """
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, addr: Tuple[str, int], send_timeout: float = AGENT_SEND_TIMEOUT):
+        super().__init__(addr, _AgentHandler)
+        self.send_timeout = send_timeout
+        self._agents: Dict[MessageLink, Optional[str]] = {}
+        self._lock = threading.Lock()
+        self._broadcast_lock = threading.Lock()
+
+    def register(self, link: MessageLink):
+        with self._lock:
+            self._agents[link] = None
+
+    def dereg(self, link: MessageLink):
+        with self._lock:
+            agent_id = self._agents.pop(link, None)
+        link.close()
+        print(f"Agent disconnected {agent_id}", flush=True)
+
+    def on_message(self, link: MessageLink, message: dict):
+        if message["type"] == "hello":
+            with self._lock:
+                self._agents[link] = message["agent"]
+            print(f"Agent connected {message['agent']} from {link.sock.getpeername()}", flush=True)
+        elif message["type"] == "change":
+            print(f"\nState change {message['state']} from {message['player']} (agent {message['agent']})", flush=True)
+            self.broadcast({**message, "type": "sync"})
+        else:
+            logger.warning("Unknown message from agent {0}", message)
+
+    def broadcast(self, message: dict):
+        with self._broadcast_lock:
+            # Registration is not blocked by send
+            with self._lock:
+                links = list(self._agents.keys())
+            for link in links:
+                try:
+                    link.send(message)
+                except OSError as e:
+                    logger.debug("Cannot send to agent {0}, drop it", e)
+                    # Message may be sent partially. Handler of agent deregisters it
+                    link.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown_agents()
+        self.server_close()
+
+    def shutdown_agents(self):
+        with self._lock:
+            links = list(self._agents.keys())
+        for link in links:
+            link.close()
+
+
+class AgentSyncer(Syncer):
+    """
+    Sync local players by coordinator.
+
+    Local change is reported to coordinator instead of sync. Sync received back from coordinator
+    is applied to all local players of the same group (by name). Volume sync (if enabled) stays local.
+    While coordinator is lost (reconnected in background) local changes are synced locally.
+    """
+
+    def __init__(self, app_config: AppConfig):
+        self.link: Optional[MessageLink] = None
+        """ None while coordinator reconnected """
+        self.agent_id = uuid.uuid4().hex[:8]
+        self._messages: queue.Queue[Tuple[dict, float]] = queue.Queue()
+        """ Messages with time of receive """
+        self._received = threading.Event()
+        self._closed = threading.Event()
+        super().__init__(app_config)
+
+        # Connected in background as well: local players are synced meanwhile
+        threading.Thread(target=self._read_messages, daemon=True).start()
+
+    def _connect(self, addr: Tuple[str, int]) -> Optional[MessageLink]:
+        """ Connect and say hello. Retry until connected, None if agent closed meanwhile """
+        while not self._closed.is_set():
+            try:
+                sock = socket.create_connection(addr, CONNECT_TIMEOUT)
+                sock.settimeout(None)
+                link = MessageLink(sock)
+                link.send({"type": "hello", "agent": self.agent_id})
+                print(f"  Agent {self.agent_id} connected to coordinator {addr[0]}:{addr[1]}", flush=True)
+                return link
+            except OSError as e:
+                print(f"Cannot connect to coordinator {addr[0]}:{addr[1]}, cause: {e}. Retrying...", flush=True)
+                self._closed.wait(RECONNECT_INTERVAL)
+        return None
+
+    def _read_messages(self):
+        while link := self._connect(self.app_config.coordinator):
+            self.link = link
+            if self._closed.is_set():
+                # Closed while connected
+                link.close()
+                return
+            try:
+                while message := link.recv():
+                    self._messages.put((message, time.time()))
+                    self._received.set()
+            except (OSError, ValueError) as e:
+                logger.debug("Coordinator connection error {0}", e)
+
+            link.close()
+            self.link = None
+            if self._closed.is_set():
+                return
+            print("Lost connection to coordinator, sync local players only. Reconnecting...", flush=True)
+
+    def do_check_synchronized(self) -> bool:
+        changed = self.apply_syncs()
+        return super().do_check_synchronized() or changed
+
+    def wait_next_tick(self, timeout: float):
+        """ Wake up as soon as sync received """
+        self._received.wait(self.tick_timeout(timeout))
+
+    def apply_syncs(self) -> bool:
+        """ Apply syncs received from coordinator. Return True if any """
+        applied = False
+        self._received.clear()
+        while True:
+            try:
+                message, received_at = self._messages.get_nowait()
+            except queue.Empty:
+                return applied
+
+            if message["type"] == "sync":
+                self.apply_sync(message, received_at)
+                applied = True
+
+    def apply_sync(self, message: dict, received_at: Optional[float] = None):
+        name = message.get("group")
+        if (group := self.groups.get(name)) is None:
+            logger.debug("Sync of group {0} not configured locally, skipped", name)
+            return
+
+        state = decode_state(message["state"], received_at)
+        source_vlc = self._find_source(message)
+        all_vlc: Mapping[VlcId, Vlc] = self.partition(self.env.active_vlc).get(name, {})
+        print(f"\nSync from {message['player']} (agent {message['agent']})", flush=True)
+        if group.master_clock:
+            # Reference stays local, if change is not from own player
+            group.master_clock.follow(source_vlc, all_vlc)
+        self.env.sync_all(state, source_vlc, self.app_config, all_vlc)
+        group.sync_machine.synced(state, all_vlc)
+
+    def _find_source(self, message: dict) -> Optional[Vlc]:
+        if message["agent"] != self.agent_id:
+            return None
+        return next((vlc for vlc_id, vlc in self.env.all_vlc.items() if player_key(vlc_id) == message["player"]),
+                    None)
+
+    def sync_change(self, group: GroupState, change: Change, all_vlc: Mapping[VlcId, Vlc],
+                    states: Dict[VlcId, State]):
+        if link := self.link:
+            print(f"\nVlc state change detected from ({change.vlc.vlc_id}), report to coordinator", flush=True)
+            try:
+                link.send({"type": "change",
+                           "agent": self.agent_id,
+                           "player": player_key(change.vlc.vlc_id),
+                           "group": group.name,
+                           "state": encode_state(change.state)})
+                return
+            except OSError as e:
+                print(f"Cannot report change to coordinator ({e}), sync local players only", flush=True)
+        super().sync_change(group, change, all_vlc, states)
+
+    def close(self):
+        self._closed.set()
+        super().close()
+        if link := self.link:
+            link.close()
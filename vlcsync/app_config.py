@@ -1,8 +1,12 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Set
+from dataclasses import dataclass, field
+from typing import List, Optional, Set, Tuple
 
+from vlcsync.clock_model import TIME_PROBE_INTERVAL
+from vlcsync.scheduler import MAX_POLL_INTERVAL, MIN_POLL_INTERVAL
+from vlcsync.sync_group import SyncGroup
+from vlcsync.sync_machine import COALESCE_WINDOW
 from vlcsync.vlc_state import VlcId
 
 
@@ -12,3 +16,16 @@ class AppConfig:
     no_local_discovery: bool
     no_timestamp_sync: bool
     volume_sync: bool
+    async_poll: bool = False
+    parallel_sync: bool = False
+    min_interval: float = MIN_POLL_INTERVAL
+    max_interval: float = MAX_POLL_INTERVAL
+    time_probe_interval: float = TIME_PROBE_INTERVAL
+    coalesce_window: float = COALESCE_WINDOW
+    """ Sync burst of user changes after players stay unchanged given seconds """
+    master_clock: bool = False
+    """ Correct drift of followers from reference player by playback rate (see ``MasterClock``) """
+    coordinator: Optional[Tuple[str, int]] = None
+    """ Run as agent of coordinator with given address """
+    groups: List[SyncGroup] = field(default_factory=list)
+    """ Independent sync groups. Empty: all players are single group """
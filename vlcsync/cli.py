@@ -2,11 +2,19 @@ from __future__ import annotations
 
 import sys
 import time
-from typing import Set
+from typing import List, Set, Tuple
 
 import click
 
-from vlcsync.cli_utils import parse_url
+from vlcsync.agent import AgentSyncer, Coordinator
+from vlcsync.cli_utils import parse_address, parse_groups, parse_http_url, parse_unix_paths, parse_url
+from vlcsync.clock_model import TIME_PROBE_INTERVAL
+from vlcsync.metrics import METRICS_ADDR, serve_metrics
+from vlcsync.profiler import PROFILE_PREFIX, Profiler
+from vlcsync.recorder import Recorder
+from vlcsync.scheduler import MAX_POLL_INTERVAL, MIN_POLL_INTERVAL, PollScheduler
+from vlcsync.sync_group import SyncGroup
+from vlcsync.sync_machine import COALESCE_WINDOW
 from vlcsync.syncer import Syncer
 from vlcsync.app_config import AppConfig
 from vlcsync.vlc_finder import print_exc
@@ -25,6 +33,30 @@ __version__ = "0.3.3"
               callback=parse_url,
               multiple=True,
               metavar='<host:port>')
+@click.option("--http-host",
+              'http_host_list',
+              help='Additional players controlled by http interface (can be multiple).',
+              required=False,
+              callback=parse_http_url,
+              multiple=True,
+              metavar='<[:password@]host:port>')
+@click.option("--rc-unix",
+              'rc_unix_list',
+              help='Additional players with rc interface on unix socket, i.e. "vlc --rc-unix <path>" '
+                   '(can be multiple). Local ones are discovered anyway.',
+              required=False,
+              callback=parse_unix_paths,
+              multiple=True,
+              metavar='<path>')
+@click.option("--group",
+              'group_list',
+              help='Independent sync group (can be multiple): change of player is synced only within its group. '
+                   'Members are ports or port ranges (4212-4220, any host), host:port (also added as --rc-host) '
+                   'or unix socket paths (glob). Players not matched by any group are not synced.',
+              required=False,
+              callback=parse_groups,
+              multiple=True,
+              metavar='<name=member,...>')
 @click.option("--no-local-discovery",
               "no_local_discover",
               required=False,
@@ -47,20 +79,156 @@ __version__ = "0.3.3"
               \n  
               And you can control volume from main video player.
               """)
-def main(rc_host_list: Set[VlcId], no_local_discover, no_timestamp_sync, volume_sync):
+@click.option("--async-poll",
+              "async_poll",
+              default=False,
+              required=False,
+              is_flag=True,
+              help="Probe all players concurrently: commands sent to all at once over own connection of each "
+                   "player, answers received by single selector. Useful for many players.")
+@click.option("--parallel-sync",
+              "parallel_sync",
+              default=False,
+              required=False,
+              is_flag=True,
+              help="Send sync commands (seek, play, pause) to all players at the same moment.")
+@click.option("--min-interval",
+              "min_interval",
+              default=MIN_POLL_INTERVAL,
+              show_default=True,
+              type=click.FloatRange(min=0.001),
+              help="Poll interval (seconds) right after change.")
+@click.option("--max-interval",
+              "max_interval",
+              default=MAX_POLL_INTERVAL,
+              show_default=True,
+              type=click.FloatRange(min=0.001),
+              help="Max poll interval (seconds) while all players are stable.")
+@click.option("--time-probe-interval",
+              "time_probe_interval",
+              default=TIME_PROBE_INTERVAL,
+              show_default=True,
+              type=click.FloatRange(min=0),
+              help="Request playback position (seconds) at most once per interval while play state not changed. "
+                   "Position predicted between requests. Zero requests it on every poll.")
+@click.option("--coalesce-window",
+              "coalesce_window",
+              default=COALESCE_WINDOW,
+              show_default=True,
+              type=click.FloatRange(min=0),
+              help="Sync burst of seeks (i.e. timeline scrubbing) once players stay unchanged given seconds. "
+                   "Zero syncs every seek immediately. Play, pause and next item are synced immediately anyway.")
+@click.option("--master-clock",
+              "master_clock",
+              default=False,
+              required=False,
+              is_flag=True,
+              help="Keep players on timeline of reference player (last changed one) by small playback rate "
+                   "corrections instead of seeks. Seek only on large drift.")
+@click.option("--coordinator",
+              "coordinator_addr",
+              required=False,
+              callback=parse_address,
+              metavar='<host:port>',
+              help="Run as coordinator of agents (see --agent) listening given address. No local players.")
+@click.option("--agent",
+              "agent_of",
+              required=False,
+              callback=parse_address,
+              metavar='<host:port>',
+              help="Run as agent: report changes of own players to coordinator and apply syncs received from it.")
+@click.option("--profile",
+              "profile_prefix",
+              required=False,
+              is_flag=False,
+              flag_value=PROFILE_PREFIX,
+              metavar='[PREFIX]',
+              help="Profile sync loop: print per phase timings and write <PREFIX>.collapsed (sampled stacks for "
+                   "flame graph) on exit and on SIGUSR1. "
+                   f"Default prefix: {PROFILE_PREFIX}.")
+@click.option("--cprofile",
+              "cprofile",
+              default=False,
+              required=False,
+              is_flag=True,
+              help="With --profile: also write <PREFIX>.pstats (cProfile of sync loop). Slows down sync loop itself.")
+@click.option("--record",
+              "record_path",
+              required=False,
+              type=click.Path(dir_okay=False, writable=True),
+              metavar='<path>',
+              help="Append players traffic (commands, answers, timings) and detected state changes to binary log.")
+@click.option("--metrics-port",
+              "metrics_port",
+              required=False,
+              type=click.IntRange(1, 65535),
+              help=f"Serve metrics (Prometheus text format) on http://{METRICS_ADDR}:<port>/metrics.")
+def main(rc_host_list: Set[VlcId], http_host_list: Set[VlcId], rc_unix_list: Set[VlcId],
+         group_list: List[SyncGroup], no_local_discover, no_timestamp_sync, volume_sync, async_poll, parallel_sync,
+         min_interval, max_interval, time_probe_interval, coalesce_window, master_clock, coordinator_addr, agent_of,
+         profile_prefix, cprofile, record_path, metrics_port):
     """Utility for synchronize multiple instances of VLC. Supports seek, play and pause."""
+    if min_interval > max_interval:
+        raise click.BadParameter(f"should be not less than --min-interval ({min_interval})",
+                                 param_hint="'--max-interval'")
+    if coordinator_addr and agent_of:
+        raise click.BadParameter("cannot be used together with --agent", param_hint="'--coordinator'")
+
+    profiler = None
+    if profile_prefix:
+        profiler = Profiler(profile_prefix, cprofile=cprofile)
+        profiler.start()
+        print(f"Profiling ENABLED (dump on exit and on SIGUSR1 to {profile_prefix}.*)", flush=True)
+
+    if record_path:
+        Recorder(record_path).start()
+        print(f"Recording ENABLED to {record_path}", flush=True)
+
+    if metrics_port:
+        serve_metrics(metrics_port)
+        print(f"Metrics served on http://{METRICS_ADDR}:{metrics_port}/metrics", flush=True)
+
+    if coordinator_addr:
+        run_coordinator(coordinator_addr)
+        return
+
     print("Vlcsync started...", flush=True)
 
-    app_config = AppConfig(rc_host_list, no_local_discover, no_timestamp_sync, volume_sync)
+    app_config = AppConfig(extra_rc_hosts=rc_host_list | http_host_list | rc_unix_list,
+                           no_local_discovery=no_local_discover,
+                           no_timestamp_sync=no_timestamp_sync,
+                           volume_sync=volume_sync,
+                           async_poll=async_poll,
+                           parallel_sync=parallel_sync,
+                           min_interval=min_interval,
+                           max_interval=max_interval,
+                           time_probe_interval=time_probe_interval,
+                           coalesce_window=coalesce_window,
+                           master_clock=master_clock,
+                           coordinator=agent_of,
+                           groups=group_list)
+    syncer_class = AgentSyncer if agent_of else Syncer
     time.sleep(2)  # Wait instances
     while True:
         try:
-            with Syncer(app_config) as s:
+            with syncer_class(app_config) as s:
+                scheduler = PollScheduler(app_config.min_interval, app_config.max_interval)
                 while True:
-                    s.do_check_synchronized()
-                    time.sleep(0.05)
+                    changed = s.do_check_synchronized()
+                    if profiler:
+                        profiler.dump_if_requested()
+                    s.wait_next_tick(scheduler.next_interval(changed))
         except KeyboardInterrupt:
             sys.exit(0)
         except Exception:
             print_exc()
             print("Exception detected. Restart sync...", flush=True)
+
+
+def run_coordinator(addr: Tuple[str, int]):
+    print(f"Vlcsync coordinator started on {addr[0]}:{addr[1]}...", flush=True)
+    with Coordinator(addr) as coordinator:
+        try:
+            coordinator.serve_forever()
+        except KeyboardInterrupt:
+            sys.exit(0)
@@ -1,13 +1,18 @@
 from __future__ import annotations
 
-from typing import Set
+import os
+import re
+from typing import List, Optional, Set, Tuple
 from urllib.parse import urlparse
 
 import click
 from loguru import logger
 
+from vlcsync.sync_group import SyncGroup
 from vlcsync.vlc_state import VlcId
 
+RE_PORT_RANGE = re.compile(r"^(\d+)(?:-(\d+))?$")
+
 
 def parse_url(_, __, values) -> Set[VlcId]:
     if values:
@@ -19,10 +24,60 @@ def parse_url(_, __, values) -> Set[VlcId]:
         return set()
 
 
-def parse_vlc_id(addr: str) -> VlcId:
+def parse_http_url(_, __, values) -> Set[VlcId]:
+    if values:
+        return {
+            parse_vlc_id(next_addr, scheme="http")
+            for next_addr in values
+        }
+    else:
+        return set()
+
+
+def parse_unix_paths(_, __, values) -> Set[VlcId]:
+    return {VlcId(os.path.abspath(path), 0, scheme="unix") for path in values or ()}
+
+
+def parse_groups(_, __, values) -> List[SyncGroup]:
+    groups = [parse_group(value) for value in values or ()]
+    names = [group.name for group in groups]
+    if len(set(names)) != len(names):
+        raise click.BadParameter(f'group names should be unique, got {", ".join(names)}')
+    return groups
+
+
+def parse_group(value: str) -> SyncGroup:
+    """ "<name>=<member>,..." member is port, port range ("4212-4220"), "host:port" or unix socket path (glob) """
+    name, sep, members = value.partition("=")
+    if not sep or not name or not members:
+        raise click.BadParameter(f'{value} is invalid (expected <name>=<ports|host:port|path>,...)')
+
+    group = SyncGroup(name)
+    for member in members.split(","):
+        if match := RE_PORT_RANGE.match(member):
+            low, high = int(match.group(1)), int(match.group(2) or match.group(1))
+            if low > high:
+                raise click.BadParameter(f'{member} of group {name} is invalid (empty port range)')
+            group.port_ranges.append((low, high))
+        elif "/" in member:
+            group.paths.append(os.path.abspath(member))
+        else:
+            group.hosts.add(parse_vlc_id(member))
+    return group
+
+
+def parse_address(_, __, value) -> Optional[Tuple[str, int]]:
+    if value:
+        vlc_id = parse_vlc_id(value)
+        return vlc_id.addr, vlc_id.port
+    else:
+        return None
+
+
+def parse_vlc_id(addr: str, scheme: str = "rc") -> VlcId:
     try:
         parsed_url = urlparse('//' + addr)
-        return VlcId(str(parsed_url.hostname), parsed_url.port)
+        return VlcId(str(parsed_url.hostname), parsed_url.port, scheme=scheme, password=parsed_url.password)
     except ValueError as e:
         logger.debug("Parse error.", e)
         raise click.BadParameter(f'{addr} is invalid (cause {e})') from e
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import math
+from typing import Optional, Tuple
+
+from vlcsync.vlc_state import PlayState
+
+TIME_PROBE_INTERVAL = 1
+
+
+class ClockModel:
+    """
+    Predict playback position from last observed anchor (position returned by ``get_time`` and time of probe),
+    so ``get_time`` is not needed on every probe.
+
+    Real position is requested at least every ``time_probe_interval`` seconds and when ``status``
+    shows change of play state or input. Zero interval disables prediction.
+
+    While playing continuously, observations also narrow bounds of video start time (see ``start_bounds()``).
+    Bounds are halved by position measured at ``split_time()``.
+    """
+
+    def __init__(self, time_probe_interval: float = TIME_PROBE_INTERVAL):
+        self.time_probe_interval = time_probe_interval
+        self._anchor_seek: Optional[int] = None
+        self._anchor_time = 0.0
+        self._play_state: Optional[PlayState] = None
+        self._input_key: Optional[bytes] = None
+        self._start_bounds: Optional[Tuple[float, float]] = None
+
+    def needs_time_probe(self, now: float) -> bool:
+        """ Check before probe, if ``get_time`` should be sent along with ``status`` """
+        return self._play_state is None or now - self._anchor_time >= self.time_probe_interval
+
+    def is_outdated(self, play_state: PlayState, input_key: bytes) -> bool:
+        """ Check after ``status`` received """
+        return play_state != self._play_state or input_key != self._input_key
+
+    def observe(self, seek: Optional[int], probe_time: float, play_state: PlayState, input_key: bytes,
+                vid_start_at: Optional[float] = None):
+        """ ``vid_start_at`` is precise start time, if known (i.e. sub-second position of http interface) """
+        continuous = not self.is_outdated(play_state, input_key)
+        self._anchor_seek = seek
+        self._anchor_time = probe_time
+        self._play_state = play_state
+        self._input_key = input_key
+
+        if seek is None or play_state != PlayState.PLAYING:
+            self._start_bounds = None
+            return
+
+        if vid_start_at is not None:
+            bounds = (vid_start_at, vid_start_at)
+        else:
+            # get_time is truncated to whole seconds: real position is in [seek, seek + 1)
+            bounds = (probe_time - seek - 1, probe_time - seek)
+        if continuous and self._start_bounds:
+            low, high = max(bounds[0], self._start_bounds[0]), min(bounds[1], self._start_bounds[1])
+            # Disjoint bounds: position jumped or player clock drifted, start over
+            if low <= high:
+                bounds = (low, high)
+        self._start_bounds = bounds
+
+    def predict(self, now: float) -> Optional[int]:
+        if self._anchor_seek is None or self._play_state != PlayState.PLAYING:
+            return self._anchor_seek
+        return int(self._anchor_seek + (now - self._anchor_time))
+
+    def vid_start_at(self) -> float:
+        """ Abs time of video start by anchor (stable between predictions, unlike ``now - predict(now)``) """
+        return self._anchor_time - (self._anchor_seek or 0)
+
+    def start_bounds(self) -> Optional[Tuple[float, float]]:
+        """
+        Earliest and latest abs time of video start consistent with all observations since play state,
+        input or position changed. Sub-second, unlike ``vid_start_at()``. None if not playing
+        """
+        return self._start_bounds
+
+    def split_time(self, now: float) -> Optional[float]:
+        """
+        Next abs time when position rolls over to next second, if video started in the middle of bounds.
+        ``get_time`` executed at that moment halves bounds
+        """
+        if self._start_bounds is None:
+            return None
+        middle = sum(self._start_bounds) / 2
+        return middle + math.ceil(now - middle)
+
+    def refine(self, seek: Optional[int], at: float):
+        """ Position measured out of probe at abs time ``at`` (see ``split_time()``) """
+        if seek is None or self._play_state != PlayState.PLAYING:
+            self.invalidate()
+            return
+        self.observe(seek, at, self._play_state, self._input_key)
+
+    def invalidate(self):
+        """ Position or rate changed by own command (seek, play, etc.) """
+        self._play_state = None
+        self._start_bounds = None
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import time
+from typing import Dict, Mapping, Optional, Tuple
+
+from loguru import logger
+
+from vlcsync.metrics import DRIFT_CORRECTIONS
+from vlcsync.vlc import Vlc, guarded
+from vlcsync.vlc_state import PlayState, State, VlcId
+
+DRIFT_TOLERANCE = 0.1
+MAX_NUDGE_DRIFT = 2
+RATE_NUDGE = 0.05
+MEASURE_AHEAD = 0.02
+
+
+class MasterClock:
+    """
+    Master clock mode (see ``--master-clock``): followers continuously follow timeline of reference player
+    without resync of all players.
+
+    Reference player is source of last detected change (initially first registered one).
+    Drift is difference of video start times of follower and reference (positive: follower is behind).
+    Drift above ``tolerance`` is corrected by playback rate of follower changed by ``rate_nudge``
+    for ``drift / rate_nudge`` seconds, drift above ``max_nudge_drift`` by seek of follower only.
+    Drift above ``MAX_DESYNC_SECONDS`` is still detected as change (i.e. user seek) and synced as usual.
+
+    Start times are bounds narrowed by ``ClockModel`` (rc position is whole seconds), only drift certain
+    by bounds is corrected. Bounds wider than ``tolerance`` are halved by position measured at split time
+    of clock model: tick wakes up at that moment (see ``wake_in()``). Followers are not measured while nudged
+    (clock model assumes normal rate).
+    """
+
+    def __init__(self, tolerance: float = DRIFT_TOLERANCE, max_nudge_drift: float = MAX_NUDGE_DRIFT,
+                 rate_nudge: float = RATE_NUDGE):
+        self.tolerance = tolerance
+        self.max_nudge_drift = max_nudge_drift
+        self.rate_nudge = rate_nudge
+        self.master_id: Optional[VlcId] = None
+        self._nudged_until: Dict[VlcId, float] = {}
+        self._measure_at: Optional[float] = None
+
+    def follow(self, vlc: Optional[Vlc], all_vlc: Mapping[VlcId, Vlc]):
+        """ Change synced to all players: source of change becomes reference, nudges are cancelled """
+        if vlc is not None:
+            self.master_id = vlc.vlc_id
+        self.cancel_nudges(all_vlc)
+
+    def correct(self, all_vlc: Mapping[VlcId, Vlc], states: Mapping[VlcId, State]) -> bool:
+        """ Correct drift of followers by just probed ``states``. Return True if any correction started """
+        self._finish_nudges(all_vlc, time.time())
+        self._measure(all_vlc, states)
+        master = self._master(all_vlc)
+        master_state = states.get(master.vlc_id) if master else None
+        if master_state is None or master_state.play_state != PlayState.PLAYING:
+            return False
+        if (master_bounds := master.clock.start_bounds()) is None:
+            return False
+
+        corrected = False
+        for vlc_id, state in states.items():
+            if vlc_id == master.vlc_id or vlc_id in self._nudged_until:
+                continue
+            if state.play_state != PlayState.PLAYING or state.playlist_order_idx != master_state.playlist_order_idx:
+                continue
+            vlc = all_vlc[vlc_id]
+            if (bounds := vlc.clock.start_bounds()) is None:
+                continue
+
+            drift = self.certain_drift(bounds, master_bounds)
+            if drift:
+                corrected = guarded(vlc, self._correct, vlc, drift, master_bounds) or corrected
+        return corrected
+
+    def certain_drift(self, bounds: Tuple[float, float], master_bounds: Tuple[float, float]) -> float:
+        """ Smallest drift consistent with bounds of start times, zero if within tolerance """
+        low, high = bounds[0] - master_bounds[1], bounds[1] - master_bounds[0]
+        if low > self.tolerance:
+            return low
+        if high < -self.tolerance:
+            return high
+        return 0
+
+    def wake_in(self, now: float) -> Optional[float]:
+        """ Seconds to next measurement of position, if any scheduled """
+        return max(self._measure_at - now, 0) if self._measure_at is not None else None
+
+    def cancel_nudges(self, all_vlc: Mapping[VlcId, Vlc]):
+        for vlc_id in list(self._nudged_until):
+            self._finish_nudge(all_vlc, vlc_id)
+
+    def _correct(self, vlc: Vlc, drift: float, master_bounds: Tuple[float, float]) -> bool:
+        if abs(drift) > self.max_nudge_drift:
+            master_start = sum(master_bounds) / 2
+            seek = round(time.time() + vlc.latency - master_start)
+            logger.debug(f"Drift {drift * 1000:+.0f} ms of {vlc.vlc_id}, seek to {seek}")
+            vlc.seek(seek)
+            DRIFT_CORRECTIONS.inc(kind="seek")
+        else:
+            rate = 1 + self.rate_nudge if drift > 0 else 1 - self.rate_nudge
+            logger.debug(f"Drift {drift * 1000:+.0f} ms of {vlc.vlc_id}, nudge rate to {rate:g}")
+            vlc.set_rate(rate)
+            self._nudged_until[vlc.vlc_id] = time.time() + abs(drift) / self.rate_nudge
+            DRIFT_CORRECTIONS.inc(kind="rate")
+        return True
+
+    def _measure(self, all_vlc: Mapping[VlcId, Vlc], states: Mapping[VlcId, State]):
+        """ Measure players with split time close enough, schedule next measurement """
+        self._measure_at = None
+        to_measure = []
+        for vlc_id, state in states.items():
+            vlc = all_vlc[vlc_id]
+            bounds = vlc.clock.start_bounds()
+            if (state.play_state != PlayState.PLAYING or vlc_id in self._nudged_until or bounds is None
+                    or bounds[1] - bounds[0] <= self.tolerance):
+                continue
+            at = vlc.clock.split_time(time.time() + vlc.latency)
+            send_at = at - vlc.latency
+            if send_at - time.time() <= MEASURE_AHEAD:
+                to_measure.append((send_at, at, vlc))
+            elif self._measure_at is None or send_at < self._measure_at:
+                self._measure_at = send_at
+
+        for _, at, vlc in sorted(to_measure, key=lambda item: item[0]):
+            guarded(vlc, vlc.measure_time_at, at)
+
+    def _finish_nudges(self, all_vlc: Mapping[VlcId, Vlc], now: float):
+        for vlc_id, until in list(self._nudged_until.items()):
+            if now >= until:
+                self._finish_nudge(all_vlc, vlc_id)
+
+    def _finish_nudge(self, all_vlc: Mapping[VlcId, Vlc], vlc_id: VlcId):
+        del self._nudged_until[vlc_id]
+        if (vlc := all_vlc.get(vlc_id)) and not vlc.degraded:
+            guarded(vlc, vlc.set_rate, 1)
+
+    def _master(self, all_vlc: Mapping[VlcId, Vlc]) -> Optional[Vlc]:
+        if self.master_id not in all_vlc:
+            # Reference lost (or not chosen yet): first registered player
+            self.master_id = next(iter(all_vlc), None)
+        return all_vlc.get(self.master_id) if self.master_id else None
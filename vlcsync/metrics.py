@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Sequence, Tuple
+
+from vlcsync.vlc_state import VlcId
+
+METRICS_ADDR = "127.0.0.1"
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+_enabled = False
+
+
+def enable(enabled: bool = True):
+    """ Recording is no-op (no lock, no bucket search) until enabled, i.e. metrics are served """
+    global _enabled
+    _enabled = enabled
+
+
+class Metric:
+    """ Minimal metric in Prometheus text format (no client library dependency) """
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        return tuple(str(labels[label]) for label in self.labels)
+
+    def _format_labels(self, key: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{label}="{escape(value)}"' for label, value in zip(self.labels, key)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            lines.extend(self._render_value(key, value))
+        return lines
+
+    def _render_value(self, key: Tuple[str, ...], value) -> List[str]:
+        raise NotImplementedError()
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def remove(self, **labels):
+        """ Drop all label sets matching given labels (subset of metric labels) """
+        matches = [(self.labels.index(label), str(value)) for label, value in labels.items()]
+        with self._lock:
+            for key in [key for key in self._values if all(key[idx] == value for idx, value in matches)]:
+                del self._values[key]
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        if not _enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _render_value(self, key: Tuple[str, ...], value) -> List[str]:
+        return [f"{self.name}{self._format_labels(key)} {value}"]
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels):
+        if not _enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0)
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        if not _enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        counts, _ = self._values.get(self._key(labels)) or ([0], 0.0)
+        return sum(counts)
+
+    def sum(self, **labels) -> float:
+        _, total = self._values.get(self._key(labels)) or ([0], 0.0)
+        return total
+
+    def _render_value(self, key: Tuple[str, ...], value) -> List[str]:
+        counts, total = value
+        lines = []
+        cumulative = 0
+        for bound, count in zip([*map(str, self.buckets), "+Inf"], counts):
+            cumulative += count
+            le = f'le="{bound}"'
+            lines.append(f"{self.name}_bucket{self._format_labels(key, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{self._format_labels(key)} {total}")
+        lines.append(f"{self.name}_count{self._format_labels(key)} {cumulative}")
+        return lines
+
+
+def escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+REGISTRY: List[Metric] = []
+
+COMMAND_LATENCY = Histogram("vlcsync_command_latency_seconds",
+                            "Round trip of command per player (pipelined commands share round trip of their batch)",
+                            ["player", "command"])
+CONNECTION_ERRORS = Counter("vlcsync_connection_errors_total", "Player connection errors", ["player"])
+TIMEOUTS = Counter("vlcsync_timeouts_total", "Player answer timeouts (included in connection errors)", ["player"])
+TICK_DURATION = Histogram("vlcsync_tick_duration_seconds", "Duration of check synchronized tick")
+DISCOVERY_DURATION = Histogram("vlcsync_discovery_scan_duration_seconds", "Duration of players discovery scan")
+SYNCS = Counter("vlcsync_syncs_total", "Syncs of all players triggered")
+DETECTION_TO_SYNC = Histogram("vlcsync_detection_to_sync_seconds",
+                              "From first detected change (of coalesced burst) to all players synced")
+DRIFT_CORRECTIONS = Counter("vlcsync_drift_corrections_total", "Drift corrections of followers in master clock mode",
+                            ["kind"])
+
+
+def command_label(command: str) -> str:
+    """ Command name without arguments, i.e. "seek 10" -> "seek" """
+    return command.split(" ", 1)[0]
+
+
+def observe_round_trip(elapsed: float, player: str, commands: Sequence[str]):
+    if _enabled:
+        for command in commands:
+            COMMAND_LATENCY.observe(elapsed, player=player, command=command_label(command))
+
+
+def connection_failed(player: str, timeout: bool = False):
+    """ Connection of player actually failed (not error raised for already dropped connection) """
+    CONNECTION_ERRORS.inc(player=player)
+    if timeout:
+        TIMEOUTS.inc(player=player)
+
+
+def metrics_label(vlc_id: VlcId) -> str:
+    return vlc_id.key
+
+
+def remove_player(vlc_id: VlcId):
+    """ Drop label sets of deregistered player """
+    player = metrics_label(vlc_id)
+    for metric in REGISTRY:
+        if "player" in metric.labels:
+            metric.remove(player=player)
+
+
+def render() -> str:
+    return "\n".join(line for metric in REGISTRY for line in metric.render()) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve_metrics(port: int, addr: str = METRICS_ADDR) -> ThreadingHTTPServer:
+    """ Serve metrics on http://addr:port/metrics in background thread (enables recording) """
+    server = ThreadingHTTPServer((addr, port), _MetricsHandler)
+    enable()
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="metrics").start()
+    return server
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import atexit
+import cProfile
+import functools
+import inspect
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from vlcsync.syncer import Syncer
+from vlcsync.vlc import Vlc, VlcHttp, VlcProcs
+from vlcsync.vlc_async import AsyncPoller
+from vlcsync.vlc_finder import IVlcListFinder
+from vlcsync.vlc_http import VlcHttpConnection
+from vlcsync.vlc_socket import RecvBuffer
+
+PROFILE_PREFIX = "vlcsync-profile"
+SAMPLE_INTERVAL = 0.005
+
+# Hot path phases. Timings are inclusive, i.e. "probe" includes "socket_wait" and "parse" of probe
+PHASES: List[Tuple[str, object, str]] = [
+    ("discovery", VlcProcs, "try_connect"),
+    ("probe", Syncer, "probe_all"),
+    ("sync", VlcProcs, "sync_all"),
+    ("parse", Vlc, "parse_probe"),
+    ("parse", Vlc, "_extract_state"),
+    ("parse", Vlc, "_extract_playlist"),
+    ("parse", VlcHttp, "parse_probe"),
+    ("parse", VlcHttp, "_extract_state"),
+    ("parse", VlcHttp, "_extract_playlist"),
+    ("socket_wait", RecvBuffer, "fill"),
+    ("socket_wait", VlcHttpConnection, "_read_answer"),
+    ("socket_wait", AsyncPoller, "_wait"),
+]
+
+
+class Profiler:
+    """
+    Profiling of sync loop (see ``--profile``):
+      - per phase timings of hot path (methods from ``PHASES`` wrapped only when profiling enabled)
+      - sampling of all threads stacks into collapsed stacks (input of flamegraph.pl, speedscope, etc.)
+      - cProfile of main thread, if ``cprofile`` (deterministic, so slows down sync loop itself)
+
+    Dumped on exit (SIGTERM too) and on SIGUSR1 by main loop (see ``dump_if_requested()``).
+    """
+
+    def __init__(self, prefix: str = PROFILE_PREFIX, sample_interval: float = SAMPLE_INTERVAL,
+                 cprofile: bool = False):
+        self.prefix = prefix
+        self.sample_interval = sample_interval
+        self.phases: Dict[str, List[float]] = {}
+        self.stacks: Counter[str] = Counter()
+        self.profile: Optional[cProfile.Profile] = cProfile.Profile() if cprofile else None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._originals: List[Tuple[object, str, object]] = []
+        self._prev_handlers: Dict[int, object] = {}
+        self._dump_requested = False
+
+    def start(self):
+        for phase, owner, attr in PHASES:
+            self.instrument(owner, attr, phase)
+        for finder_class in _subclasses(IVlcListFinder):
+            if "get_vlc_list" in finder_class.__dict__:
+                self.instrument(finder_class, "get_vlc_list", "discovery")
+
+        self._sampler = threading.Thread(target=self._sample, daemon=True, name="profiler")
+        self._sampler.start()
+        if hasattr(signal, "SIGUSR1"):
+            self._prev_handlers[signal.SIGUSR1] = signal.signal(signal.SIGUSR1, self._request_dump)
+        # Default action of SIGTERM skips atexit
+        self._prev_handlers[signal.SIGTERM] = signal.signal(signal.SIGTERM, self._exit)
+        atexit.register(self.stop)
+        if self.profile:
+            self.profile.enable()
+
+    def stop(self):
+        if self._stopped.is_set():
+            return
+        if self.profile:
+            self.profile.disable()
+        self._stopped.set()
+        for owner, attr, original in reversed(self._originals):
+            setattr(owner, attr, original)
+        self._originals.clear()
+        for signum, handler in self._prev_handlers.items():
+            if handler is not None:
+                signal.signal(signum, handler)
+        self._prev_handlers.clear()
+        atexit.unregister(self.stop)
+        self.dump()
+
+    def _request_dump(self, *_):
+        """ SIGUSR1 handler: no I/O in signal handler, only flag for main loop """
+        self._dump_requested = True
+
+    @staticmethod
+    def _exit(signum, _frame):
+        """ SIGTERM handler: exit normally, so ``stop()`` dumps on exit """
+        sys.exit(128 + signum)
+
+    def dump_if_requested(self):
+        """ Called from main loop """
+        if self._dump_requested:
+            self._dump_requested = False
+            self.dump()
+
+    def add(self, phase: str, elapsed: float):
+        with self._lock:
+            stats = self.phases.setdefault(phase, [0, 0.0])
+            stats[0] += 1
+            stats[1] += elapsed
+
+    def instrument(self, owner, attr: str, phase: str):
+        """ Wrap method (plain, static or async) for time it as phase """
+        raw = owner.__dict__[attr]
+        self._originals.append((owner, attr, raw))
+        func = raw.__func__ if isinstance(raw, staticmethod) else raw
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    self.add(phase, time.perf_counter() - start)
+        else:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.add(phase, time.perf_counter() - start)
+
+        setattr(owner, attr, staticmethod(wrapper) if isinstance(raw, staticmethod) else wrapper)
+
+    def _sample(self):
+        own_id = threading.get_ident()
+        while not self._stopped.wait(self.sample_interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                with self._lock:
+                    self.stacks[";".join(reversed(stack))] += 1
+
+    def dump(self):
+        """ Write collapsed stacks and cProfile stats (if enabled), print phase timings """
+        paths = [f"{self.prefix}.collapsed"]
+        with self._lock:
+            stacks = list(self.stacks.items())
+        with open(paths[0], "w") as f:
+            for stack, count in stacks:
+                f.write(f"{stack} {count}\n")
+
+        if self.profile:
+            running = not self._stopped.is_set()
+            if running:
+                self.profile.disable()
+            paths.append(f"{self.prefix}.pstats")
+            self.profile.dump_stats(paths[-1])
+            if running:
+                self.profile.enable()
+
+        print(self.summary(), flush=True)
+        print(f"Profile dumped to {' and '.join(paths)}", flush=True)
+
+    def summary(self) -> str:
+        lines = [f"{'phase':<12} {'calls':>8} {'total, s':>10} {'avg, ms':>10}"]
+        with self._lock:
+            phases = sorted(self.phases.items(), key=lambda item: -item[1][1])
+        for phase, (calls, total) in phases:
+            lines.append(f"{phase:<12} {calls:>8} {total:>10.3f} {total / calls * 1000:>10.3f}")
+        return "\n".join(lines)
+
+
+def _subclasses(cls) -> List[type]:
+    result = []
+    for subclass in cls.__subclasses__():
+        result.append(subclass)
+        result.extend(_subclasses(subclass))
+    return result
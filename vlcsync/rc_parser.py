@@ -0,0 +1,90 @@
+"""
+Byte level parsers of rc answers.
+
+Work directly on raw answers (bytes or memoryview of receive buffer) without decoding.
+State, time and volume are parsed by find/slice. Input lines and playlist items are collected
+by single ``findall()`` scan: python loop over lines is slower than regex scan in C
+(see tests/benchmark/test_bench_rc_parser.py).
+"""
+from __future__ import annotations
+
+import re
+from typing import List, Optional
+
+from vlcsync.vlc_state import PlayList, PlayListItem, PlayState
+
+STATE_PREFIX = b"( state "
+STATE_SUFFIX = b" )"
+VOLUME_PREFIX = b"( audio volume: "
+PLAY_STATES = {state.value.encode(): state for state in PlayState if state.value}
+RE_INPUT = re.compile(rb"\( (?:new input|title): [^\r\n]*\)")
+RE_PLAYLIST_ITEM = re.compile(rb"(?m)^\| {2}([ *])(\d+) - ")
+ACTIVE_MARKER = b"*"
+
+
+def parse_state(status: bytes | memoryview) -> PlayState:
+    """ "( state playing )" line of status """
+    data = bytes(status)
+    # State line is the last one, search from the end: title could contain anything
+    start = data.rfind(STATE_PREFIX)
+    if start < 0:
+        return PlayState.UNKNOWN
+
+    start += len(STATE_PREFIX)
+    end = data.find(STATE_SUFFIX, start)
+    return PLAY_STATES.get(data[start:end], PlayState.UNKNOWN) if end >= 0 else PlayState.UNKNOWN
+
+
+def parse_input(status: bytes | memoryview) -> bytes:
+    """ "( new input: ... )" and "( title: ... )" lines of status joined (without line breaks) """
+    return b"".join(RE_INPUT.findall(status))
+
+
+def parse_status_volume(status: bytes | memoryview) -> Optional[int]:
+    """ "( audio volume: 256 )" line of status """
+    data = bytes(status)
+    start = data.find(VOLUME_PREFIX)
+    if start < 0:
+        return None
+
+    start += len(VOLUME_PREFIX)
+    end = data.find(STATE_SUFFIX, start)
+    return parse_volume(data[start:end]) if end >= 0 else None
+
+
+def parse_time(answer: bytes | memoryview) -> Optional[int]:
+    """ get_time answer: seconds or empty line (if stopped) """
+    data = bytes(answer).strip()
+    return int(data) if data else None
+
+
+def parse_volume(answer: bytes | memoryview) -> Optional[int]:
+    """ volume answer: integer or float with locale decimal separator (i.e. "256,0") """
+    data = bytes(answer).strip()
+    return int(float(data.replace(b",", b"."))) if data else None
+
+
+def parse_playlist(answer: bytes | memoryview) -> PlayList:
+    """ Playlist answer Format:
+    +----[ Playlist - playlist ]
+    | 1 - Плейлист
+    |   6 - Video 1.mkv (00:23:37) [played 1 time]
+    |  *4 - Video 2.mkv (00:23:44) [played 2 times]
+    |   3 - Video 3.mkv (00:23:43) [played 1 time]
+    |   5 - Video 4.mkv (00:23:44) [played 1 time]
+    | 2 - Медиатека
+    |   12 - Video 6.mkv (00:23:44)
+    +----[ End of playlist ]
+
+    Items are "|  " followed by active marker ("*" or " "), internal index and " - ".
+    """
+    items: List[PlayListItem] = []
+    active: Optional[PlayListItem] = None
+
+    for marker, index in RE_PLAYLIST_ITEM.findall(answer):
+        item = PlayListItem(len(items), int(index))
+        items.append(item)
+        if marker == ACTIVE_MARKER:
+            active = item
+
+    return PlayList(items, active)
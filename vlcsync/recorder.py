@@ -0,0 +1,183 @@
+"""
+Record of player traffic and detected state changes (see ``--record``) for offline reproduction.
+
+Append-only binary log: ``MAGIC`` followed by records
+  - header: kind (uint8), abs time (float64), payload size (uint32), little endian
+  - payload: fields, each is size (uint32) and bytes. First field is player ("scheme://host:port")
+
+Record kinds:
+  - SEND: player, commands (joined by "\\n")
+  - RECV: player, answer per command
+  - STATE: player (empty if change received from coordinator), state (json)
+  - ERROR: player, error of answer receive (i.e. timeout)
+"""
+from __future__ import annotations
+
+import atexit
+import functools
+import json
+import struct
+import threading
+import time
+from typing import BinaryIO, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from vlcsync.agent import decode_state, encode_state, player_key
+from vlcsync.vlc import VlcProcs
+from vlcsync.vlc_http import VlcHttpConnection
+from vlcsync.vlc_socket import VlcSocket
+from vlcsync.vlc_state import State
+
+MAGIC = b"VLCSREC1"
+HEADER = struct.Struct("<BdI")
+FIELD_SIZE = struct.Struct("<I")
+
+SEND = 1
+RECV = 2
+STATE = 3
+ERROR = 4
+
+
+class Record(NamedTuple):
+    kind: int
+    time: float
+    player: str
+    fields: List[bytes]
+
+    @property
+    def commands(self) -> List[str]:
+        return self.fields[0].decode().split("\n")
+
+    @property
+    def state(self) -> State:
+        return decode_state(json.loads(self.fields[0]), self.time)
+
+
+def pack_record(kind: int, at: float, fields: Sequence[bytes | memoryview]) -> bytes:
+    payload = b"".join(FIELD_SIZE.pack(len(field)) + bytes(field) for field in fields)
+    return HEADER.pack(kind, at, len(payload)) + payload
+
+
+def encode_commands(commands: Sequence[str]) -> bytes:
+    return "\n".join(commands).encode()
+
+
+def read_records(path: str) -> Iterator[Record]:
+    """ Records of log. Incomplete last record (i.e. process killed while writing) is ignored """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"Not a vlcsync record log: {path}")
+
+        while len(header := f.read(HEADER.size)) == HEADER.size:
+            kind, at, size = HEADER.unpack(header)
+            payload = f.read(size)
+            if len(payload) < size:
+                return
+
+            fields = []
+            pos = 0
+            while pos < size:
+                field_size, = FIELD_SIZE.unpack_from(payload, pos)
+                pos += FIELD_SIZE.size
+                fields.append(payload[pos:pos + field_size])
+                pos += field_size
+            yield Record(kind, at, fields[0].decode(), fields[1:])
+
+
+class Recorder:
+    """
+    Write traffic of all players (rc and http connections, including async probes) and state changes to log.
+
+    Connection methods are wrapped only when recording enabled (like ``Profiler``).
+    Every record is flushed, so log survives killed process.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file: Optional[BinaryIO] = None
+        self._lock = threading.Lock()
+        self._originals: List[Tuple[object, str, object]] = []
+
+    def start(self):
+        self._file = open(self.path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+
+        for conn_class in (VlcSocket, VlcHttpConnection):
+            self._wrap(conn_class, "send", self._recorded_send)
+            self._wrap(conn_class, "recv_raw", self._recorded_recv)
+        self._wrap(VlcSocket, "poll_answers", self._recorded_poll)
+        self._wrap(VlcSocket, "expire_cmds", self._recorded_expire)
+        self._wrap(VlcProcs, "sync_all", self._recorded_sync_all)
+        atexit.register(self.stop)
+
+    def stop(self):
+        for owner, attr, original in reversed(self._originals):
+            setattr(owner, attr, original)
+        self._originals.clear()
+        atexit.unregister(self.stop)
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    def write(self, kind: int, vlc_id, fields: Sequence[bytes | memoryview]):
+        record = pack_record(kind, time.time(), [(player_key(vlc_id) if vlc_id else "").encode(), *fields])
+        with self._lock:
+            if self._file:
+                self._file.write(record)
+                self._file.flush()
+
+    def write_state(self, state: State, vlc_id=None):
+        self.write(STATE, vlc_id, [json.dumps(encode_state(state)).encode()])
+
+    def _recorded_send(self, send):
+        def wrapper(conn, *commands):
+            self.write(SEND, conn.vlc_id, [encode_commands(commands)])
+            return send(conn, *commands)
+
+        return wrapper
+
+    def _recorded_recv(self, recv_raw):
+        def wrapper(conn, count):
+            try:
+                answers = recv_raw(conn, count)
+            except Exception as e:
+                self.write(ERROR, conn.vlc_id, [str(e).encode()])
+                raise
+            self.write(RECV, conn.vlc_id, answers)
+            return answers
+
+        return wrapper
+
+    def _recorded_poll(self, poll_answers):
+        def wrapper(conn):
+            try:
+                answers = poll_answers(conn)
+            except Exception as e:
+                self.write(ERROR, conn.vlc_id, [str(e).encode()])
+                raise
+            if answers is not None:
+                self.write(RECV, conn.vlc_id, answers)
+            return answers
+
+        return wrapper
+
+    def _recorded_expire(self, expire_cmds):
+        def wrapper(conn):
+            error = expire_cmds(conn)
+            self.write(ERROR, conn.vlc_id, [str(error).encode()])
+            return error
+
+        return wrapper
+
+    def _recorded_sync_all(self, sync_all):
+        def wrapper(env, state, source_vlc, *args):
+            self.write_state(state, source_vlc.vlc_id if source_vlc else None)
+            return sync_all(env, state, source_vlc, *args)
+
+        return wrapper
+
+    def _wrap(self, owner, attr: str, make_wrapper):
+        original = owner.__dict__[attr]
+        self._originals.append((owner, attr, original))
+        setattr(owner, attr, functools.wraps(original)(make_wrapper(original)))
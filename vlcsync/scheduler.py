@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+MIN_POLL_INTERVAL = 0.05
+MAX_POLL_INTERVAL = 0.5
+BACKOFF_FACTOR = 1.5
+
+
+class PollScheduler:
+    """
+    Adaptive poll interval.
+
+    Poll with min interval right after change, then back off exponentially
+    up to max interval while all players are stable.
+    """
+
+    def __init__(self, min_interval: float = MIN_POLL_INTERVAL, max_interval: float = MAX_POLL_INTERVAL,
+                 backoff: float = BACKOFF_FACTOR):
+        if not 0 < min_interval <= max_interval:
+            raise ValueError(f"Expected 0 < min interval ({min_interval}) <= max interval ({max_interval})")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.interval = min_interval
+
+    def next_interval(self, changed: bool) -> float:
+        """ Return interval before next poll """
+        if changed:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * self.backoff, self.max_interval)
+        return self.interval
@@ -0,0 +1,39 @@
+"""
+Independent sync groups (see ``--group``): change of player is synced only to players of the same group.
+
+All groups share single discovery and single probe of all players per tick, groups only partition probed states.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from fnmatch import fnmatch
+from typing import Iterable, List, Optional, Set, Tuple
+
+from vlcsync.vlc_state import VlcId
+
+
+@dataclass
+class SyncGroup:
+    """ Players of group: matched by port range (any host), host:port or unix socket path pattern """
+    name: str
+    port_ranges: List[Tuple[int, int]] = field(default_factory=list)
+    hosts: Set[VlcId] = field(default_factory=set)
+    """ Also added to manual players (like ``--rc-host``) """
+    paths: List[str] = field(default_factory=list)
+
+    def matches(self, vlc_id: VlcId) -> bool:
+        if vlc_id.is_unix:
+            return any(fnmatch(vlc_id.addr, path) for path in self.paths)
+        # Host of group matches any interface on its host:port
+        return (any(host.addr == vlc_id.addr and host.port == vlc_id.port for host in self.hosts) or
+                any(low <= vlc_id.port <= high for low, high in self.port_ranges))
+
+    def __str__(self):
+        members = ([f"{low}-{high}" if low != high else str(low) for low, high in self.port_ranges] +
+                   [vlc_id.address for vlc_id in self.hosts] + self.paths)
+        return f"{self.name} ({', '.join(members)})"
+
+
+def find_group(groups: Iterable[SyncGroup], vlc_id: VlcId) -> Optional[SyncGroup]:
+    """ First group matching player, None if player is not grouped """
+    return next((group for group in groups if group.matches(vlc_id)), None)
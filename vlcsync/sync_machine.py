@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import TYPE_CHECKING, Dict, Mapping, Optional, Tuple
+
+from loguru import logger
+
+from vlcsync.vlc_state import State, VlcId
+
+if TYPE_CHECKING:
+    # Config (so vlc module) depends on defaults of this module
+    from vlcsync.vlc import Vlc
+
+COALESCE_WINDOW = 0.2
+MAX_COALESCE = 1
+ECHO_TIMEOUT = 2
+
+
+class Phase(Enum):
+    IDLE = "idle"
+    COALESCING = "coalescing"
+    """ User change detected, wait until players stop changing """
+    SETTLING = "settling"
+    """ Players synced, wait echoes of own commands """
+
+
+@dataclass
+class Change:
+    """ User change (or burst of changes) to be synced """
+    vlc: Vlc
+    state: State
+    playlist_changed: bool
+    detected_at: float
+    """ First change of burst detected """
+    changed_at: float
+    """ Last change of burst detected """
+    timeline_only: bool = True
+    """ Only position changed (i.e. not pause or next item) """
+
+
+class SyncMachine:
+    """
+    Decide which probed states are user changes to sync.
+
+    Echoes: after sync every player is expected to reach synced state (state of our own commands).
+    Probed state of player, which matches expected one, is echo: taken as new previous state without sync.
+    Until expectation met (or expired after ``echo_timeout``) other states of player are in flight
+    (i.e. seek still in progress) and ignored. So user change of just synced player is delayed, but not lost.
+
+    Coalescing: change of position is synced only after players stay unchanged ``coalesce_window`` seconds
+    (last change of burst wins, i.e. timeline scrubbing), but not later than ``max_coalesce`` seconds
+    after first change of burst. Change of play state or playlist item is synced immediately
+    (with pending changes of position). Zero window syncs every change immediately.
+    """
+
+    def __init__(self, coalesce_window: float = COALESCE_WINDOW, timestamp_sync: bool = True,
+                 max_coalesce: float = MAX_COALESCE, echo_timeout: float = ECHO_TIMEOUT):
+        self.coalesce_window = coalesce_window
+        self.timestamp_sync = timestamp_sync
+        self.max_coalesce = max_coalesce
+        self.echo_timeout = echo_timeout
+        self.pending: Optional[Change] = None
+        self._expected: Dict[VlcId, Tuple[State, float]] = {}
+
+    @property
+    def phase(self) -> Phase:
+        if self.pending:
+            return Phase.COALESCING
+        if self._expected:
+            return Phase.SETTLING
+        return Phase.IDLE
+
+    def observe(self, all_vlc: Mapping[VlcId, Vlc], states: Mapping[VlcId, State],
+                now: Optional[float] = None) -> Optional[Change]:
+        """ Feed probed states. Return change, if it should be synced now """
+        now = time.time() if now is None else now
+        for vlc_id, state in states.items():
+            vlc = all_vlc[vlc_id]
+            if self._is_expected(vlc, state, now):
+                continue
+
+            is_changed, state, playlist_changed = vlc.is_state_change(state)
+            if is_changed:
+                timeline_only = not playlist_changed and state.same_play_state(vlc.prev_state)
+                # Next changes of burst are compared with this one
+                vlc.prev_state = state
+                if self.pending:
+                    logger.debug(f"Coalesce change from {vlc_id} with pending change from {self.pending.vlc.vlc_id}")
+                    self.pending = Change(vlc, state, playlist_changed or self.pending.playlist_changed,
+                                          self.pending.detected_at, now, timeline_only and self.pending.timeline_only)
+                else:
+                    self.pending = Change(vlc, state, playlist_changed, now, now, timeline_only)
+
+        # Players lost after sync
+        self._expected = {vlc_id: expected for vlc_id, expected in self._expected.items() if now < expected[1]}
+
+        change = self.pending
+        if change and (not change.timeline_only or now - change.changed_at >= self.coalesce_window or
+                       now - change.detected_at >= self.max_coalesce):
+            self.pending = None
+            return change
+        return None
+
+    def synced(self, state: State, all_vlc: Mapping[VlcId, Vlc], now: Optional[float] = None):
+        """ All players commanded to ``state``. Wait echoes of players, not reached it on verify of sync """
+        until = (time.time() if now is None else now) + self.echo_timeout
+        self._expected = {vlc_id: (state, until) for vlc_id, vlc in all_vlc.items()
+                          if not self.is_echo(vlc.prev_state, state)}
+
+    def _is_expected(self, vlc: Vlc, state: State, now: float) -> bool:
+        """ Check expectation of player. Return True if state is echo or in flight """
+        if vlc.vlc_id not in self._expected:
+            return False
+
+        expected, until = self._expected[vlc.vlc_id]
+        if self.is_echo(state, expected):
+            del self._expected[vlc.vlc_id]
+            vlc.prev_state = state
+            return True
+        if now < until:
+            return True
+
+        logger.debug(f"No echo of sync from {vlc.vlc_id} in {self.echo_timeout} s, last state {state}")
+        del self._expected[vlc.vlc_id]
+        return False
+
+    def is_echo(self, state: State, expected: State) -> bool:
+        if not self.timestamp_sync:
+            # Position is not synced
+            return state.same_play_state(expected) and state.same_playlist_item(expected)
+        return state.same(expected)[0]
@@ -2,35 +2,63 @@ from __future__ import annotations
 
 import sys
 import time
-from typing import List
+from typing import Dict, List, Mapping, Optional, Set
 
 from loguru import logger
 
 from vlcsync.app_config import AppConfig
-from vlcsync.vlc import VLC_IFACE_IP, VlcProcs, Vlc
-from vlcsync.vlc_finder import LocalProcessFinderProvider, ExtraHostFinder
+from vlcsync.master_clock import MasterClock
+from vlcsync.metrics import DETECTION_TO_SYNC, TICK_DURATION
+from vlcsync.sync_group import find_group
+from vlcsync.sync_machine import Change, Phase, SyncMachine
+from vlcsync.vlc import RESCAN_INTERVAL, VLC_IFACE_IP, WATCHED_RESCAN_INTERVAL, VlcProcs, Vlc, log_degraded
+from vlcsync.vlc_async import AsyncPoller
+from vlcsync.vlc_finder import DiscoveryWatcher, ExtraHostFinder, local_finder
 from vlcsync.vlc_socket import VlcConnectionError
 
-from vlcsync.vlc_state import VlcId
+from vlcsync.vlc_state import State, VlcId
+
+
+class GroupState:
+    """ Sync state of group of players (see ``--group``). Name is None for all players, if groups not configured """
+
+    def __init__(self, name: Optional[str], app_config: AppConfig):
+        self.name = name
+        self.sync_machine = SyncMachine(app_config.coalesce_window, not app_config.no_timestamp_sync)
+        self.master_clock = MasterClock() if app_config.master_clock else None
+
+
+def manual_hosts(app_config: AppConfig) -> Set[VlcId]:
+    """ Explicit definition (i.e. http one) wins over host of group on the same address """
+    explicit = {vlc_id.address for vlc_id in app_config.extra_rc_hosts}
+    return app_config.extra_rc_hosts | {vlc_id for group in app_config.groups for vlc_id in group.hosts
+                                        if vlc_id.address not in explicit}
+
 
 class Syncer:
     def __init__(self, app_config: AppConfig):
         self.env = None
+        self.poller = None
         self.app_config = app_config
+        self.groups: Dict[Optional[str], GroupState] = {
+            group.name: GroupState(group.name, app_config) for group in app_config.groups
+        } or {None: GroupState(None, app_config)}
+        self._group_names: Dict[VlcId, Optional[str]] = {}
         self.supress_log_until = 0
 
         vlc_finders = set()
         if not self.app_config.no_local_discovery:
-            vlc_finders.add(LocalProcessFinderProvider(VLC_IFACE_IP))
+            vlc_finders.add(local_finder(VLC_IFACE_IP))
             print(f"  Discover instances on {VLC_IFACE_IP} iface...", flush=True)
         else:
             print("  Local discovery vlc instances DISABLED...", flush=True)
 
-        if app_config.extra_rc_hosts:
-            vlc_finders.add(ExtraHostFinder(app_config.extra_rc_hosts))
-            for rc_host in app_config.extra_rc_hosts:
+        extra_hosts = manual_hosts(app_config)
+        if extra_hosts:
+            vlc_finders.add(ExtraHostFinder(extra_hosts))
+            for rc_host in extra_hosts:
                 rc_host: VlcId
-                print(f"  Manual host defined {rc_host.addr}:{rc_host.port}", flush=True)
+                print(f"  Manual host defined {rc_host}", flush=True)
         else:
             print("""  Manual vlc addresses ("--rc-host" args) NOT provided...""", flush=True)
 
@@ -39,7 +67,25 @@ class Syncer:
                   """See: "vlcsync --help" for more info""", flush=True)
             sys.exit(1)
 
-        self.env = VlcProcs(vlc_finders)
+        watcher = None
+        rescan_interval = RESCAN_INTERVAL
+        if not self.app_config.no_local_discovery and DiscoveryWatcher.is_supported():
+            watcher = DiscoveryWatcher(VLC_IFACE_IP)
+            # Manual hosts still need periodic rescan
+            if not extra_hosts:
+                rescan_interval = WATCHED_RESCAN_INTERVAL
+
+        self.env = VlcProcs(vlc_finders, watcher, rescan_interval, app_config.time_probe_interval)
+
+        if app_config.async_poll:
+            self.poller = AsyncPoller()
+            print("  Async polling ENABLED...", flush=True)
+
+        if app_config.master_clock:
+            print("  Master clock mode ENABLED...", flush=True)
+
+        for group in app_config.groups:
+            print(f"  Sync group {group}", flush=True)
 
     def __enter__(self):
         self.do_check_synchronized()
@@ -48,49 +94,137 @@ class Syncer:
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.close()
 
-    def do_check_synchronized(self):
+    def do_check_synchronized(self) -> bool:
+        """ Return True if any change detected (i.e. players synced) """
+        with TICK_DURATION.time():
+            return self._check_synchronized()
+
+    def _check_synchronized(self) -> bool:
         self.log_with_debounce("do_check_synchronized()...")
-        try:
-            if self.app_config.volume_sync:
-                self.sync_volume()
-
-            self.sync_playstate()
-
-        except VlcConnectionError as e:
-            self.env.dereg(e.vlc_id)
-
-    def sync_playstate(self):
-        for vlc_id, vlc in self.env.all_vlc.items():
-            is_changed, state, playlist_changed = vlc.is_state_change()
-
-            if is_changed:
-                # Workaround Save volumes.
-                # When playlist items changed ALSO happen volumes sync by some reason. But SHOULD NOT!
-                volumes: List[tuple[Vlc, int]] = []
-                if not self.app_config.volume_sync and playlist_changed:
-                    volumes = [(vlc1, vlc1.volume()) for _, vlc1 in self.env.all_vlc.items()]
-
-                print(f"\nVlc state change detected from ({vlc_id})", flush=True)
-                self.env.sync_all(state, vlc, self.app_config)
-
-                # Restore volumes if needed
-                if volumes:
-                    for vlc_next, volume in volumes:
-                        vlc_next.set_volume(volume)
-                # Trying to fix endless resyncing hang
-                # Cannot find reproduce steps for that
-                time.sleep(0.5)
-                break
-
-    def sync_volume(self):
-        for vlc_id, vlc in self.env.all_vlc.items():
-            cur_volume = vlc.volume()
+        self.reconnect_degraded()
+        all_vlc = self.env.active_vlc
+        states = self.probe_all(all_vlc)
+
+        changed = False
+        for name, group_vlc in self.partition(all_vlc).items():
+            group_states = states if group_vlc is all_vlc else {
+                vlc_id: state for vlc_id, state in states.items() if vlc_id in group_vlc
+            }
+            try:
+                changed = self.check_group(self.groups[name], group_vlc, group_states) or changed
+            except VlcConnectionError as e:
+                # Player is degraded (reconnected in place later), others are not affected
+                log_degraded(e.vlc_id, e)
+                changed = True
+
+        return changed
+
+    def check_group(self, group: GroupState, all_vlc: Mapping[VlcId, Vlc], states: Dict[VlcId, State]) -> bool:
+        changed = False
+        if self.app_config.volume_sync:
+            changed = self.sync_volume(all_vlc, states)
+
+        changed = self.sync_playstate(group, all_vlc, states) or changed
+
+        if group.master_clock and not changed:
+            group.master_clock.correct(all_vlc, states)
+        return changed
+
+    def partition(self, all_vlc: Mapping[VlcId, Vlc]) -> Dict[Optional[str], Mapping[VlcId, Vlc]]:
+        """ Players by group name. Players not matched by any group are skipped """
+        if not self.app_config.groups:
+            return {None: all_vlc}
+
+        grouped: Dict[Optional[str], Dict[VlcId, Vlc]] = {}
+        for vlc_id, vlc in all_vlc.items():
+            if (name := self.group_name(vlc_id)) is not None:
+                grouped.setdefault(name, {})[vlc_id] = vlc
+        return grouped
+
+    def group_name(self, vlc_id: VlcId) -> Optional[str]:
+        if vlc_id not in self._group_names:
+            group = find_group(self.app_config.groups, vlc_id)
+            if group is None:
+                print(f"  Player {vlc_id} is not in any sync group, not synced", flush=True)
+            self._group_names[vlc_id] = group.name if group else None
+        return self._group_names[vlc_id]
+
+    def reconnect_degraded(self):
+        self.env.reconnect_degraded()
+
+    def sync_playstate(self, group: GroupState, all_vlc: Mapping[VlcId, Vlc], states: Dict[VlcId, State]) -> bool:
+        """ Return True if change synced or still in progress (coalescing changes or waiting echoes of sync) """
+        if change := group.sync_machine.observe(all_vlc, states):
+            self.sync_change(group, change, all_vlc, states)
+        return change is not None or group.sync_machine.phase != Phase.IDLE
+
+    def sync_change(self, group: GroupState, change: Change, all_vlc: Mapping[VlcId, Vlc],
+                    states: Dict[VlcId, State]):
+        # Workaround Save volumes (already probed in status).
+        # When playlist items changed ALSO happen volumes sync by some reason. But SHOULD NOT!
+        volumes: List[tuple[Vlc, int]] = []
+        if not self.app_config.volume_sync and change.playlist_changed:
+            volumes = [(all_vlc[vlc_id], state.volume) for vlc_id, state in states.items() if vlc_id in all_vlc]
+
+        in_group = f" in group {group.name}" if group.name is not None else ""
+        print(f"\nVlc state change detected from ({change.vlc.vlc_id}){in_group}", flush=True)
+        if group.master_clock:
+            group.master_clock.follow(change.vlc, all_vlc)
+        self.env.sync_all(change.state, change.vlc, self.app_config, all_vlc)
+        # Including wait of coalesce window
+        DETECTION_TO_SYNC.observe(time.time() - change.detected_at)
+
+        # Restore volumes if needed
+        # Unconditionally: player could change volume later, when new item audio started
+        for vlc_next, volume in volumes:
+            if volume is not None and not vlc_next.degraded:
+                vlc_next.set_volume(volume)
+        group.sync_machine.synced(change.state, all_vlc)
+
+    def probe_all(self, all_vlc: Mapping[VlcId, Vlc]) -> Dict[VlcId, State]:
+        """ Probe state (including volume) of all players. Lost players are skipped (degraded) """
+        states = {}
+        if not self.poller:
+            for vlc_id, vlc in all_vlc.items():
+                try:
+                    states[vlc_id] = vlc.cur_state()
+                except VlcConnectionError as e:
+                    log_degraded(vlc_id, e)
+            return states
+
+        for vlc_id, state in self.poller.probe_all(all_vlc).items():
+            if isinstance(state, VlcConnectionError):
+                # Connection of player is already dropped
+                log_degraded(vlc_id, state)
+            elif isinstance(state, Exception):
+                raise state
+            else:
+                states[vlc_id] = state
+        return states
+
+    def sync_volume(self, all_vlc: Mapping[VlcId, Vlc], states: Dict[VlcId, State]) -> bool:
+        for vlc_id, state in states.items():
+            vlc = all_vlc[vlc_id]
+            cur_volume = state.volume
             if vlc.prev_volume != cur_volume:
-                for vlc_id_for_sync, vlc_for_sync in self.env.all_vlc.items():
+                for vlc_id_for_sync, vlc_for_sync in all_vlc.items():
                     vlc_for_sync.prev_volume = cur_volume
-                    if vlc_for_sync != vlc:
+                    if vlc_for_sync != vlc and not vlc_for_sync.degraded:
                         vlc_for_sync.set_volume(cur_volume)
-                break
+                return True
+
+        return False
+
+    def wait_next_tick(self, timeout: float):
+        time.sleep(self.tick_timeout(timeout))
+
+    def tick_timeout(self, timeout: float) -> float:
+        """ Wake up earlier for position measurement of master clock mode """
+        now = time.time()
+        for group in self.groups.values():
+            if group.master_clock and (wake_in := group.master_clock.wake_in(now)) is not None:
+                timeout = min(timeout, wake_in)
+        return timeout
 
     def log_with_debounce(self, msg: str, _debounce=5):
         if time.time() > self.supress_log_until:
@@ -103,3 +237,5 @@ class Syncer:
     def close(self):
         if self.env:
             self.env.close()
+        if self.poller:
+            self.poller.close()
@@ -1,85 +1,260 @@
 from __future__ import annotations
 
-from functools import lru_cache
-import re
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+import json
 import socket
 import threading
 import time
-from typing import Set, List, Optional
+from types import MappingProxyType
+from typing import Callable, Dict, Mapping, Set, List, Optional
+import zlib
 
 from loguru import logger
 
+from vlcsync import rc_parser
 from vlcsync.app_config import AppConfig
-from vlcsync.vlc_finder import IVlcListFinder
-from vlcsync.vlc_socket import VlcSocket
-from vlcsync.vlc_state import PlayState, State, VlcId, PlayList, PlayListItem
+from vlcsync.clock_model import TIME_PROBE_INTERVAL, ClockModel
+from vlcsync.metrics import DISCOVERY_DURATION, SYNCS, remove_player
+from vlcsync.vlc_finder import DiscoveryWatcher, IVlcListFinder
+from vlcsync.vlc_http import VlcHttpConnection
+from vlcsync.vlc_socket import VlcConnectionError, VlcSocket
+from vlcsync.vlc_state import PlayState, State, VlcId, PlayList, PlayListItem, slotted
 
 VLC_IFACE_IP = "127.0.0.42"
-RE_PLAYSTATE_COMPILED = re.compile(r"\( state (playing|stopped|paused) \)")
-RE_PLAYLIST_ITEM = re.compile(r'\| {2}([ *])(\d+) - ')
+SYNC_POOL_SIZE = 16
+REGISTER_POOL_SIZE = 16
+PLAYLIST_REFRESH_INTERVAL = 5
+RESCAN_INTERVAL = 5
+WATCHED_RESCAN_INTERVAL = 30
 
 socket.setdefaulttimeout(0.5)
 
 
+@slotted
+@dataclass
+class Probe:
+    """ Parsed answers of state probe (without playlist) """
+    play_state: PlayState
+    input_key: bytes
+    volume: Optional[int]
+    probe_time: float
+    seek: Optional[int] = None
+    seek_measured: bool = False
+    """ Seek returned by get_time (otherwise predicted by clock model) """
+    vid_start_at: Optional[float] = None
+
+    def to_state(self, playlist: PlayList) -> State:
+        return State(self.play_state,
+                     self.seek,
+                     playlist.active_order_index(),
+                     # Abs time of video start
+                     self.vid_start_at if self.vid_start_at is not None else self.probe_time - (self.seek or 0),
+                     self.volume
+                     )
+
+
+@dataclass
+class SyncPlan:
+    """ Commands for sync play state and timeline. Seek target depends on time of commands arrival """
+    cmds: List[str]
+    seek_state: Optional[State] = None
+
+    def commands(self, arrive_at: float) -> List[str]:
+        if self.seek_state is None:
+            return self.cmds
+        return [*self.cmds, f"seek {self.seek_state.seek_at(arrive_at)}"]
+
+    def __bool__(self):
+        return bool(self.cmds) or self.seek_state is not None
+
+
+class PlaylistTracker:
+    """
+    Track playlist without fetching it on every probe.
+
+    Playlist is refetched only when input (or title) in ``status`` answer changed, or after ``refresh_interval``
+    (i.e. playlist reordered without changing current input). Parsed playlist is reused while content hash
+    of playlist answer is the same.
+    """
+
+    def __init__(self, refresh_interval: float = PLAYLIST_REFRESH_INTERVAL,
+                 parse_playlist: Optional[Callable[[bytes | memoryview], PlayList]] = None):
+        self.refresh_interval = refresh_interval
+        self.parse_playlist = parse_playlist or Vlc._extract_playlist
+        self.playlist: Optional[PlayList] = None
+        self._input_key: Optional[bytes] = None
+        self._content_hash: Optional[int] = None
+        self._refresh_at = 0.0
+
+    def is_outdated(self, input_key: bytes) -> bool:
+        return self.playlist is None or input_key != self._input_key or time.time() >= self._refresh_at
+
+    def update(self, input_key: bytes, playlist_answer: bytes | memoryview) -> PlayList:
+        content_hash = zlib.crc32(playlist_answer)
+        if self.playlist is None or content_hash != self._content_hash:
+            self.playlist = self.parse_playlist(playlist_answer)
+            self._content_hash = content_hash
+
+        self._input_key = input_key
+        self._refresh_at = time.time() + self.refresh_interval
+        return self.playlist
+
+
 class Vlc:
-    def __init__(self, vlc_id: VlcId):
+    connection_class = VlcSocket
+
+    def __init__(self, vlc_id: VlcId, time_probe_interval: float = TIME_PROBE_INTERVAL):
         self.vlc_id = vlc_id
-        self.vlc_conn = VlcSocket(vlc_id)
+        self.vlc_conn = self.connection_class(vlc_id)
+        self.playlist_tracker = PlaylistTracker(parse_playlist=self._extract_playlist)
+        self.clock = ClockModel(time_probe_interval)
         self.prev_state: State = self.cur_state()
-        self.prev_volume = self.volume()
+        self.prev_volume = self.prev_state.volume
+
+    @property
+    def latency(self) -> float:
+        """ One way latency estimate (half of round trip time) """
+        return (self.vlc_conn.rtt or 0) / 2
+
+    @property
+    def degraded(self) -> bool:
+        """ Connection lost. Player stays registered with last known state until reconnected """
+        return self.vlc_conn.degraded
+
+    @property
+    def reconnect_due(self) -> bool:
+        return self.vlc_conn.reconnect_due
+
+    def reconnect(self) -> bool:
+        """
+        Reconnect in place if degraded (with backoff). Return True if connected.
+        Player becomes active (not degraded) only when connected, so could be called out of sync loop.
+        """
+        if not self.degraded:
+            return True
+        # Player could be changed while disconnected. Clock is not used until connected
+        self.clock.invalidate()
+        if not self.vlc_conn.reconnect():
+            return False
+
+        print(f"Reconnected to {self.vlc_id}", flush=True)
+        return True
 
     def play_state(self) -> PlayState:
-        status = self.vlc_conn.cmd("status")
+        status = self.vlc_conn.cmd_raw("status")
         return self._extract_state(status)
 
     def get_seek(self) -> int | None:
-        seek = self.vlc_conn.cmd("get_time")
-        if seek != '':
-            return int(seek)
-        return None
+        seek = self.vlc_conn.cmd_raw("get_time")
+        return self._extract_seek(seek)
 
     def playlist_goto(self, vlc_internal_index: int):
+        self.clock.invalidate()
         self.vlc_conn.cmd(f"goto {vlc_internal_index}")
 
     def playlist(self) -> PlayList:
-        cmd_resp = self.vlc_conn.cmd("playlist")
+        cmd_resp = self.vlc_conn.cmd_raw("playlist")
         return self._extract_playlist(cmd_resp)
 
     def volume(self) -> Optional[int]:
-        vol = self.vlc_conn.cmd("volume")
-        if vol.strip() != '':
-            return int(float(vol.replace(",",'.')))
-        else:
-            return None
+        vol = self.vlc_conn.cmd_raw("volume")
+        return self._extract_volume(vol)
 
     def set_volume(self, volume: int):
         self.vlc_conn.cmd(f"volume {volume}")
         self.prev_volume = volume
 
     def seek(self, seek: int):
+        self.clock.invalidate()
         self.vlc_conn.cmd(f"seek {seek}")
 
+    def set_rate(self, rate: float):
+        """ Playback speed (1 is normal) """
+        self.clock.invalidate()
+        self.vlc_conn.cmd(f"rate {rate:g}")
+
     def stop(self):
+        self.clock.invalidate()
         self.vlc_conn.cmd("stop")
 
     def pause(self):
+        self.clock.invalidate()
         self.vlc_conn.cmd("pause")
 
     def play(self):
+        self.clock.invalidate()
         self.vlc_conn.cmd("play")
 
-    def cur_state(self) -> State:
-        cur_seek = self.get_seek()
+    def cur_state(self, sync_cmds: List[str] = ()) -> State:
+        """ ``sync_cmds`` are sent in the same round trip before probe commands """
+        if sync_cmds:
+            self.clock.invalidate()
+        commands = self.probe_commands()
+        answers = self.vlc_conn.cmds_raw(*sync_cmds, *commands)
+        probe = self.parse_probe(commands, answers[len(sync_cmds):], time.time())
+        if followup := self.followup_commands(probe):
+            self.update_probe(probe, followup, self.vlc_conn.cmds_raw(*followup), time.time())
+        return self.finish_probe(probe)
+
+    def measure_time_at(self, at: float):
+        """ Request position to be executed at given abs time (sent ahead by latency) for clock model bounds """
+        if (delay := at - self.latency - time.time()) > 0:
+            time.sleep(delay)
+        executed_at = time.time() + self.latency
+        self.clock.refine(self._extract_seek(self.vlc_conn.cmd_raw("get_time")), executed_at)
+
+    def probe_commands(self) -> List[str]:
+        """ Commands for state probe. Sent at once (pipelined). Play state, input and volume are all in status """
+        commands = ["status"]
+        if self.clock.needs_time_probe(time.time()):
+            commands.append("get_time")
+        return commands
 
-        return State(self.play_state(),
-                     cur_seek,
-                     self.playlist().active_order_index(),
-                     # Abs time of video start
-                     time.time() - (cur_seek or 0)
-                     )
-
-    def is_state_change(self) -> (bool, State, bool):
-        cur_state: State = self.cur_state()
+    @staticmethod
+    def parse_probe(commands: List[str], answers: List[bytes | memoryview], probe_time: float) -> Probe:
+        """ Parse answers on ``probe_commands()`` """
+        answer_by_cmd = dict(zip(commands, answers))
+        status = answer_by_cmd["status"]
+        probe = Probe(Vlc._extract_state(status),
+                      Vlc._extract_input(status),
+                      rc_parser.parse_status_volume(status),
+                      probe_time)
+        if "get_time" in answer_by_cmd:
+            probe.seek = Vlc._extract_seek(answer_by_cmd["get_time"])
+            probe.seek_measured = True
+        return probe
+
+    def followup_commands(self, probe: Probe) -> List[str]:
+        """ Commands needed after status received: get_time on state change and playlist if outdated """
+        commands = []
+        if not probe.seek_measured and self.clock.is_outdated(probe.play_state, probe.input_key):
+            commands.append("get_time")
+        if self.playlist_tracker.is_outdated(probe.input_key):
+            commands.append("playlist")
+        return commands
+
+    def update_probe(self, probe: Probe, commands: List[str], answers: List[bytes | memoryview], probe_time: float):
+        for command, answer in zip(commands, answers):
+            if command == "get_time":
+                probe.seek = self._extract_seek(answer)
+                probe.seek_measured = True
+                probe.probe_time = probe_time
+            elif command == "playlist":
+                self.playlist_tracker.update(probe.input_key, answer)
+
+    def finish_probe(self, probe: Probe) -> State:
+        if probe.seek_measured:
+            self.clock.observe(probe.seek, probe.probe_time, probe.play_state, probe.input_key, probe.vid_start_at)
+        else:
+            probe.seek = self.clock.predict(probe.probe_time)
+            probe.vid_start_at = self.clock.vid_start_at()
+        return probe.to_state(self.playlist_tracker.playlist)
+
+    def is_state_change(self, cur_state: State | None = None) -> (bool, State, bool):
+        """ Compare with previous state. Probe player when ``cur_state`` not provided """
+        if cur_state is None:
+            cur_state = self.cur_state()
         prev_state: State = self.prev_state
         full_same, playlist_same = cur_state.same(prev_state)
 
@@ -87,83 +262,106 @@ class Vlc:
         return not full_same, cur_state, not playlist_same
 
     def sync_to(self, new_state: State, source: Vlc, app_config: AppConfig) -> State:
+        plan = self.prepare_sync(new_state, source, app_config)
 
-        self._sync_playlist(new_state)
-        self._sync_playstate(new_state)
-        if not app_config.no_timestamp_sync:
-            self._sync_timeline(new_state, source)
-
-        cur_state = self.cur_state()
+        # Verify state in the same round trip as sync commands
+        cur_state = self.cur_state(sync_cmds=plan.commands(time.time() + self.latency))
         self.prev_state = cur_state
 
         return cur_state
 
-    def _sync_timeline(self, new_state: State, source: Vlc):
-        cur_play_state = self.play_state()
+    def prepare_sync(self, new_state: State, source: Vlc, app_config: AppConfig) -> SyncPlan:
+        """ Sync playlist item and return plan for sync play state and timeline """
+        # Single round trip for both
+        playlist, status = self.vlc_conn.cmds_raw("playlist", "status")
+        cur_play_state = self._extract_state(status)
+        cur_playlist = self.playlist_tracker.update(self._extract_input(status), playlist)
+
+        if self._sync_playlist(new_state, cur_playlist):
+            # Goto changes play state
+            cur_play_state = self.play_state()
+
+        sync_cmds = []
+        if playstate_cmd := self._sync_playstate(new_state, cur_play_state):
+            sync_cmds.append(playstate_cmd)
+            # Expected play state after command
+            cur_play_state = new_state.play_state
+
+        seek = not app_config.no_timestamp_sync and self._sync_timeline(source, cur_play_state)
+        return SyncPlan(sync_cmds, new_state if seek else None)
 
+    def dispatch(self, sync_cmds: List[str]) -> float:
+        """ Send sync commands without waiting answers (see ``complete_dispatch()``). Return dispatch time """
+        self.clock.invalidate()
+        self.vlc_conn.send(*sync_cmds)
+        return time.time()
+
+    def complete_dispatch(self, sync_cmds: List[str]):
+        self.vlc_conn.recv(len(sync_cmds))
+
+    def verify_sync(self) -> State:
+        cur_state = self.cur_state()
+        self.prev_state = cur_state
+        return cur_state
+
+    def _sync_timeline(self, source: Vlc, cur_play_state: PlayState) -> bool:
+        """ Return True if timeline sync (seek) needed """
         if cur_play_state == PlayState.PAUSED and source == self:
             """
             Skip sync seek with himself on pause (avoid flickering)
             As half-seconds not supported and cannot to set.
             """
-            pass
+            return False
         else:
             # In all other cases
-            self.seek(new_state.seek)
+            return True
 
-    def _sync_playstate(self, new_state: State):
-        cur_play_state: PlayState = self.play_state()
+    def _sync_playstate(self, new_state: State, cur_play_state: PlayState) -> Optional[str]:
+        """ Return command for sync play state (if needed) """
         if cur_play_state != new_state.play_state:
             if new_state.play_state == PlayState.STOPPED:
-                self.stop()
+                return "stop"
             elif new_state.play_state == PlayState.PLAYING:
                 if cur_play_state in [PlayState.PAUSED, PlayState.STOPPED]:
-                    self.play()
+                    return "play"
             elif new_state.play_state == PlayState.PAUSED:
                 if cur_play_state == PlayState.PLAYING:
-                    self.pause()
+                    return "pause"
             else:
                 logger.warning(f"Unknown new play state {new_state.play_state} for player")
 
-    def _sync_playlist(self, new_state: State):
-        cur_playlist = self.playlist()
+        return None
+
+    def _sync_playlist(self, new_state: State, cur_playlist: PlayList) -> bool:
+        """ Return True if playlist item changed """
         if new_state.is_play_or_pause() and cur_playlist.active_order_index() != new_state.playlist_order_idx:
             if new_state.playlist_order_idx is not None and len(cur_playlist.items) > new_state.playlist_order_idx:
                 self.playlist_goto(cur_playlist.items[new_state.playlist_order_idx].vlc_internal_index)
             else:
                 self.stop()
+            return True
+        return False
 
     @staticmethod
-    @lru_cache(maxsize=128)
-    def _extract_state(status: str):
-        match = RE_PLAYSTATE_COMPILED.search(status)
-        return PlayState(match.group(1)) if match else PlayState.UNKNOWN
+    def _extract_volume(vol: bytes | memoryview) -> Optional[int]:
+        return rc_parser.parse_volume(vol)
 
     @staticmethod
-    @lru_cache(maxsize=128)
-    def _extract_playlist(resp: str) -> PlayList:
-        """ Playlist answer Format:
-        +----[ Playlist - playlist ]
-        | 1 - Плейлист
-        |   6 - Video 1.mkv (00:23:37) [played 1 time]
-        |  *4 - Video 2.mkv (00:23:44) [played 2 times]
-        |   3 - Video 3.mkv (00:23:43) [played 1 time]
-        |   5 - Video 4.mkv (00:23:44) [played 1 time]
-        | 2 - Медиатека
-        |   12 - Video 6.mkv (00:23:44)
-        +----[ End of playlist ]
-        """
+    def _extract_seek(seek: bytes | memoryview) -> int | None:
+        return rc_parser.parse_time(seek)
 
-        items: List[PlayListItem] = []
-        active: Optional[PlayListItem] = None
+    @staticmethod
+    def _extract_input(status: bytes | memoryview) -> bytes:
+        """ Current input and title lines of status. Changed when playlist item changed """
+        return rc_parser.parse_input(status)
 
-        for idx, match in enumerate(re.finditer(RE_PLAYLIST_ITEM, resp)):
-            item = PlayListItem(idx, match.group(2))
-            items.append(item)
-            if match.group(1) == "*":
-                active = item
+    @staticmethod
+    def _extract_state(status: bytes | memoryview):
+        return rc_parser.parse_state(status)
 
-        return PlayList(items, active)
+    @staticmethod
+    def _extract_playlist(resp: bytes | memoryview) -> PlayList:
+        return rc_parser.parse_playlist(resp)
 
     def __repr__(self):
         return f"Vlc({self.vlc_id}, {self.prev_state=})"
@@ -172,11 +370,118 @@ class Vlc:
         self.vlc_conn.close()
 
 
+class VlcHttp(Vlc):
+    """
+    Player controlled by http interface (``vlc --extraintf http --http-password <password>``).
+
+    Same rc commands are mapped to requests by ``VlcHttpConnection``. Probe is single ``status.json``
+    request (state, volume, current item and position), so position is measured on every probe.
+    """
+    connection_class = VlcHttpConnection
+
+    def probe_commands(self) -> List[str]:
+        return ["status"]
+
+    @staticmethod
+    def parse_probe(commands: List[str], answers: List[bytes | memoryview], probe_time: float) -> Probe:
+        status = json.loads(bytes(answers[0]))
+        seek = status.get("time")
+        return Probe(PlayState(status.get("state")),
+                     VlcHttp._input_key(status),
+                     status.get("volume"),
+                     probe_time,
+                     seek,
+                     seek_measured=True,
+                     vid_start_at=probe_time - VlcHttp._precise_seek(status) if seek is not None else None)
+
+    @staticmethod
+    def _precise_seek(status: dict) -> float:
+        """
+        Sub-second position by ``position`` (0..1) of ``length``. Both ``time`` and ``length`` are truncated
+        to whole seconds, so result is kept within second of ``time``
+        """
+        seek = status["time"]
+        if status.get("length"):
+            return min(max(status.get("position", 0) * status["length"], seek), seek + 0.999)
+        return seek
+
+    @staticmethod
+    def _input_key(status: dict) -> bytes:
+        return str(status.get("currentplid")).encode()
+
+    @staticmethod
+    def _extract_volume(vol: bytes | memoryview) -> Optional[int]:
+        return json.loads(bytes(vol)).get("volume")
+
+    @staticmethod
+    def _extract_seek(seek: bytes | memoryview) -> int | None:
+        return json.loads(bytes(seek)).get("time")
+
+    @staticmethod
+    def _extract_input(status: bytes | memoryview) -> bytes:
+        return VlcHttp._input_key(json.loads(bytes(status)))
+
+    @staticmethod
+    def _extract_state(status: bytes | memoryview):
+        return PlayState(json.loads(bytes(status)).get("state"))
+
+    @staticmethod
+    def _extract_playlist(resp: bytes | memoryview) -> PlayList:
+        """ Leaves of ``playlist.json`` tree in order (i.e. playlist and media library items, same as rc) """
+        items: List[PlayListItem] = []
+        active: Optional[PlayListItem] = None
+
+        nodes = [json.loads(bytes(resp))]
+        while nodes:
+            node = nodes.pop()
+            if node.get("type") == "leaf":
+                item = PlayListItem(len(items), int(node["id"]))
+                items.append(item)
+                if node.get("current") == "current":
+                    active = item
+            else:
+                nodes.extend(reversed(node.get("children", [])))
+
+        return PlayList(items, active)
+
+
+def log_residual(vlc: Vlc, target: State, synced: State):
+    """ Timeline offset of player after sync (positive: player is behind target) """
+    if target.play_state == synced.play_state == PlayState.PLAYING:
+        residual = synced.vid_start_at - target.vid_start_at
+        logger.debug(f"Residual {residual * 1000:+.0f} ms of {vlc.vlc_id} (latency {vlc.latency * 1000:.3f} ms)")
+
+
+def log_degraded(vlc_id: VlcId, e: Exception):
+    print(f"Lost connection to {vlc_id} ({e}), keep last known state and reconnect...", flush=True)
+
+
+def guarded(vlc: Vlc, func: Callable, *args):
+    """ Player lost on sync becomes degraded, but does not break sync of others. Return None on error """
+    try:
+        return func(*args)
+    except VlcConnectionError as e:
+        log_degraded(vlc.vlc_id, e)
+        return None
+
+
 class VlcProcs:
-    def __init__(self, vlc_list_providers: Set[IVlcListFinder]):
+    def __init__(self, vlc_list_providers: Set[IVlcListFinder], watcher: Optional[DiscoveryWatcher] = None,
+                 rescan_interval: float = RESCAN_INTERVAL, time_probe_interval: float = TIME_PROBE_INTERVAL):
         self.closed = False
-        self._vlc_instances: dict[VlcId, Vlc] = {}
+        self.time_probe_interval = time_probe_interval
+        self._vlc_instances: Mapping[VlcId, Vlc] = MappingProxyType({})
+        """ Immutable snapshot, replaced (copy on write) on register/dereg """
+        self._registry_lock = threading.Lock()
+        self._sync_pool = ThreadPoolExecutor(max_workers=SYNC_POOL_SIZE, thread_name_prefix="vlc-sync")
+        self._register_pool = ThreadPoolExecutor(max_workers=REGISTER_POOL_SIZE, thread_name_prefix="vlc-register")
+        self._reconnects: Dict[VlcId, Future] = {}
         self.vlc_list_providers = vlc_list_providers
+        self.rescan_interval = rescan_interval
+        self._rescan = threading.Event()
+        self.watcher = watcher
+        if watcher:
+            watcher.start(on_change=self._rescan.set)
         self.vlc_finder_thread = threading.Thread(target=self.refresh_vlc_list_periodically, daemon=True)
         self.vlc_finder_thread.start()
 
@@ -197,56 +502,161 @@ class VlcProcs:
             for orphaned_vlc in (self._vlc_instances.keys() - vlc_candidates):
                 self.dereg(orphaned_vlc)
 
-            # Populate if not exists
-            for vlc_id in vlc_candidates:
-                if vlc_id not in self._vlc_instances.keys():
-                    if vlc := self.try_connect(vlc_id):
-                        print(f"Found active instance {vlc_id}, with state {vlc.cur_state()}", flush=True)
-                        self._vlc_instances[vlc_id] = vlc
+            # Populate if not exists. Connect concurrently, publish each player as soon as ready
+            new_vlc_ids = set(vlc_candidates) - self._vlc_instances.keys()
+            connecting = [self._register_pool.submit(self.try_connect, vlc_id) for vlc_id in new_vlc_ids]
+            for future in as_completed(connecting):
+                if vlc := future.result():
+                    self.register(vlc)
 
+            DISCOVERY_DURATION.observe(time.time() - start)
             logger.debug(f"Compute all_vlc (took {time.time() - start:.3f})...")
-            time.sleep(5)
 
-    @staticmethod
-    def try_connect(vlc_id):
+            if self.watcher:
+                self.watcher.watch_pids(vlc_id.pid for vlc_id in self._vlc_instances.keys() if vlc_id.pid)
+            # Periodic rescan is fallback, if watcher enabled
+            self._rescan.wait(self.rescan_interval)
+            self._rescan.clear()
+
+    def try_connect(self, vlc_id):
         try:
-            return Vlc(vlc_id)
+            vlc_class = VlcHttp if vlc_id.scheme == "http" else Vlc
+            return vlc_class(vlc_id, self.time_probe_interval)
         except Exception as e:
             logger.opt(exception=True).debug("Cannot connect to {0}, cause: {1}", vlc_id, e)
             print(f"Cannot connect to {vlc_id} socket, cause: {e}. Skipping. Enable debug for more info. See --help. ", flush=True)
             return None
 
+    def register(self, vlc: Vlc):
+        with self._registry_lock:
+            if self.closed:
+                vlc.close()
+                return
+            self._vlc_instances = MappingProxyType({**self._vlc_instances, vlc.vlc_id: vlc})
+        # State probed on connect
+        print(f"Found active instance {vlc.vlc_id}, with state {vlc.prev_state}", flush=True)
+
+    def reconnect_degraded(self):
+        """
+        Start reconnect of degraded players (backoff delay elapsed) on registration pool: unreachable player
+        (up to connect and banner timeouts) does not stall sync of others. Player is active again once connected
+        """
+        for vlc_id, vlc in self._vlc_instances.items():
+            if (future := self._reconnects.get(vlc_id)) and not future.done():
+                continue
+            if vlc.reconnect_due and not self.closed:
+                self._reconnects[vlc_id] = self._register_pool.submit(vlc.reconnect)
+        for vlc_id in self._reconnects.keys() - self._vlc_instances.keys():
+            del self._reconnects[vlc_id]
+
     @property
-    def all_vlc(self) -> dict[VlcId, Vlc]:
-        return self._vlc_instances.copy()  # copy: for thread safe
-
-    def sync_all(self, state: State, source_vlc: Vlc, app_config: AppConfig):
-        logger.debug(">" * 60)
-        logger.debug(f"Detect change to {state} from {source_vlc.vlc_id}")
-        logger.debug(f" old --> {source_vlc.prev_state} ")
-        logger.debug(f" new --> {state} ")
-        logger.debug(f" Time diff abs(old - new) {abs(source_vlc.prev_state.vid_start_at - state.vid_start_at)}")
-        logger.debug("<" * 60)
-        logger.debug("")
+    def all_vlc(self) -> Mapping[VlcId, Vlc]:
+        """ Read-only snapshot: never mutated, so safe to iterate without copy while discovery registers players """
+        return self._vlc_instances
+
+    @property
+    def active_vlc(self) -> Mapping[VlcId, Vlc]:
+        """ Players not degraded (i.e. connected) """
+        all_vlc = self._vlc_instances
+        if not any(vlc.degraded for vlc in all_vlc.values()):
+            return all_vlc
+        return MappingProxyType({vlc_id: vlc for vlc_id, vlc in all_vlc.items() if not vlc.degraded})
+
+    def sync_all(self, state: State, source_vlc: Optional[Vlc], app_config: AppConfig,
+                 players: Optional[Mapping[VlcId, Vlc]] = None):
+        """
+        ``source_vlc`` is None, if change detected not by local player (i.e. received from coordinator).
+        ``players`` limits sync to group of players (all active ones by default).
+        """
+        if players is None:
+            players = self.active_vlc
+        else:
+            players = {vlc_id: vlc for vlc_id, vlc in players.items() if not vlc.degraded}
+        if source_vlc:
+            logger.debug(">" * 60)
+            logger.debug(f"Detect change to {state} from {source_vlc.vlc_id}")
+            logger.debug(f" old --> {source_vlc.prev_state} ")
+            logger.debug(f" new --> {state} ")
+            logger.debug(f" Time diff abs(old - new) {abs(source_vlc.prev_state.vid_start_at - state.vid_start_at)}")
+            logger.debug("<" * 60)
+            logger.debug("")
         print(">>> Sync players...", flush=True)
+        SYNCS.inc()
 
-        for next_pid, next_vlc in self.all_vlc.items():
-            next_vlc: Vlc
-            new_state = next_vlc.sync_to(state, source_vlc, app_config)
-            print(f"    Synced {next_pid} to {new_state}", flush=True)
+        if app_config.parallel_sync:
+            self._sync_all_parallel(state, source_vlc, app_config, players)
+        else:
+            for next_pid, next_vlc in players.items():
+                next_vlc: Vlc
+                if new_state := guarded(next_vlc, next_vlc.sync_to, state, source_vlc, app_config):
+                    print(f"    Synced {next_pid} to {new_state}", flush=True)
+                    log_residual(next_vlc, state, new_state)
         print()
 
+    def _sync_all_parallel(self, state: State, source_vlc: Optional[Vlc], app_config: AppConfig,
+                           all_vlc: Mapping[VlcId, Vlc]):
+        """
+        Sync in three phases:
+          - prepare: concurrently sync playlist items and compute sync commands
+          - dispatch: send commands to all players back-to-back, then collect answers
+          - verify: concurrently probe players
+        """
+        plans = dict(zip(all_vlc.keys(), self._sync_pool.map(
+            lambda vlc: guarded(vlc, vlc.prepare_sync, state, source_vlc, app_config), all_vlc.values())))
+
+        # Slowest link first, so commands arrive to all players at the same moment
+        to_dispatch = sorted((vlc for vlc_id, vlc in all_vlc.items() if plans[vlc_id]),
+                             key=lambda vlc: vlc.latency, reverse=True)
+        arrive_at = time.time() + (to_dispatch[0].latency if to_dispatch else 0)
+        sent = {vlc_id: [] for vlc_id in all_vlc.keys()}
+        # Arrival to players is not observable: local send times shifted by estimated latency
+        send_skew = []
+        for vlc in to_dispatch:
+            if (delay := arrive_at - vlc.latency - time.time()) > 0:
+                time.sleep(delay)
+            sent[vlc.vlc_id] = plans[vlc.vlc_id].commands(arrive_at)
+            if dispatched_at := guarded(vlc, vlc.dispatch, sent[vlc.vlc_id]):
+                send_skew.append(dispatched_at + vlc.latency - arrive_at)
+        for vlc_id, vlc in all_vlc.items():
+            if not vlc.degraded:
+                guarded(vlc, vlc.complete_dispatch, sent[vlc_id])
+
+        new_states = self._sync_pool.map(lambda vlc: None if vlc.degraded else guarded(vlc, vlc.verify_sync),
+                                         all_vlc.values())
+        for (next_pid, next_vlc), new_state in zip(all_vlc.items(), new_states):
+            if new_state:
+                print(f"    Synced {next_pid} to {new_state}", flush=True)
+                log_residual(next_vlc, state, new_state)
+
+        if send_skew:
+            skew = max(send_skew) - min(send_skew)
+            print(f"    Send skew (latency compensated) {skew * 1000:.3f} ms", flush=True)
+
     def dereg(self, vlc_id: VlcId):
         print(f"Detect vlc instance closed {vlc_id}", flush=True)
-        if vlc_to_close := self._vlc_instances.pop(vlc_id, None):
+        with self._registry_lock:
+            vlc_instances = dict(self._vlc_instances)
+            vlc_to_close = vlc_instances.pop(vlc_id, None)
+            self._vlc_instances = MappingProxyType(vlc_instances)
+        remove_player(vlc_id)
+        if vlc_to_close:
             vlc_to_close.close()
+            if (future := self._reconnects.get(vlc_id)) and not future.done():
+                # Connection opened by reconnect in progress
+                future.add_done_callback(lambda _: vlc_to_close.close())
 
     def close(self):
-        for vlc in self._vlc_instances.values():
+        with self._registry_lock:
+            self.closed = True
+            vlc_instances, self._vlc_instances = self._vlc_instances, MappingProxyType({})
+        for vlc in vlc_instances.values():
             vlc.close()
 
-        self.closed = True
-        self._vlc_instances.clear()
+        if self.watcher:
+            self.watcher.close()
+        self._rescan.set()
+        self._sync_pool.shutdown(wait=False)
+        self._register_pool.shutdown(wait=False)
 
     def __del__(self):
         self.close()
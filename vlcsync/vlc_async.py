@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import selectors
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Generator, List, Mapping, Union
+
+from vlcsync.vlc import Vlc
+from vlcsync.vlc_socket import ANSWER_TIMEOUT, VlcConnectionError
+from vlcsync.vlc_state import State, VlcId
+
+HTTP_POOL_SIZE = 16
+
+ProbeSteps = Generator[List[str], List[memoryview], State]
+
+
+class AsyncPoller:
+    """
+    Probe state of all players concurrently.
+
+    Rc interface serves single client, so own connection of every player is used: probe commands are sent
+    to all players at once, then answers are received by single selector as soon as any socket is readable.
+    Tick latency is bounded by the slowest player instead of sum of all round trips.
+    Http players (no persistent socket) are probed in threads meanwhile.
+    """
+
+    def __init__(self, answer_timeout: float = ANSWER_TIMEOUT):
+        self.answer_timeout = answer_timeout
+        self._selector = selectors.DefaultSelector()
+        self._http_pool = ThreadPoolExecutor(HTTP_POOL_SIZE, thread_name_prefix="http-probe")
+
+    def probe_all(self, all_vlc: Mapping[VlcId, Vlc]) -> Dict[VlcId, Union[State, Exception]]:
+        """ Return state per player or exception, if probe failed """
+        results: Dict[VlcId, Union[State, Exception]] = {}
+        http_probes: Dict[VlcId, Future] = {}
+        for vlc_id, vlc in all_vlc.items():
+            if vlc_id.scheme == "http":
+                http_probes[vlc_id] = self._http_pool.submit(vlc.cur_state)
+            else:
+                self._start(vlc, self._probe(vlc), results)
+
+        self._collect(results)
+
+        for vlc_id, future in http_probes.items():
+            try:
+                results[vlc_id] = future.result()
+            except Exception as e:
+                results[vlc_id] = e
+        # Order of players
+        return {vlc_id: results[vlc_id] for vlc_id in all_vlc.keys()}
+
+    @staticmethod
+    def _probe(vlc: Vlc) -> ProbeSteps:
+        """ Probe steps (like ``Vlc.cur_state()``): yield commands, receive answers on them """
+        commands = vlc.probe_commands()
+        probe = vlc.parse_probe(commands, (yield commands), time.time())
+        if followup := vlc.followup_commands(probe):
+            vlc.update_probe(probe, followup, (yield followup), time.time())
+        return vlc.finish_probe(probe)
+
+    def _start(self, vlc: Vlc, steps: ProbeSteps, results: Dict[VlcId, Union[State, Exception]],
+               answers: List[memoryview] = None):
+        """ Advance probe of player to next round trip (or finish it) """
+        try:
+            commands = steps.send(answers)
+            vlc.vlc_conn.start_cmds(*commands)
+        except StopIteration as stop:
+            results[vlc.vlc_id] = stop.value
+            return
+        except Exception as e:
+            results[vlc.vlc_id] = e
+            return
+        self._selector.register(vlc.vlc_conn.sock, selectors.EVENT_READ,
+                                (vlc, steps, time.perf_counter() + self.answer_timeout))
+
+    def _collect(self, results: Dict[VlcId, Union[State, Exception]]):
+        while self._selector.get_map():
+            deadline = min(key.data[2] for key in self._selector.get_map().values())
+            for key, _ in self._wait(max(deadline - time.perf_counter(), 0)):
+                vlc, steps, _ = key.data
+                try:
+                    answers = vlc.vlc_conn.poll_answers()
+                except VlcConnectionError as e:
+                    self._selector.unregister(key.fileobj)
+                    results[vlc.vlc_id] = e
+                    continue
+
+                if answers is not None:
+                    self._selector.unregister(key.fileobj)
+                    self._start(vlc, steps, results, answers)
+
+            now = time.perf_counter()
+            for key in list(self._selector.get_map().values()):
+                vlc, steps, deadline = key.data
+                if now >= deadline:
+                    self._selector.unregister(key.fileobj)
+                    steps.close()
+                    results[vlc.vlc_id] = vlc.vlc_conn.expire_cmds()
+
+    def _wait(self, timeout: float):
+        return self._selector.select(timeout)
+
+    def close(self):
+        self._selector.close()
+        self._http_pool.shutdown(wait=False)
@@ -2,16 +2,31 @@ from __future__ import annotations
 
 import functools
 import getpass
+import os
+import socket
+import select
+import struct
 import sys
+import threading
+import time
 import traceback
-from typing import Set
+from typing import Callable, Dict, Iterable, List, Optional, Set
 from contextlib import contextmanager
 
+from loguru import logger
 import psutil
 from psutil import Process
 
 from vlcsync.vlc_state import VlcId
 
+TCP_LISTEN = "0A"
+UNIX_ACCEPT_CON = "00010000"
+UNIX_STREAM = "0001"
+WATCH_INTERVAL = 0.1
+NEW_PROC_WINDOW = 3
+MAX_NEW_PIDS = 256
+""" More pids spawned between checks (or pid wrap-around) are not inspected, left for periodic rescan """
+
 
 @contextmanager
 def skip_on_error():
@@ -22,6 +37,15 @@ def skip_on_error():
         # whatever your common handling is
 
 
+@contextmanager
+def skip_on_os_error():
+    """ Process can exit during scan """
+    try:
+        yield
+    except OSError:
+        pass
+
+
 class IVlcListFinder:
     def get_vlc_list(self) -> Set[VlcId]:
         raise NotImplementedError()
@@ -88,6 +112,274 @@ class LocalProcessFinderProvider(IVlcListFinder):
         return False
 
 
+class ProcNetFinderProvider(IVlcListFinder):
+    """
+    Fast local discovery for Linux (without psutil).
+
+    Reads ``/proc/net/tcp`` once for LISTEN sockets of current user on iface and ``/proc/net/unix``
+    for listening unix sockets (``vlc --rc-unix <path>``), then maps socket inodes to pids
+    via ``/proc/<pid>/fd`` only for vlc processes. Nothing else scanned if no listen sockets found.
+    """
+
+    def __init__(self, iface: str, proc_root: str = "/proc"):
+        self._iface = iface
+        self._proc_root = proc_root
+        # Address in /proc/net/tcp is in host byte order
+        self._iface_hex = "%08X" % struct.unpack("=I", socket.inet_aton(iface))[0]
+
+    @staticmethod
+    def is_supported(proc_root: str = "/proc") -> bool:
+        return os.path.exists(os.path.join(proc_root, "net", "tcp"))
+
+    def get_vlc_list(self) -> Set[VlcId]:
+        vlc_ports = set()
+
+        listen_ports = self.listen_ports()
+        listen_paths = self.listen_unix_paths()
+        if not listen_ports and not listen_paths:
+            return vlc_ports
+
+        for pid in self._find_vlc_pids():
+            for inode in self._socket_inodes(pid):
+                if port := listen_ports.get(inode):
+                    vlc_ports.add(VlcId(self._iface, port, pid))
+                elif path := listen_paths.get(inode):
+                    vlc_ports.add(VlcId(path, 0, pid, scheme="unix"))
+
+        return vlc_ports
+
+    def listen_ports(self) -> Dict[int, int]:
+        """ Socket inode -> port of LISTEN sockets on iface owned by current user """
+        uid = os.getuid()
+        listen_ports = {}
+        with skip_on_os_error(), open(os.path.join(self._proc_root, "net", "tcp")) as f:
+            next(f)  # Header
+            for line in f:
+                # sl local_address rem_address st tx_queue:rx_queue tr:tm->when retrnsmt uid timeout inode
+                fields = line.split()
+                addr, port = fields[1].split(":")
+                if fields[3] == TCP_LISTEN and addr == self._iface_hex and int(fields[7]) == uid:
+                    listen_ports[int(fields[9])] = int(port, 16)
+
+        return listen_ports
+
+    def listen_unix_paths(self) -> Dict[int, str]:
+        """ Socket inode -> path of listening unix stream sockets (owner is checked by vlc pid) """
+        listen_paths = {}
+        with skip_on_os_error(), open(os.path.join(self._proc_root, "net", "unix")) as f:
+            next(f)  # Header
+            for line in f:
+                # Num RefCount Protocol Flags Type St Inode Path
+                fields = line.split(maxsplit=7)
+                # No path: unnamed socket, "@" prefix: abstract one (rc interface has real path)
+                if (len(fields) == 8 and fields[3] == UNIX_ACCEPT_CON and fields[4] == UNIX_STREAM
+                        and not fields[7].startswith("@")):
+                    listen_paths[int(fields[6])] = fields[7].rstrip("\n")
+
+        return listen_paths
+
+    def _find_vlc_pids(self) -> List[int]:
+        uid = os.getuid()
+        pids = []
+        for entry in os.scandir(self._proc_root):
+            if not entry.name.isdigit():
+                continue
+            with skip_on_os_error():
+                if entry.stat().st_uid == uid and self._is_vlc(entry.path):
+                    pids.append(int(entry.name))
+
+        return pids
+
+    @staticmethod
+    def _is_vlc(proc_path: str) -> bool:
+        with open(os.path.join(proc_path, "comm"), "rb") as f:
+            if f.read().strip().lower() == b"vlc":
+                return True
+        with open(os.path.join(proc_path, "cmdline"), "rb") as f:
+            return b"vlc" in f.read().lower()
+
+    def _socket_inodes(self, pid: int) -> Set[int]:
+        inodes = set()
+        fd_path = os.path.join(self._proc_root, str(pid), "fd")
+        with skip_on_os_error():
+            for fd in os.listdir(fd_path):
+                with skip_on_os_error():
+                    link = os.readlink(os.path.join(fd_path, fd))
+                    if link.startswith("socket:["):
+                        inodes.add(int(link[8:-1]))
+
+        return inodes
+
+
+class DiscoveryWatcher:
+    """
+    Linux only. Wakes up discovery on vlc start/exit instead of waiting for next periodic scan.
+
+      - exit: pidfd of every registered local vlc is polled
+      - start: when new vlc process of current user spawned (pids up to last one in ``/proc/loadavg``
+        are inspected), listen sockets on iface (and unix ones) are checked during short window,
+        as vlc opens rc socket little later than start. Process not being vlc yet (forked, not exec'ed)
+        is rechecked once on next check
+
+    Netlink process connector needs CAP_NET_ADMIN and inotify does not work for ``/proc``,
+    so periodic scan is still kept as fallback.
+    """
+
+    def __init__(self, iface: str, proc_root: str = "/proc", interval: float = WATCH_INTERVAL):
+        self._listen_finder = ProcNetFinderProvider(iface, proc_root)
+        self._proc_root = proc_root
+        self._interval = interval
+        self._on_change: Optional[Callable[[], None]] = None
+
+        self._lock = threading.Lock()
+        self._pids: Set[int] = set()
+        self._pidfds: Dict[int, int] = {}  # pidfd -> pid
+        self._exited: Set[int] = set()
+        self._poll = select.poll()
+
+        self._last_pid: Optional[int] = None
+        self._recheck_pids: Set[int] = set()
+        self._listen_inodes: frozenset = frozenset()
+        self._check_listen_until = 0.0
+        self._closed = False
+
+    @staticmethod
+    def is_supported(proc_root: str = "/proc") -> bool:
+        return ProcNetFinderProvider.is_supported(proc_root) and os.path.exists(os.path.join(proc_root, "loadavg"))
+
+    def start(self, on_change: Callable[[], None]):
+        self._on_change = on_change
+        self._last_pid = self._read_last_pid()
+        self._listen_inodes = self._read_listen_inodes()
+        threading.Thread(target=self._watch, daemon=True, name="vlc-discovery-watcher").start()
+
+    def watch_pids(self, pids: Iterable[int]):
+        with self._lock:
+            self._pids = set(pids)
+
+    def _watch(self):
+        while not self._closed:
+            try:
+                self._sync_pidfds()
+                changed = self._wait_exit()
+                changed = self._check_new_listen() or changed
+            except Exception as e:
+                logger.opt(exception=True).debug("Discovery watcher failed, cause: {0}", e)
+                changed = False
+                time.sleep(self._interval)
+
+            if changed and not self._closed:
+                logger.debug("Discovery watcher detected vlc start/exit")
+                self._on_change()
+
+        for pidfd in list(self._pidfds):
+            self._unwatch(pidfd)
+
+    def _sync_pidfds(self):
+        with self._lock:
+            pids = self._pids.copy()
+
+        self._exited &= pids
+        for pidfd, pid in list(self._pidfds.items()):
+            if pid not in pids:
+                self._unwatch(pidfd)
+
+        watched = set(self._pidfds.values())
+        for pid in pids - watched - self._exited:
+            try:
+                pidfd = os.pidfd_open(pid)
+            except (AttributeError, OSError):
+                # No pidfd support (python < 3.9, linux < 5.3) or process already exited
+                self._exited.add(pid)
+                continue
+            self._pidfds[pidfd] = pid
+            self._poll.register(pidfd, select.POLLIN)
+
+    def _wait_exit(self) -> bool:
+        if not self._pidfds:
+            time.sleep(self._interval)
+            return False
+
+        events = self._poll.poll(self._interval * 1000)
+        for pidfd, _ in events:
+            self._exited.add(self._pidfds[pidfd])
+            self._unwatch(pidfd)
+        return bool(events)
+
+    def _unwatch(self, pidfd: int):
+        self._poll.unregister(pidfd)
+        os.close(pidfd)
+        self._pidfds.pop(pidfd, None)
+
+    def _check_new_listen(self) -> bool:
+        now = time.time()
+        last_pid = self._read_last_pid()
+        recheck_pids, self._recheck_pids = self._recheck_pids, set()
+        new_pids = set()
+        if last_pid != self._last_pid:
+            if last_pid is not None and self._last_pid is not None and 0 < last_pid - self._last_pid <= MAX_NEW_PIDS:
+                new_pids.update(range(self._last_pid + 1, last_pid + 1))
+            self._last_pid = last_pid
+
+        if self._find_new_vlc(new_pids, recheck_pids):
+            self._check_listen_until = now + NEW_PROC_WINDOW
+
+        if now > self._check_listen_until:
+            return False
+
+        listen_inodes = self._read_listen_inodes()
+        changed = listen_inodes != self._listen_inodes
+        self._listen_inodes = listen_inodes
+        return changed
+
+    def _find_new_vlc(self, new_pids: Set[int], recheck_pids: Set[int]) -> bool:
+        found = False
+        for pid in new_pids | recheck_pids:
+            proc_path = os.path.join(self._proc_root, str(pid))
+            with skip_on_os_error():
+                if not self._is_own_process(proc_path, pid):
+                    continue
+                if ProcNetFinderProvider._is_vlc(proc_path):
+                    found = True
+                elif pid not in recheck_pids:
+                    self._recheck_pids.add(pid)
+
+        return found
+
+    @staticmethod
+    def _is_own_process(proc_path: str, pid: int) -> bool:
+        """ Process (not thread, they share pid numbers) of current user """
+        fields = {}
+        with open(os.path.join(proc_path, "status")) as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                fields[name] = value.split()
+                if name == "Uid":
+                    break
+        return int(fields["Tgid"][0]) == pid and int(fields["Uid"][0]) == os.getuid()
+
+    def _read_listen_inodes(self) -> frozenset:
+        return frozenset(self._listen_finder.listen_ports()) | frozenset(self._listen_finder.listen_unix_paths())
+
+    def _read_last_pid(self) -> Optional[int]:
+        with skip_on_os_error(), open(os.path.join(self._proc_root, "loadavg")) as f:
+            # i.e. "0.00 0.01 0.05 1/123 4567"
+            return int(f.read().split()[-1])
+
+        # noinspection PyUnreachableCode
+        return None
+
+    def close(self):
+        self._closed = True
+
+
+def local_finder(iface: str) -> IVlcListFinder:
+    """ Fast /proc based finder if available, else psutil based one """
+    if ProcNetFinderProvider.is_supported():
+        return ProcNetFinderProvider(iface)
+    return LocalProcessFinderProvider(iface)
+
+
 def print_exc():
     print("-" * 60)
     print("Exception in user code: ", flush=True)
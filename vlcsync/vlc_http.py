@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import base64
+import http.client
+import socket
+import time
+from typing import List, Optional
+from urllib.parse import urlencode
+
+from loguru import logger
+
+from vlcsync.metrics import connection_failed, metrics_label, observe_round_trip
+from vlcsync.vlc_socket import ANSWER_TIMEOUT, Backoff, VlcConnectionError, ewma, is_rtt_sample
+from vlcsync.vlc_state import VlcId
+
+STATUS_PATH = "/requests/status.json"
+PLAYLIST_PATH = "/requests/playlist.json"
+HTTP_COMMANDS = {
+    "seek": "seek",
+    "pause": "pl_pause",
+    "play": "pl_play",
+    "stop": "pl_stop",
+    "goto": "pl_play",
+    "volume": "volume",
+    "rate": "rate",
+}
+
+
+def command_path(command: str) -> str:
+    """ Map rc command to http interface request path, i.e. "seek 10" -> /requests/status.json?command=seek&val=10 """
+    name, _, arg = command.partition(" ")
+    if name == "playlist":
+        return PLAYLIST_PATH
+    if name not in HTTP_COMMANDS or (name == "volume" and not arg):
+        # status, get_time, volume: all in status answer
+        return STATUS_PATH
+
+    query = {"command": HTTP_COMMANDS[name]}
+    if arg:
+        query["id" if name == "goto" else "val"] = arg
+    return f"{STATUS_PATH}?{urlencode(query)}"
+
+
+class VlcHttpConnection:
+    """
+    Http interface (``vlc --extraintf http``) counterpart of ``VlcSocket``.
+
+    Accepts same (rc) commands, answer is json returned by request. Requests go over single keep-alive
+    connection in order of commands (i.e. "play" before "seek"), http.client has no pipelining,
+    so ``send()`` sends only first request and next one is sent as soon as previous answer received.
+
+    On connection error connection becomes degraded until ``reconnect()``.
+    """
+
+    def __init__(self, vlc_id: VlcId):
+        self.vlc_id = vlc_id
+        self._headers = {}
+        if vlc_id.password is not None:
+            credentials = base64.b64encode(f":{vlc_id.password}".encode()).decode()
+            self._headers["Authorization"] = f"Basic {credentials}"
+        self._conn = http.client.HTTPConnection(vlc_id.addr, vlc_id.port, timeout=ANSWER_TIMEOUT)
+        self._queued: List[str] = []
+        self._in_flight: Optional[str] = None
+        self._reused = False
+        self.rtt: Optional[float] = None
+        self._metrics_label = metrics_label(vlc_id)
+        self._backoff = Backoff()
+        logger.trace("Connect http {0}", vlc_id)
+        self.cmd_raw("status")
+
+    @property
+    def degraded(self) -> bool:
+        return self._backoff.failed_since is not None
+
+    @property
+    def reconnect_due(self) -> bool:
+        """ Degraded and backoff delay elapsed """
+        return self.degraded and self._backoff.is_due()
+
+    def disconnect(self, timeout: bool = False):
+        """ Drop connection after error (counted by metrics). Reconnected later by ``reconnect()`` """
+        connection_failed(self._metrics_label, timeout)
+        self._backoff.failed()
+        self._reset()
+
+    def reconnect(self) -> bool:
+        """ Reconnect in place, if degraded and backoff delay elapsed. Return True if connected """
+        if not self.degraded:
+            return True
+        if not self._backoff.is_due():
+            return False
+
+        try:
+            self._queued.append("status")
+            self._send_next()
+            self._read_answer()
+        except (OSError, http.client.HTTPException) as e:
+            logger.debug("Cannot reconnect to {0}, cause: {1}", self.vlc_id, e)
+            self.disconnect(isinstance(e, socket.timeout))
+            return False
+
+        self._backoff.succeeded()
+        return True
+
+    def cmd(self, command: str) -> str:
+        return self.cmds(command)[0]
+
+    def cmds(self, *commands: str) -> List[str]:
+        return [answer.decode() for answer in self.cmds_raw(*commands)]
+
+    def cmd_raw(self, command: str) -> bytes:
+        return self.cmds_raw(command)[0]
+
+    def cmds_raw(self, *commands: str) -> List[bytes]:
+        start = time.perf_counter()
+        self.send(*commands)
+        answers = self.recv_raw(len(commands))
+        elapsed = time.perf_counter() - start
+        if is_rtt_sample(commands):
+            # Request per command, one after another
+            self.rtt = ewma(self.rtt, elapsed / len(commands))
+        observe_round_trip(elapsed, self._metrics_label, commands)
+        return answers
+
+    def send(self, *commands: str):
+        """ Send commands without waiting answers. Answers should be received later by ``recv()`` """
+        logger.trace(">>> Send http {0} to {1}", commands, self.vlc_id)
+        if self.degraded:
+            raise VlcConnectionError(f"Http not connected.", self.vlc_id)
+        self._queued.extend(commands)
+        if self._in_flight is None:
+            try:
+                self._send_next()
+            except (OSError, http.client.HTTPException) as e:
+                self.disconnect(isinstance(e, socket.timeout))
+                raise VlcConnectionError(f"Http send error.", self.vlc_id, timeout=isinstance(e, socket.timeout)) from e
+
+    def recv(self, count: int) -> List[str]:
+        return [answer.decode() for answer in self.recv_raw(count)]
+
+    def recv_raw(self, count: int) -> List[bytes]:
+        answers = []
+        try:
+            for _ in range(count):
+                answers.append(self._read_answer())
+                if self._queued:
+                    self._send_next()
+        except (OSError, http.client.HTTPException) as e:
+            self.disconnect(isinstance(e, socket.timeout))
+            raise VlcConnectionError(f"Http receive error.", self.vlc_id, timeout=isinstance(e, socket.timeout)) from e
+
+        logger.trace("<<< Receive http {0} from {1}", answers, self.vlc_id)
+        return answers
+
+    def _send_next(self):
+        self._in_flight = self._queued.pop(0)
+        self._reused = self._conn.sock is not None
+        try:
+            self._request()
+        except ConnectionError:
+            if not self._reused:
+                raise
+            self._retry()
+
+    def _read_answer(self) -> bytes:
+        try:
+            response = self._conn.getresponse()
+        except ConnectionError:
+            if not self._reused:
+                raise
+            self._retry()
+            response = self._conn.getresponse()
+
+        answer = response.read()
+        command, self._in_flight = self._in_flight, None
+        if response.status != 200:
+            raise http.client.HTTPException(f"Unexpected http status {response.status} on {command}")
+        return answer
+
+    def _request(self):
+        self._conn.request("GET", command_path(self._in_flight), headers=self._headers)
+
+    def _retry(self):
+        """ Keep-alive connection closed by player while idle (i.e. request not read), so request is safe to repeat """
+        self._conn.close()
+        self._reused = False
+        self._request()
+
+    def _reset(self):
+        self._conn.close()
+        self._queued.clear()
+        self._in_flight = None
+
+    def close(self):
+        logger.trace("Close http connection {0}...", self.vlc_id)
+        self._reset()
@@ -2,49 +2,354 @@ from __future__ import annotations
 
 import socket
 import time
+from typing import List, Optional, Sequence, Tuple
 
 from loguru import logger
 
+from vlcsync.metrics import connection_failed, metrics_label, observe_round_trip
 from vlcsync.vlc_state import VlcId
 
 VLC_PROMPT = b"> "
+VLC_LINE_PROMPT = b"\n" + VLC_PROMPT
+RECV_BUFFER_SIZE = 4096
+ANSWER_TIMEOUT = 1
+SOCKET_TIMEOUT = 0.5
+RTT_EWMA_ALPHA = 0.2
+RECONNECT_MIN_DELAY = 0.1
+RECONNECT_MAX_DELAY = 5
+RTT_SAMPLE_COMMANDS = frozenset(("status", "get_time"))
+
+
+def connect_socket(vlc_id: VlcId, timeout: float) -> socket.socket:
+    """ Connected socket of rc interface: tcp or unix (``vlc --rc-unix <path>``) """
+    if not vlc_id.is_unix:
+        sock = socket.create_connection((vlc_id.addr, vlc_id.port), timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(timeout)
+        sock.connect(vlc_id.addr)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def ewma(prev: float | None, sample: float, alpha: float = RTT_EWMA_ALPHA) -> float:
+    return sample if prev is None else prev + alpha * (sample - prev)
+
+
+def is_rtt_sample(commands: Sequence[str]) -> bool:
+    """
+    Round trip of probe sized answers only. Large answers (playlist) and sync commands (executed by player)
+    would inflate latency estimate exactly when sync is compensated by it
+    """
+    return all(command in RTT_SAMPLE_COMMANDS for command in commands)
+
+
+def find_prompt(data: bytes | bytearray, pos: int, end: int, scan_from: int = 0) -> Tuple[int, int]:
+    """
+    Find prompt after answer started at ``pos``. Return (answer end, next answer start) or (-1, -1) if not found.
+
+    Prompt always starts a line (or answer itself, if answer empty), so "> " in the middle of line
+    (i.e. in media title) is not a prompt. Scan continues from ``scan_from`` (for incremental scan).
+    """
+    if data.startswith(VLC_PROMPT, pos, end):
+        return pos, pos + len(VLC_PROMPT)
+
+    prompt_idx = data.find(VLC_LINE_PROMPT, max(pos, scan_from), end)
+    if prompt_idx < 0:
+        return -1, -1
+
+    return prompt_idx + 1, prompt_idx + len(VLC_LINE_PROMPT)
+
+
+def split_answers(data: bytes, pos: int = 0, limit: int = -1) -> Tuple[List[bytes], int]:
+    """ Split stream of answers by prompt. Return complete answers (without prompt) and position of first unprocessed byte """
+    answers = []
+    while len(answers) != limit:
+        answer_end, next_pos = find_prompt(data, pos, len(data))
+        if answer_end < 0:
+            break
+
+        answers.append(data[pos:answer_end])
+        pos = next_pos
+
+    return answers, pos
+
+
+class RecvBuffer:
+    """
+    Reusable receive buffer.
+
+    Data received with ``recv_into()`` into preallocated bytearray (grows for large answers, i.e. long playlists),
+    prompt scanned incrementally and leftover kept for the next answer.
+    Answers are returned as memoryview of buffer, so valid only until next read.
+
+    Blocking ``read_answers()`` or step by step: ``fill()`` when socket is readable, then ``take_answers()``.
+    """
+
+    def __init__(self, size: int = RECV_BUFFER_SIZE):
+        self._buf = bytearray(size)
+        self._view = memoryview(self._buf)
+        self._pos = 0
+        self._end = 0
+        self._scan_from = 0
+        self._bounds: List[Tuple[int, int]] = []
+        """ Answers of current read found so far """
+
+    def read_answers(self, sock: socket.socket, count: int, timeout: float = ANSWER_TIMEOUT) -> List[memoryview]:
+        deadline = time.time() + timeout
+        while (answers := self.take_answers(count)) is None:
+            if time.time() > deadline:
+                raise TimeoutError()
+            self.fill(sock)
+        return answers
+
+    def take_answers(self, count: int) -> Optional[List[memoryview]]:
+        """ ``count`` answers, if all received. Otherwise None: found ones are kept, next call continues scan """
+        if not self._bounds:
+            self._compact()
+
+        while len(self._bounds) < count:
+            answer_end, next_pos = find_prompt(self._buf, self._pos, self._end, self._scan_from)
+            if answer_end < 0:
+                # Prompt can be split between chunks
+                self._scan_from = max(self._pos, self._end - len(VLC_LINE_PROMPT) + 1)
+                return None
+
+            self._bounds.append((self._pos, answer_end))
+            self._pos = self._scan_from = next_pos
+
+        bounds, self._bounds = self._bounds, []
+        return [self._view[start:end] for start, end in bounds]
+
+    def pending(self) -> bytes:
+        return bytes(self._view[self._pos:self._end])
+
+    def fill(self, sock: socket.socket):
+        """ Single receive (blocks until data, if socket is not readable) """
+        if self._end == len(self._buf):
+            self._grow()
+
+        received = sock.recv_into(self._view[self._end:])
+        if not received:
+            raise ConnectionAbortedError()
+        self._end += received
+
+    def _compact(self):
+        """ Move leftover to the buffer start """
+        if not self._pos:
+            return
+        leftover = self._end - self._pos
+        if leftover:
+            self._buf[:leftover] = self._buf[self._pos:self._end]
+        self._scan_from -= self._pos
+        self._pos, self._end = 0, leftover
+
+    def _grow(self):
+        # Allocate new buffer instead of resize: previous answers may still hold views of old one
+        new_buf = bytearray(len(self._buf) * 2)
+        new_buf[:self._end] = self._view[:self._end]
+        self._buf = new_buf
+        self._view = memoryview(new_buf)
+
+
+class Backoff:
+    """ Exponential backoff of reconnect attempts after connection error """
+
+    def __init__(self, min_delay: float = RECONNECT_MIN_DELAY, max_delay: float = RECONNECT_MAX_DELAY):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.failed_since: float | None = None
+        """ Time of first error of current outage, None if connected """
+        self.delay = 0.0
+        self.retry_at = 0.0
+
+    def failed(self):
+        now = time.time()
+        if self.failed_since is None:
+            self.failed_since = now
+            self.delay = self.min_delay
+        else:
+            self.delay = min(self.delay * 2, self.max_delay)
+        self.retry_at = now + self.delay
+
+    def succeeded(self):
+        self.failed_since = None
+
+    def is_due(self) -> bool:
+        return time.time() >= self.retry_at
 
 
 class VlcSocket:
+    """
+    Persistent rc connection.
+
+    On connection error socket is dropped (with not yet received answers) and connection becomes
+    degraded until ``reconnect()``.
+
+    Commands are sent and answered in a blocking round trip (``cmds()``), or started by ``start_cmds()``
+    and answers collected by ``poll_answers()`` whenever socket is readable (many players probed by one selector).
+    """
+
     def __init__(self, vlc_id: VlcId):
         self.vlc_id = vlc_id
-        logger.trace("Connect {0}", vlc_id)
-        self.sock = socket.create_connection((vlc_id.addr, vlc_id.port))
-        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
-        self._recv_answer()
+        self._metrics_label = metrics_label(vlc_id)
+        self.rtt: float | None = None
+        """ Round trip time estimate (EWMA over round trips of probe commands, see ``is_rtt_sample()``) """
+        self.sock: socket.socket | None = None
+        self._backoff = Backoff()
+        self._started: Optional[Tuple[Sequence[str], float]] = None
+        """ Commands started by ``start_cmds()`` and start time """
+        self._connect()
+
+    def _connect(self):
+        logger.trace("Connect {0}", self.vlc_id)
+        self._recv_buf = RecvBuffer()
+        # Explicit timeout: reconnect of unreachable player should not hang sync loop
+        self.sock = connect_socket(self.vlc_id, SOCKET_TIMEOUT)
+        self._recv_answers(1)
+
+    @property
+    def degraded(self) -> bool:
+        return self._backoff.failed_since is not None
+
+    @property
+    def reconnect_due(self) -> bool:
+        """ Degraded and backoff delay elapsed """
+        return self.degraded and self._backoff.is_due()
+
+    def disconnect(self, timeout: bool = False):
+        """ Drop connection after error (counted by metrics). Reconnected later by ``reconnect()`` """
+        connection_failed(self._metrics_label, timeout)
+        self._backoff.failed()
+        self.close()
+        self.sock = None
+
+    def reconnect(self) -> bool:
+        """ Reconnect in place, if degraded and backoff delay elapsed. Return True if connected """
+        if not self.degraded:
+            return True
+        if not self._backoff.is_due():
+            return False
+
+        try:
+            self._connect()
+        except VlcConnectionError as e:
+            # No banner: already dropped on receive
+            logger.debug("Cannot reconnect to {0}, cause: {1}", self.vlc_id, e)
+            return False
+        except OSError as e:
+            logger.debug("Cannot reconnect to {0}, cause: {1}", self.vlc_id, e)
+            self.disconnect(isinstance(e, socket.timeout))
+            return False
+
+        self._backoff.succeeded()
+        return True
 
     def cmd(self, command: str) -> str:
-        logger.trace(f">>> Send {command=} to {self.vlc_id}")
-        self.sock.send(f"{command}\r\n".encode())
-        data = self._recv_answer()
-        answer = data.decode().replace("> ", "").replace("\r\n", "")
-        logger.trace(f"<<< Receive {answer=} from {self.vlc_id}")
-        return answer
-
-    def _recv_answer(self):
-        data = b''
+        return self.cmds(command)[0]
+
+    def cmds(self, *commands: str) -> List[str]:
+        """ Pipelining: send all commands at once and return answer per command """
+        return [self._decode(answer) for answer in self.cmds_raw(*commands)]
+
+    def cmd_raw(self, command: str) -> memoryview:
+        return self.cmds_raw(command)[0]
+
+    def cmds_raw(self, *commands: str) -> List[memoryview]:
+        """ Same as ``cmds()``, but answers are views of receive buffer (valid until next command) """
+        start = time.perf_counter()
+        self.send(*commands)
+        answers = self.recv_raw(len(commands))
+        self._round_trip(commands, time.perf_counter() - start)
+        return answers
+
+    def start_cmds(self, *commands: str):
+        """ Send commands. Answers are collected by ``poll_answers()`` """
+        self._started = None
+        self.send(*commands)
+        self._started = (commands, time.perf_counter())
+
+    def poll_answers(self) -> Optional[List[memoryview]]:
+        """ Receive once (socket should be readable). Answers on started commands, if all received, otherwise None """
+        commands, start = self._started
         try:
-            timeout = time.time() + 1
-            while data[-2:] != VLC_PROMPT:
-                if time.time() > timeout:
-                    raise TimeoutError()
-                data += self.sock.recv(1024)
+            self._recv_buf.fill(self.sock)
+        except ConnectionAbortedError as e:
+            self.disconnect()
+            raise VlcConnectionError(f"Socket lost connection", self.vlc_id) from e
+        except OSError as e:
+            self.disconnect()
+            raise VlcConnectionError(f"Unexpected socket error.", self.vlc_id) from e
+
+        if (answers := self._recv_buf.take_answers(len(commands))) is None:
+            return None
+        self._started = None
+        self._round_trip(commands, time.perf_counter() - start)
+        logger.opt(lazy=True).trace("<<< Receive {0} from {1}",
+                                    lambda: [bytes(answer) for answer in answers], lambda: self.vlc_id)
+        return answers
 
+    def expire_cmds(self) -> VlcConnectionError:
+        """ Started commands not answered in time: drop connection (like timeout of ``cmds()``) """
+        self._started = None
+        self.disconnect(timeout=True)
+        return VlcConnectionError(f"Socket receive answer timeout.", self.vlc_id, timeout=True)
+
+    def _round_trip(self, commands: Sequence[str], elapsed: float):
+        if is_rtt_sample(commands):
+            self.rtt = ewma(self.rtt, elapsed)
+        observe_round_trip(elapsed, self._metrics_label, commands)
+
+    def send(self, *commands: str):
+        """ Send commands without waiting answers. Answers should be received later by ``recv()`` """
+        logger.trace(">>> Send {0} to {1}", commands, self.vlc_id)
+        if self.sock is None:
+            raise VlcConnectionError(f"Socket not connected.", self.vlc_id)
+        try:
+            self.sock.sendall("".join(f"{command}\r\n" for command in commands).encode())
+        except OSError as e:
+            self.disconnect()
+            raise VlcConnectionError(f"Socket send error.", self.vlc_id) from e
+
+    def recv(self, count: int) -> List[str]:
+        return [self._decode(answer) for answer in self.recv_raw(count)]
+
+    def recv_raw(self, count: int) -> List[memoryview]:
+        answers = self._recv_answers(count)
+        logger.opt(lazy=True).trace("<<< Receive {0} from {1}",
+                                    lambda: [bytes(answer) for answer in answers], lambda: self.vlc_id)
+        return answers
+
+    @staticmethod
+    def _decode(answer: memoryview) -> str:
+        return str(answer, "utf-8").replace("\r\n", "")
+
+    def _recv_answers(self, count: int) -> List[memoryview]:
+        if self.sock is None:
+            raise VlcConnectionError(f"Socket not connected.", self.vlc_id)
+        try:
+            return self._read_answers(count)
+        except VlcConnectionError as e:
+            # Late answers would be taken as answers on next commands, so connection is not reusable
+            self.disconnect(e.timeout)
+            raise
+
+    def _read_answers(self, count: int) -> List[memoryview]:
+        try:
+            return self._recv_buf.read_answers(self.sock, count)
         except ConnectionAbortedError as e:
             raise VlcConnectionError(f"Socket lost connection", self.vlc_id) from e
         except (socket.timeout, TimeoutError) as e:
-            logger.trace(f"Data when timeout {data}")
-            raise VlcConnectionError(f"Socket receive answer native timeout.", self.vlc_id) from e
+            logger.opt(lazy=True).trace("Data when timeout {0}", self._recv_buf.pending)
+            raise VlcConnectionError(f"Socket receive answer native timeout.", self.vlc_id, timeout=True) from e
         except OSError as e:
             raise VlcConnectionError(f"Unexpected socket error.", self.vlc_id) from e
 
-        return data
-
     def close(self):
         logger.trace("Close socket {0}...", self.vlc_id)
         try:
@@ -54,6 +359,7 @@ class VlcSocket:
 
 
 class VlcConnectionError(TimeoutError):
-    def __init__(self, msg: str, vlc_id: VlcId):
+    def __init__(self, msg: str, vlc_id: VlcId, timeout: bool = False):
         super().__init__(msg)
         self.vlc_id = vlc_id
+        self.timeout = timeout
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from enum import Enum
 from typing import Optional
 
@@ -20,6 +20,21 @@ Max 4 second diff calculated empirically
 """
 
 
+def slotted(cls):
+    """
+    Recreate dataclass with ``__slots__`` (i.e. ``dataclass(slots=True)`` of python 3.10+):
+    no instance ``__dict__``, so less memory and faster attribute access of objects created every tick.
+    """
+    field_names = tuple(f.name for f in fields(cls))
+    cls_dict = {key: value for key, value in cls.__dict__.items()
+                # Defaults are kept by generated __init__
+                if key not in field_names and key not in ("__dict__", "__weakref__")}
+    cls_dict["__slots__"] = field_names
+    new_cls = type(cls)(cls.__name__, cls.__bases__, cls_dict)
+    new_cls.__qualname__ = cls.__qualname__
+    return new_cls
+
+
 class PlayState(Enum):
     PLAYING = "playing"
     STOPPED = "stopped"
@@ -34,6 +49,7 @@ class PlayState(Enum):
         return self.value
 
 
+@slotted
 @dataclass
 class State:
     play_state: PlayState
@@ -49,6 +65,13 @@ class State:
        - Vlc.cur_state() 
     """
     vid_start_at: float = field(repr=False)
+    volume: Optional[int] = field(default=None, compare=False, repr=False)
+
+    def seek_at(self, at: float) -> int:
+        """ Position at given abs time (moves only while playing) """
+        if self.play_state == PlayState.PLAYING and self.vid_start_at:
+            return round(at - self.vid_start_at)
+        return self.seek
 
     def same(self, other: State):
         playlist_same = self.same_playlist_item(other)
@@ -85,12 +108,14 @@ class State:
         return self.playlist_order_idx == other.playlist_order_idx
 
 
+@slotted
 @dataclass
 class PlayListItem:
     order_index: int
     vlc_internal_index: int
 
 
+@slotted
 @dataclass
 class PlayList:
     items: List[PlayListItem]
@@ -100,11 +125,33 @@ class PlayList:
         return self.active_item.order_index if self.active_item else None
 
 
+@slotted
 @dataclass(frozen=True)
 class VlcId:
     addr: str
     port: int
     pid: Optional[int] = field(compare=False, hash=False, default=None)
+    scheme: str = "rc"
+    """
+    Player interface: "rc", "http" or "unix" (rc on unix socket, ``addr`` is socket path, ``port`` is 0).
+    Part of identity: rc and http interfaces on the same host:port are different players
+    """
+    password: Optional[str] = field(compare=False, hash=False, default=None, repr=False)
+
+    @property
+    def is_unix(self) -> bool:
+        return self.scheme == "unix"
+
+    @property
+    def address(self) -> str:
+        """ "host:port" or unix socket path """
+        return self.addr if self.is_unix else f"{self.addr}:{self.port}"
+
+    @property
+    def key(self) -> str:
+        """ Identity as string (without pid): "scheme://address" """
+        return f"{self.scheme}://{self.address}"
 
     def __str__(self):
-        return f"{self.addr}:{self.port}" + (f" (pid={self.pid})" if self.pid else "")
+        prefix = f"{self.scheme}://" if self.scheme != "rc" else ""
+        return f"{prefix}{self.address}" + (f" (pid={self.pid})" if self.pid else "")